@@ -0,0 +1,102 @@
+"""Benchmark role lookups of the paint path of the overview
+
+Usage:
+    $ python -m benchmarks.roles [rows]
+
+Reports how many calls to `QModelIndex.data()` per second are made of
+the roles the delegates of plug-ins and instances ask for per paint.
+
+"""
+
+import sys
+import time
+
+from pyblish_lite.vendor.Qt import QtCore
+import pyblish.api
+
+from pyblish_lite import model, util
+from pyblish_lite.constants import Roles, InstanceStates
+
+PaintRoles = (
+    Roles.TypeRole,
+    Roles.PublishFlagsRole,
+    Roles.IsEnabledRole,
+    QtCore.Qt.DisplayRole,
+    QtCore.Qt.CheckStateRole,
+    Roles.IsOptionalRole,
+    Roles.TimingRole,
+    Roles.ObjectIdRole,
+)
+
+PluginPaintRoles = PaintRoles + (
+    Roles.PluginActionsVisibleRole,
+    Roles.PluginActionProgressRole,
+)
+
+
+class Controller(object):
+    order_groups = util.OrderGroups
+
+    def __init__(self, context):
+        self.context = context
+
+
+def lookups_per_second(indexes, roles, duration=1.0):
+    lookups = 0
+    started = time.time()
+    while time.time() - started < duration:
+        for index in indexes:
+            for role in roles:
+                index.data(role)
+        lookups += len(indexes) * len(roles)
+
+    return lookups / (time.time() - started)
+
+
+def rows(model_):
+    indexes = []
+    for group_row in range(model_.rowCount()):
+        group = model_.index(group_row, 0)
+        for row in range(model_.rowCount(group)):
+            indexes.append(model_.index(row, 0, group))
+    return indexes
+
+
+def main(count=3000):
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+    context = pyblish.api.Context()
+    context._publish_states = InstanceStates.ContextType
+    context.data["name"] = "context"
+    for i in range(count):
+        context.create_instance("instance%d" % i, family="family%d" % (i % 20))
+
+    controller = Controller(context)
+    controller.order_groups.reset()
+
+    plugin_model = model.PluginModel(controller)
+    for i in range(count):
+        plugin = type(str("Plugin%d" % i), (pyblish.api.InstancePlugin,), {
+            "order": pyblish.api.ValidatorOrder,
+            "families": ["family%d" % (i % 20)],
+            "__doc__": "Validate family%d" % (i % 20),
+        })
+        plugin_model.append(plugin)
+
+    instance_model = model.InstanceModel(controller)
+    instance_model.append(context)
+    for instance in context:
+        instance_model.append(instance)
+
+    print("plug-ins:  %10.0f lookups/s" % lookups_per_second(
+        rows(plugin_model), PluginPaintRoles
+    ))
+    print("instances: %10.0f lookups/s" % lookups_per_second(
+        rows(instance_model), PaintRoles
+    ))
+
+    return app
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,79 @@
+"""Benchmark appending log records to the terminal
+
+Usage:
+    $ python -m benchmarks.terminal [records]
+
+Reports how many records per second are prepared and appended to
+`TerminalModel`, how long it takes to get the detail of each, and
+how long a few searches of every record take.
+
+"""
+
+import sys
+import time
+import logging
+
+from pyblish_lite.vendor.Qt import QtCore, QtWidgets
+
+from pyblish_lite import model
+
+
+levels = (logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR)
+
+queries = (
+    "processed",
+    "some instance level:error",
+    "plugin:plugin4 item",
+    "12345",
+)
+
+
+def records(count):
+    return [
+        logging.LogRecord(
+            "plugin%d" % (i % 50), levels[i % len(levels)],
+            "/path/to/plugin.py", i,
+            "Processed <item> %d\nof some instance" % i, [], None
+        )
+        for i in range(count)
+    ]
+
+
+def main(count=100000):
+    app = (
+        QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    )
+
+    terminal = model.TerminalModel()
+    result = {"instance": None, "records": records(count)}
+
+    started = time.time()
+    result["records"] = terminal.prepare_records(result)
+    terminal.update_with_result(result)
+    duration = time.time() - started
+
+    print("append: %10.0f records/s" % (count / duration))
+
+    started = time.time()
+    for row in range(terminal.rowCount()):
+        terminal.index(0, 0, terminal.index(row, 0)).data(
+            QtCore.Qt.DisplayRole
+        )
+    duration = time.time() - started
+
+    print("detail: %10.0f records/s" % (count / duration))
+
+    for query in queries:
+        started = time.time()
+        matches = terminal.search(query)
+        duration = time.time() - started
+
+        print("search: %10.1f ms, %d matches of %r" % (
+            duration * 1000, len(matches), query
+        ))
+
+    return app
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
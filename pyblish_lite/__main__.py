@@ -3,9 +3,12 @@ from .app import show
 
 if __name__ == '__main__':
     import argparse
+    import sys
 
     parser = argparse.ArgumentParser()
     parser.add_argument("--debug", action="store_true")
+    parser.add_argument("--headless", action="store_true",
+                        help="Publish without a window, e.g. on a farm")
 
     args = parser.parse_args()
 
@@ -16,4 +19,14 @@ if __name__ == '__main__':
         for Plugin in mock.plugins:
             pyblish.api.register_plugin(Plugin)
 
+    if args.headless:
+        from . import control
+
+        ctrl = control.HeadlessController()
+        ctrl.reset()
+        ctrl.publish()
+        ctrl.cleanup()
+
+        sys.exit(1 if ctrl.errored else 0)
+
     show()
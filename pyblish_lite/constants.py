@@ -56,8 +56,20 @@ Roles = roles(
 
     "TerminalItemTypeRole",
 
+    # Whether a record matches the search of the terminal
+    "TerminalMatchRole",
+
     "IntentItemValue",
 
+    # Seconds spent processing, see `util.add_timing`
+    "TimingRole",
+
+    # Paths to .pstats files of profiled pairs
+    "ProfilesRole",
+
+    # Bytes allocated by pairs, see `control.MemoryTracker`
+    "MemoryRole",
+
     type_name="ModelRoles"
 )
 
@@ -11,8 +11,23 @@ because this is how unittests are able to run without requiring
 an active window manager; such as via Travis-CI.
 """
 import os
+import re
 import sys
+import json
+import time
+import types
+import inspect
+import pickle
+import tempfile
+import itertools
 import traceback
+import logging
+import threading
+import contextlib
+import collections
+import multiprocessing
+from functools import partial
+from multiprocessing.pool import ThreadPool
 
 from .vendor.Qt import QtCore
 
@@ -20,20 +35,1274 @@ import pyblish.api
 import pyblish.util
 import pyblish.logic
 import pyblish.lib
+import pyblish.plugin
 import pyblish.version
 
 from . import util
+from .vendor import six
 from .constants import InstanceStates
 try:
     from pypeapp.lib.config import get_presets
 except Exception:
     get_presets = dict
 
+log = logging.getLogger("pyblish.lite")
+
+try:
+    # CPU time of the calling thread
+    thread_time = time.thread_time
+except AttributeError:
+    # Python 2
+    thread_time = time.clock
+
 
 class IterationBreak(Exception):
     pass
 
 
+class ParallelPairs(list):
+    """Pairs of a parallel-safe plug-in, to be processed all at once
+
+    Plug-ins declaring `parallel = True` are pure functions of their
+    instance and may be processed for all instances simultaneously.
+
+    Usage:
+        >>> class ValidateNaming(pyblish.api.InstancePlugin):
+        ...     parallel = True
+
+    """
+
+    def __init__(self, plugin, instances):
+        super(ParallelPairs, self).__init__(
+            (plugin, instance) for instance in instances
+        )
+        self.plugin = plugin
+
+
+class ParallelRecords(object):
+    """Attribute log records to one of the pairs processed simultaneously
+
+    Each pair listens in on the root logger, and thereby hears the
+    records of every other pair too. A record belongs to the pair
+    processed on the thread it was logged from. Records logged from
+    threads of plug-ins themselves belong to the earliest pair of the
+    plug-in logging them, else to the earliest pair still processing.
+
+    Usage:
+        >>> records = ParallelRecords()
+        >>> with records.attach(pyblish.api.InstancePlugin) as handler:
+        ...     pass
+
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handlers = []
+
+    @contextlib.contextmanager
+    def attach(self, plugin):
+        handler = _PairHandler(self, plugin.log.name)
+        root_logger = logging.getLogger()
+
+        with self._lock:
+            self._handlers.append(handler)
+        root_logger.addHandler(handler)
+
+        try:
+            yield handler
+        finally:
+            root_logger.removeHandler(handler)
+            with self._lock:
+                self._handlers.remove(handler)
+
+    def claim(self, record):
+        """Return id of the handler `record` belongs to"""
+        with self._lock:
+            owner = getattr(record, "pair", None)
+            if owner is None:
+                owner = record.pair = self._owner(record)
+        return owner
+
+    def _owner(self, record):
+        for handler in self._handlers:
+            if handler.thread == record.thread:
+                return id(handler)
+
+        for handler in self._handlers:
+            if (record.name == handler.logger or
+                    record.name.startswith(handler.logger + ".")):
+                return id(handler)
+
+        return id(self._handlers[0]) if self._handlers else None
+
+
+class _PairHandler(logging.Handler):
+    def __init__(self, records, logger):
+        # Not using super(), for compatibility with Python 2.6
+        logging.Handler.__init__(self)
+        self.records = records
+        self.logger = logger
+        self.thread = threading.current_thread().ident
+
+    def emit(self, record):
+        self.records.claim(record)
+
+    def owns(self, record):
+        """Return whether `record` belongs to this pair
+
+        Records never heard of, such as those of other processes,
+        belong to the pair they were returned with.
+
+        """
+
+        return getattr(record, "pair", id(self)) == id(self)
+
+
+class Context(pyblish.api.Context):
+    """Context counting changes to which instances it holds
+
+    `generation` is incremented whenever instances are added, removed
+    or replaced, such that those keeping track of instances need only
+    look for what changed once it was.
+
+    """
+
+    generation = 0
+
+
+def _counting(method):
+    def counting(self, *args, **kwargs):
+        self.generation += 1
+        return method(self, *args, **kwargs)
+
+    counting.__name__ = method.__name__
+    counting.__doc__ = method.__doc__
+    return counting
+
+
+for _name in ("append", "extend", "insert", "remove", "pop", "clear",
+              "__setitem__", "__delitem__", "__iadd__",
+              "__setslice__", "__delslice__"):
+    if hasattr(list, _name):
+        setattr(Context, _name, _counting(getattr(pyblish.api.Context, _name)))
+
+
+class Scheduler(QtCore.QObject):
+    """Run deferred steps of processing within a per-tick frame budget
+
+    Rather than waiting a fixed delay between each step, as many steps
+    as fit within `budget` milliseconds are run back to back before
+    control is handed back to the Qt event loop.
+
+    Modes:
+        interactive: Yield to Qt when the budget is exhausted, or
+            before a step which asked for a repaint first, such as
+            processing a plug-in right after it was marked in-progress.
+        throughput: Yield to Qt only when the budget is exhausted;
+            requests for a repaint are ignored.
+        synchronous: Never yield, run every step immediately. Used by
+            tests and the headless controller.
+
+    The mode may be set via the environment variable
+    "PYBLISH_SCHEDULER_MODE" and the budget via "PYBLISH_FRAME_BUDGET".
+    For backwards compatibility, "PYBLISH_DELAY=0" implies synchronous.
+
+    Arguments:
+        mode (str, optional): One of "interactive", "throughput"
+            or "synchronous", defaults to "interactive"
+        budget (float, optional): Milliseconds of work per tick,
+            defaults to a budget appropriate for `mode`
+
+    """
+
+    budgets = {
+        "interactive": 16,
+        "throughput": 100,
+        "synchronous": 0,
+    }
+
+    # Optional `Watchdog` to which each step is attributed
+    watchdog = None
+
+    def __init__(self, mode=None, budget=None, parent=None):
+        super(Scheduler, self).__init__(parent)
+
+        if mode is None:
+            mode = os.getenv("PYBLISH_SCHEDULER_MODE", "interactive")
+
+        assert mode in self.budgets, "Unsupported mode: %s" % mode
+
+        if budget is None:
+            budget = os.getenv("PYBLISH_FRAME_BUDGET")
+
+        self.mode = mode
+        self._budget = budget
+        self._queue = collections.deque()
+        self._draining = False
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._on_tick)
+
+    @property
+    def budget(self):
+        if self._budget is not None:
+            return float(self._budget)
+        return self.budgets[self.mode]
+
+    @budget.setter
+    def budget(self, value):
+        self._budget = value
+
+    def is_synchronous(self):
+        if self.mode == "synchronous":
+            return True
+        return float(os.getenv("PYBLISH_DELAY", 1)) == 0
+
+    def schedule(self, func, repaint=False):
+        """Run `func` as soon as the budget allows
+
+        Arguments:
+            func (callable): Any callable
+            repaint (bool, optional): Give Qt a chance to repaint
+                before calling `func`, only honored in interactive mode
+
+        """
+
+        self._queue.append((func, repaint))
+
+        if self.is_synchronous():
+            if not self._draining:
+                self._drain()
+
+        elif not self._timer.isActive():
+            self._timer.start(0)
+
+    def _drain(self):
+        self._draining = True
+        try:
+            while self._queue:
+                func, _ = self._queue.popleft()
+                func()
+        finally:
+            self._draining = False
+
+    def _on_tick(self):
+        honor_repaint = self.mode == "interactive"
+        budget = self.budget / 1000.0
+        start = time.time()
+        ran = 0
+        while self._queue:
+            func, repaint = self._queue[0]
+            if ran and repaint and honor_repaint:
+                break
+
+            self._queue.popleft()
+            if self.watchdog is not None:
+                with self.watchdog.handler(func.__name__):
+                    func()
+            else:
+                func()
+            ran += 1
+
+            if time.time() - start >= budget:
+                break
+
+        if self._queue:
+            self._timer.start(0)
+
+
+class Executor(object):
+    """Process plug-ins on the calling thread
+
+    Base of execution backends used by the Controller. A backend is
+    handed a function producing a result, such as `Controller._process`,
+    along with a callback to call once the result is in.
+
+    """
+
+    def submit(self, plugin, func, callback):
+        """Call `func` and pass its result on to `callback`
+
+        Arguments:
+            plugin (pyblish.api.Plugin): Plug-in `func` processes
+            func (callable): Callable producing a result
+            callback (callable): Called with the result of `func` and
+                exception info of the exception it raised, if any
+
+        """
+
+        try:
+            result = func()
+
+        except Exception:
+            return callback(None, sys.exc_info())
+
+        callback(result, None)
+
+    def shutdown(self):
+        pass
+
+
+class _Worker(QtCore.QObject):
+    processed = QtCore.Signal(object)
+
+    def process(self, job):
+        func, callback = job
+        try:
+            result, exc_info = func(), None
+
+        except Exception:
+            result, exc_info = None, sys.exc_info()
+
+        self.processed.emit((callback, result, exc_info))
+
+
+class WorkerThreadExecutor(QtCore.QObject, Executor):
+    """Process plug-ins on a dedicated worker thread
+
+    Keeps the GUI responsive while plug-ins are processed; results are
+    handed back to the main thread via queued signals, such that the
+    callback is always called on the main thread.
+
+    Plug-ins that must be run on the main thread, such as most which
+    interact with the API of a host, may say so via `main_thread`.
+
+    Usage:
+        >>> class CollectSelection(pyblish.api.ContextPlugin):
+        ...     main_thread = True
+
+    """
+
+    _submitted = QtCore.Signal(object)
+
+    def __init__(self, parent=None):
+        super(WorkerThreadExecutor, self).__init__(parent)
+
+        thread = QtCore.QThread(self)
+        worker = _Worker()
+        worker.moveToThread(thread)
+
+        self._submitted.connect(worker.process, QtCore.Qt.QueuedConnection)
+        worker.processed.connect(
+            self._on_processed, QtCore.Qt.QueuedConnection
+        )
+
+        app = QtCore.QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
+
+        thread.start()
+
+        self._thread = thread
+        self._worker = worker
+
+    def submit(self, plugin, func, callback):
+        if getattr(plugin, "main_thread", False):
+            return super(WorkerThreadExecutor, self).submit(
+                plugin, func, callback
+            )
+
+        self._submitted.emit((func, callback))
+
+    def shutdown(self):
+        if self._thread.isRunning():
+            self._thread.quit()
+            self._thread.wait()
+
+    def _on_processed(self, job):
+        callback, result, exc_info = job
+        callback(result, exc_info)
+
+
+class Unpicklable(Exception):
+    """Plug-in or data could not be sent to another process"""
+
+
+# Modules of plug-ins loaded by a process of a ProcessPool
+_remote_modules = {}
+
+
+def _pickle_items(data):
+    """Return picklable items of `data`, pickled, skipping the others"""
+    items = {}
+    for key, value in data.items():
+        try:
+            items[key] = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            continue
+    return items
+
+
+def _unpickle_items(items):
+    return dict(
+        (key, pickle.loads(value)) for key, value in items.items()
+    )
+
+
+def _changed_items(data, items):
+    """Return changes to `data` since it was pickled into `items`
+
+    Returns:
+        tuple: Pickled items which were changed or added, keys which
+            were removed and keys whose value can't be pickled
+
+    """
+
+    pickled = _pickle_items(data)
+    return (
+        dict(
+            (key, value) for key, value in pickled.items()
+            if items.get(key) != value
+        ),
+        [key for key in items if key not in data],
+        [key for key in data if key not in pickled],
+    )
+
+
+def _load_remote_plugin(path, name):
+    """Load plug-in `name` from module at `path`, in a process of the pool
+
+    Arguments:
+        path (str): Absolute path to the file of a discovered plug-in,
+            or name of an importable module
+        name (str): Name of the plug-in class
+
+    """
+
+    if not os.path.isfile(path):
+        __import__(path)
+        return getattr(sys.modules[path], name)
+
+    key = (path, os.path.getmtime(path))
+    module = _remote_modules.get(key)
+    if module is None:
+        module_name = os.path.splitext(os.path.basename(path))[0]
+        module = types.ModuleType(module_name)
+        module.__file__ = path
+
+        with open(path, "rb") as f:
+            six.exec_(compile(f.read(), path, "exec"), module.__dict__)
+
+        _remote_modules[key] = module
+
+    plugin = getattr(module, name)
+    plugin.__module__ = path
+    return plugin
+
+
+def _process_remotely(payload):
+    """Process a plug-in packed by `ProcessPool`, in a process of the pool
+
+    Returns:
+        bytes: Pickled outcome of processing, with changes to data of
+            the context and instances made by the plug-in, and what of
+            those changes can't be sent back.
+
+    """
+
+    plugin, context_items, instances, index = pickle.loads(payload)
+    plugin = _load_remote_plugin(*plugin)
+
+    context = pyblish.api.Context()
+    context.data.update(_unpickle_items(context_items))
+    for name, members, data_items in instances:
+        instance = context.create_instance(name)
+        instance.extend(members)
+        instance.data.update(_unpickle_items(data_items))
+
+    originals = list(context)
+
+    instance = None if index is None else context[index]
+    cpu_started = thread_time()
+    result = pyblish.plugin.process(plugin, context, instance)
+    cpu = thread_time() - cpu_started
+
+    # Arguments of a message may be anything
+    for record in result["records"]:
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+
+    error = result["error"]
+    try:
+        pickle.dumps(error, pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        picklable_error = Exception("%s" % error)
+        picklable_error.traceback = error.traceback
+        picklable_error.formatted_traceback = error.formatted_traceback
+        error = picklable_error
+
+    context.data.pop("results", None)
+    changes = {
+        "context": _changed_items(context.data, context_items),
+        "instances": [
+            _changed_items(_instance.data, data_items)
+            for _instance, (_, _, data_items) in zip(originals, instances)
+        ]
+    }
+
+    # Instances are sent back by position, not as a whole
+    lost = []
+    before, after = set(map(id, originals)), set(map(id, context))
+    created = [item for item in context if id(item) not in before]
+    removed = [item for item in originals if id(item) not in after]
+    if created:
+        lost.append("Instances created in the process pool are lost: %s" % (
+            ", ".join(item.name for item in created)
+        ))
+    if removed:
+        lost.append("Instances removed in the process pool are kept: %s" % (
+            ", ".join(item.name for item in removed)
+        ))
+
+    unpicklable = ["context[%r]" % key for key in changes["context"][2]]
+    for _instance, (_, _, keys) in zip(originals, changes["instances"]):
+        unpicklable.extend("%s[%r]" % (_instance.name, key) for key in keys)
+    if unpicklable:
+        lost.append("Data that could not be pickled is lost: %s" % (
+            ", ".join(unpicklable)
+        ))
+
+    return pickle.dumps({
+        "success": result["success"],
+        "error": error,
+        "records": result["records"],
+        "duration": result["duration"],
+        "cpu": cpu,
+        "context": changes["context"][:2],
+        "instances": [items[:2] for items in changes["instances"]],
+        "lost": lost,
+    }, pickle.HIGHEST_PROTOCOL)
+
+
+class ProcessPool(object):
+    """Process extractors in a pool of processes, side-stepping the GIL
+
+    The plug-in and the data of the context and instance are pickled
+    and sent to a process of the pool, where the plug-in is processed.
+    Log records and the error come back in the same shape as when
+    processed in-process, and data changed, added or removed by the
+    plug-in is applied to the original context and instance.
+
+    Only data comes back. Instances created or removed by the plug-in,
+    and values it sets that cannot be pickled, are lost, with a warning
+    among the records of the result.
+
+    Plug-ins discovered from a path are loaded from that same path by
+    the pool, registered plug-ins must be importable. Data of the context
+    that cannot be pickled is left out, whereas a plug-in or instance
+    which cannot be pickled raises `Unpicklable`.
+
+    Pairs are still processed one at a time, combine with `parallel`
+    to have every instance of an extractor processed simultaneously.
+
+    Arguments:
+        processes (int, optional): Number of processes in the pool,
+            defaults to the number of CPUs
+
+    """
+
+    def __init__(self, processes=None):
+        self.processes = processes
+        self._pool = None
+
+    def accepts(self, plugin):
+        """Return whether `plugin` is to be processed by the pool"""
+        if getattr(plugin, "main_thread", False):
+            return False
+
+        return abs(plugin.order - pyblish.api.ExtractorOrder) < 0.5
+
+    def process(self, plugin, context, instance=None):
+        """Produce `result` from `plugin` and `instance` within the pool
+
+        Raises:
+            Unpicklable: When the plug-in or instance can't be pickled
+
+        """
+
+        # Registered plug-ins are copies of the original class,
+        # which is what a process of the pool will be importing.
+        module = sys.modules.get(plugin.__module__)
+        if (
+            not os.path.isfile(plugin.__module__)
+            and not hasattr(module, plugin.__name__)
+        ):
+            raise Unpicklable("%s could not be imported" % plugin.__name__)
+
+        instances = list(context) if instance is None else [instance]
+        try:
+            payload = pickle.dumps((
+                (plugin.__module__, plugin.__name__),
+                _pickle_items(dict(
+                    (key, value) for key, value in context.data.items()
+                    if key != "results"
+                )),
+                [
+                    (_instance.name,
+                     list(_instance),
+                     dict(
+                         (key, pickle.dumps(
+                             value, pickle.HIGHEST_PROTOCOL
+                         ))
+                         for key, value in _instance.data.items()
+                     ))
+                    for _instance in instances
+                ],
+                None if instance is None else 0
+            ), pickle.HIGHEST_PROTOCOL)
+
+        except Exception as exc:
+            raise Unpicklable("%s" % exc)
+
+        if self._pool is None:
+            # Forking a process with threads of its own, such as those
+            # of Qt, copies locks held by those threads and deadlocks.
+            if hasattr(multiprocessing, "get_context"):
+                processes = multiprocessing.get_context("spawn")
+            else:
+                processes = multiprocessing
+            self._pool = processes.Pool(self.processes)
+
+        outcome = pickle.loads(self._pool.apply(_process_remotely, (payload,)))
+
+        changes = [(context, outcome["context"])]
+        changes.extend(zip(instances, outcome["instances"]))
+        for subject, (items, removed) in changes:
+            subject.data.update(_unpickle_items(items))
+            for key in removed:
+                subject.data.pop(key, None)
+
+        for message in outcome["lost"]:
+            outcome["records"].append(logging.LogRecord(
+                "pyblish.lite", logging.WARNING, plugin.__module__, 0,
+                message, None, None
+            ))
+
+        result = {
+            "success": outcome["success"],
+            "plugin": plugin,
+            "instance": instance,
+            "action": None,
+            "error": outcome["error"],
+            "records": outcome["records"],
+            "duration": outcome["duration"],
+            "timing": {"cpu": outcome["cpu"]},
+            "progress": 0,
+            "context": context,
+        }
+
+        context.data.setdefault("results", list()).append(result)
+        pyblish.lib.emit("pluginProcessed", result=result)
+
+        return result
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+
+class PluginCache(object):
+    """Discover plug-ins, re-importing only files which changed
+
+    A drop-in for `pyblish.api.discover()` which stats each file on
+    the plug-in paths and re-uses the plug-ins of files whose
+    modification time and size haven't changed since last discovery.
+
+    Every plug-in class of a file is cached, and whether it is valid
+    and compatible with this version of Pyblish and the registered
+    hosts is decided on each discovery, as hosts may be registered
+    in between.
+
+    The GUI stores state on the plug-in classes themselves, e.g. the
+    checked state of optional plug-ins, so those attributes are put
+    back to what they were when the file was loaded.
+
+    Modules imported by a plug-in file are not tracked, a change to
+    those requires `clear()` or touching the plug-in file.
+
+    """
+
+    # Attributes of a plug-in written to by the GUI
+    restored_attributes = ("active", "optional", "actions")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+        # {abspath: ((mtime, size), [(plugin, attributes), ..])}
+        self._modules = {}
+
+    def clear(self):
+        self._modules.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "files": len(self._modules),
+        }
+
+    def _load(self, abspath):
+        mod_name = os.path.splitext(os.path.basename(abspath))[0]
+        module = types.ModuleType(mod_name)
+        module.__file__ = abspath
+
+        with open(abspath, "rb") as f:
+            six.exec_(compile(f.read(), abspath, "exec"), module.__dict__)
+
+        # Store reference to original module, to avoid
+        # garbage collection from collecting it's global
+        # imports, such as `import os`.
+        sys.modules[abspath] = module
+
+        plugins = []
+        for name in dir(module):
+            if name.startswith("_"):
+                continue
+
+            obj = getattr(module, name)
+            if not (
+                inspect.isclass(obj)
+                and issubclass(obj, pyblish.plugin.Plugin)
+            ):
+                continue
+
+            plugins.append((obj, dict(
+                (key, obj.__dict__[key])
+                for key in self.restored_attributes
+                if key in obj.__dict__
+            )))
+
+        return plugins
+
+    @staticmethod
+    def _is_compatible(plugin):
+        """Filter of `pyblish.plugin.plugins_from_module()`"""
+        return (
+            pyblish.plugin.plugin_is_valid(plugin)
+            and pyblish.plugin.version_is_compatible(plugin)
+            and pyblish.plugin.host_is_compatible(plugin)
+        )
+
+    def _plugins_from_file(self, abspath):
+        stat = os.stat(abspath)
+        signature = (stat.st_mtime, stat.st_size)
+
+        cached = self._modules.get(abspath)
+        if cached is not None and cached[0] == signature:
+            self.hits += 1
+            plugins = cached[1]
+
+        else:
+            self.misses += 1
+            self._modules.pop(abspath, None)
+
+            try:
+                plugins = self._load(abspath)
+            except Exception as err:
+                log.error("Skipped: \"%s\" (%s)", abspath, err)
+                return []
+
+            self._modules[abspath] = (signature, plugins)
+
+        compatible = []
+        for plugin, attributes in plugins:
+            if not self._is_compatible(plugin):
+                continue
+
+            for key in self.restored_attributes:
+                if key in attributes:
+                    setattr(plugin, key, attributes[key])
+                elif key in plugin.__dict__:
+                    delattr(plugin, key)
+
+            plugin.__module__ = abspath
+            compatible.append(plugin)
+
+        return compatible
+
+    def discover(self, paths=None):
+        """Return available plug-ins, like `pyblish.api.discover()`
+
+        Arguments:
+            paths (list, optional): Paths to discover plug-ins from,
+                defaults to all registered paths
+
+        """
+
+        plugins = dict()
+        plugin_names = []
+        allow_duplicates = getattr(pyblish.plugin, "ALLOW_DUPLICATES", False)
+
+        for path in paths or pyblish.plugin.plugin_paths():
+            path = os.path.normpath(path)
+            if not os.path.isdir(path):
+                continue
+
+            for fname in os.listdir(path):
+                if fname.startswith("_") or not fname.endswith(".py"):
+                    continue
+
+                abspath = os.path.join(path, fname)
+                if not os.path.isfile(abspath):
+                    continue
+
+                for plugin in self._plugins_from_file(abspath):
+                    if (
+                        not allow_duplicates
+                        and plugin.__name__ in plugin_names
+                    ):
+                        continue
+
+                    plugin_names.append(plugin.__name__)
+
+                    key = "{0}.{1}".format(plugin.__module__, plugin.__name__)
+                    plugins[key] = plugin
+
+        # Directly registered plug-ins are cheap copies, never cached
+        for plugin in pyblish.api.registered_plugins():
+            if not allow_duplicates and plugin.__name__ in plugin_names:
+                continue
+
+            plugin_names.append(plugin.__name__)
+            plugins[plugin.__name__] = plugin
+
+        plugins = list(plugins.values())
+        pyblish.plugin.sort(plugins)  # In-place
+
+        # Discovery filters were introduced in pyblish-base 1.8
+        filters = getattr(pyblish.api, "registered_discovery_filters", list)
+        for filter_ in filters():
+            filter_(plugins)
+
+        return plugins
+
+
+class Profiler(object):
+    """Profile processing of pairs with cProfile
+
+    Statistics of every pair are written to a `.pstats` file in the
+    session directory, named after the plug-in and instance, and the
+    path is given to the result as "profile".
+
+    Pairs processed by the `ProcessPool` aren't profiled, and neither
+    are pairs processed simultaneously with a profiled pair on Python
+    versions allowing only one active profiler.
+
+    Arguments:
+        directory (str, optional): Directory in which to create the
+            session directory, defaults to the temporary directory
+
+    """
+
+    def __init__(self, directory=None):
+        if directory is None:
+            directory = tempfile.gettempdir()
+
+        self.directory = os.path.join(
+            directory, time.strftime("pyblish-profile-%Y%m%d-%H%M%S")
+        )
+        self._count = itertools.count(1)
+
+    def process(self, plugin, context, instance=None):
+        """Produce `result` from `plugin` and `instance`, whilst profiling"""
+        import cProfile
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active
+            return pyblish.plugin.process(plugin, context, instance)
+
+        try:
+            result = pyblish.plugin.process(plugin, context, instance)
+        finally:
+            profile.disable()
+
+        name = "%04d_%s_%s.pstats" % (
+            next(self._count),
+            plugin.__name__,
+            "context" if instance is None else instance.name
+        )
+
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        path = os.path.join(self.directory, re.sub(r"[^\w.-]", "_", name))
+        profile.dump_stats(path)
+        result["profile"] = path
+
+        return result
+
+
+class MemoryTracker(object):
+    """Account for memory allocated by processing pairs, with tracemalloc
+
+    Memory traced by tracemalloc is measured around each pair. The
+    result is given "memory" with the "retained" bytes still allocated
+    once processing finished, and the "peak" bytes allocated whilst
+    processing. A pair retaining more than `threshold` is flagged, with
+    the lines having allocated most of it, and a warning is logged.
+
+    Taking a snapshot of every allocation is costly, and only done every
+    `interval` pairs. The lines of a flagged pair are those having
+    allocated most since the latest snapshot.
+
+    tracemalloc traces the whole process, pairs processed simultaneously
+    are accounted for together.
+
+    Arguments:
+        threshold (int, optional): Bytes retained by a pair before it is
+            flagged, default 10 MB
+        count (int, optional): Number of lines listed of a flagged pair
+        path (str, optional): File written by `export()` by default,
+            defaults to a file in the temporary directory
+        interval (int, optional): Pairs measured per snapshot, default 10
+
+    """
+
+    def __init__(self, threshold=10 * 1024 ** 2, count=5, path=None,
+                 interval=10):
+        import tracemalloc
+        self.tracemalloc = tracemalloc
+
+        self.threshold = threshold
+        self.count = count
+        self.interval = max(1, interval)
+
+        if path is None:
+            path = os.path.join(
+                tempfile.gettempdir(),
+                time.strftime("pyblish-memory-%Y%m%d-%H%M%S.json")
+            )
+        self.path = path
+
+        # Memory of every pair measured so far
+        self.records = []
+
+        self._started = False
+        self._snapshot = None
+        self._pairs = itertools.count()
+
+    def start(self):
+        """Begin measuring a pair, returns a state to pass to `stop()`"""
+        tracemalloc = self.tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started = True
+
+        # Peak is reset on Python 3.9 and above
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+
+        if next(self._pairs) % self.interval == 0:
+            self._snapshot = tracemalloc.take_snapshot()
+
+        return tracemalloc.get_traced_memory()[0]
+
+    def stop(self, state, plugin, instance=None):
+        """Return memory of a pair and log a warning if it was flagged
+
+        Arguments:
+            state (tuple): As returned by `start()`
+            plugin (pyblish.api.Plugin): Plug-in processed
+            instance (pyblish.api.Instance, optional): Instance processed
+
+        """
+
+        before = state
+        current, peak = self.tracemalloc.get_traced_memory()
+
+        memory = {
+            "retained": current - before,
+            "peak": max(0, peak - before),
+            "flagged": current - before > self.threshold,
+            "lines": [],
+        }
+
+        if memory["flagged"] and self._snapshot is not None:
+            statistics = self.tracemalloc.take_snapshot().compare_to(
+                self._snapshot, "lineno"
+            )
+            memory["lines"] = [
+                ["%s:%d" % (statistic.traceback[0].filename,
+                            statistic.traceback[0].lineno),
+                 statistic.size_diff]
+                for statistic in statistics[:self.count]
+            ]
+
+        self.records.append(dict(memory, **{
+            "plugin": plugin.__name__,
+            "instance": None if instance is None else instance.name,
+        }))
+
+        return memory
+
+    def shutdown(self):
+        """Stop tracing, unless it was started by someone else"""
+        if self._started:
+            self.tracemalloc.stop()
+            self._started = False
+
+    def export(self, path=None):
+        """Write memory of every pair measured so far to `path` as JSON"""
+        path = path or self.path
+        with open(path, "w") as f:
+            json.dump({
+                "threshold": self.threshold,
+                "pairs": self.records,
+            }, f, indent=4)
+
+        return path
+
+
+class Tracer(object):
+    """Record spans of a publishing session as Chrome trace events
+
+    Every span is a "complete" event, on the thread it was recorded
+    from, and may be viewed in chrome://tracing or ui.perfetto.dev
+    once exported. Only the most recent `capacity` events are kept,
+    such that tracing a long session doesn't grow without bounds.
+
+    Arguments:
+        path (str, optional): File written by `export()` by default
+        capacity (int, optional): Number of events kept, default 100000
+
+    Usage:
+        >>> tracer = Tracer()
+        >>> with tracer.span("discover", "controller"):
+        ...     pass
+        >>> len(tracer.events)
+        1
+
+    """
+
+    def __init__(self, path=None, capacity=100000):
+        self.path = path
+        self.events = collections.deque(maxlen=capacity)
+        self.threads = {}
+
+    def complete(self, name, category, started, ended=None, **args):
+        """Record span `name` from `started` until `ended`
+
+        Arguments:
+            name (str): Name of span
+            category (str): Category of span, e.g. "pair" or "gui"
+            started (float): Time at which the span started, in seconds
+            ended (float, optional): Time at which the span ended,
+                defaults to now
+            **args: Shown alongside the span
+
+        """
+
+        if ended is None:
+            ended = time.time()
+
+        thread = threading.current_thread()
+        self.threads[thread.ident] = thread.name
+
+        self.events.append({
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": started * 1e6,
+            "dur": max(0.0, ended - started) * 1e6,
+            "pid": os.getpid(),
+            "tid": thread.ident,
+            "args": args,
+        })
+
+    @contextlib.contextmanager
+    def span(self, name, category, **args):
+        """Record span `name` around the body of a with-statement"""
+        started = time.time()
+        try:
+            yield
+        finally:
+            self.complete(name, category, started, **args)
+
+    def clear(self):
+        self.events.clear()
+
+    def export(self, path=None):
+        """Write recorded events to `path` in the Chrome trace format"""
+        path = path or self.path
+        pid = os.getpid()
+        metadata = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": ident,
+                "args": {"name": name},
+            }
+            for ident, name in self.threads.items()
+        ]
+
+        with open(path, "w") as f:
+            json.dump({
+                "traceEvents": metadata + list(self.events),
+                "displayTimeUnit": "ms",
+            }, f)
+
+        return path
+
+
+class Watchdog(QtCore.QObject):
+    """Report stalls of the Qt event loop along with what caused them
+
+    A heartbeat timer is expected to fire every `interval` milliseconds.
+    Meanwhile, a monitoring thread samples the stack of the main thread
+    once a beat is more than `threshold` milliseconds late. When the
+    beat finally arrives, a report is made of how late it was, which
+    handlers were running at the time of the sample and which handlers
+    ran since the previous beat, slowest first.
+
+    Handlers are named via `handler()`, or wrapped via `watch()`.
+
+    Arguments:
+        threshold (float, optional): Milliseconds of lateness before
+            a beat is reported, default 500
+        interval (float, optional): Milliseconds between beats
+
+    Usage:
+        >>> watchdog = Watchdog()
+        >>> watchdog.start()
+        >>> with watchdog.handler("update_compatibility"):
+        ...     pass
+        >>> watchdog.stop()
+
+    """
+
+    # Emitted with a report, once the event loop has caught up
+    stalled = QtCore.Signal(dict)
+
+    def __init__(self, threshold=500, interval=100, parent=None):
+        super(Watchdog, self).__init__(parent)
+
+        self.threshold = threshold
+        self.interval = interval
+
+        # Every stall reported so far
+        self.reports = []
+
+        self._lock = threading.Lock()
+        self._running = []
+        self._ran = []
+        self._sample = None
+        self._last_beat = None
+        self._main_thread = threading.current_thread().ident
+
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._on_beat)
+
+    def start(self):
+        self._last_beat = time.time()
+        self._stopped.clear()
+        self._timer.start()
+
+        self._thread = threading.Thread(
+            target=self._monitor, name="pyblish-lite-watchdog"
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._timer.stop()
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @contextlib.contextmanager
+    def handler(self, name):
+        """Attribute time spent in the body of a with-statement to `name`"""
+        started = time.time()
+        self._running.append(name)
+        try:
+            yield
+        finally:
+            self._running.pop()
+            if self._timer.isActive():
+                self._ran.append((name, time.time() - started))
+
+    def watch(self, name, func):
+        """Return `func` wrapped such that calls are attributed to `name`"""
+        def wrapper(*args, **kwargs):
+            with self.handler(name):
+                return func(*args, **kwargs)
+
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+
+    def export(self, path):
+        """Write every report so far to `path` as JSON"""
+        with open(path, "w") as f:
+            json.dump({
+                "threshold": self.threshold,
+                "stalls": self.reports,
+            }, f, indent=4)
+
+    def _late(self, now):
+        return (now - self._last_beat) * 1000 - self.interval
+
+    def _monitor(self):
+        poll = min(self.interval, self.threshold) / 2000.0
+        while not self._stopped.wait(poll):
+            with self._lock:
+                if (
+                    self._sample is not None
+                    or self._late(time.time()) < self.threshold
+                ):
+                    continue
+
+                frame = sys._current_frames().get(self._main_thread)
+                self._sample = {
+                    "running": " > ".join(list(self._running)),
+                    "stack": traceback.format_stack(frame) if frame else [],
+                }
+
+    def _on_beat(self):
+        now = time.time()
+        with self._lock:
+            late = self._late(now)
+            sample, self._sample = self._sample, None
+            started, self._last_beat = self._last_beat, now
+
+        ran, self._ran = self._ran, []
+
+        if late < self.threshold:
+            return
+
+        durations = {}
+        for name, duration in ran:
+            durations[name] = durations.get(name, 0.0) + duration
+
+        report = {
+            "started": started,
+            "late": late / 1000.0,
+            "running": sample["running"] if sample else "",
+            "ran": sorted(
+                durations.items(), key=lambda item: item[1], reverse=True
+            ),
+            "stack": sample["stack"] if sample else [],
+        }
+
+        self.reports.append(report)
+        self.stalled.emit(report)
+
+
 class Controller(QtCore.QObject):
     # Emitted when the GUI is about to start processing;
     # e.g. resetting, validating or publishing.
@@ -64,14 +1333,79 @@ class Controller(QtCore.QObject):
     # Emitted when plugin was skipped
     was_skipped = QtCore.Signal(object)
 
+    # Emitted with instances added to or removed from the context
+    instances_added = QtCore.Signal(object)
+    instances_removed = QtCore.Signal(object)
+
     # store OrderGroups - now it is a singleton
     order_groups = util.OrderGroups
 
+    # Mode of scheduler, see `Scheduler`
+    scheduler_mode = None
+
+    # Number of threads processing `ParallelPairs`, defaults to CPU count
+    parallel_workers = int(os.getenv("PYBLISH_PARALLEL_WORKERS", 0)) or None
+
+    # Shared by every controller, so as to outlive the window
+    plugin_cache = (
+        None if os.getenv("PYBLISH_DISCOVERY_CACHE") == "0"
+        else PluginCache()
+    )
+
     def __init__(self, parent=None):
         super(Controller, self).__init__(parent)
         self.context = None
         self.plugins = {}
         self.optional_default = {}
+        self.compatibility = util.CompatibilityIndex()
+        self.scheduler = Scheduler(mode=self.scheduler_mode, parent=self)
+
+        # Processing on a worker thread is opt-in, as plug-ins
+        # interacting with a host tend to expect the main thread.
+        if (
+            os.getenv("PYBLISH_WORKER_THREAD")
+            and not self.scheduler.is_synchronous()
+        ):
+            self.executor = WorkerThreadExecutor(parent=self)
+        else:
+            self.executor = Executor()
+
+        self._thread_pool = None
+
+        # Processing extractors in separate processes is opt-in
+        processes = os.getenv("PYBLISH_PROCESS_POOL")
+        if processes:
+            self.process_pool = ProcessPool(int(processes) or None)
+        else:
+            self.process_pool = None
+
+        # Profiling is opt-in, either "1" or the directory of sessions
+        profile = os.getenv("PYBLISH_PROFILE")
+        if profile:
+            self.profiler = Profiler(None if profile == "1" else profile)
+        else:
+            self.profiler = None
+
+        # Memory accounting is opt-in, given a threshold in megabytes
+        threshold = os.getenv("PYBLISH_MEMORY")
+        if threshold:
+            self.memory_tracker = MemoryTracker(
+                int(float(threshold) * 1024 ** 2),
+                path=os.getenv("PYBLISH_MEMORY_REPORT") or None,
+                interval=int(os.getenv("PYBLISH_MEMORY_INTERVAL", 10))
+            )
+        else:
+            self.memory_tracker = None
+
+        # Tracing is opt-in, given the file to export the trace to
+        trace = os.getenv("PYBLISH_TRACE")
+        if trace:
+            self.tracer = Tracer(
+                trace, int(os.getenv("PYBLISH_TRACE_EVENTS", 100000))
+            )
+        else:
+            self.tracer = None
+        self._last_emitted = None
 
     def reset_variables(self):
         # Data internal to the GUI itself
@@ -81,8 +1415,9 @@ class Controller(QtCore.QObject):
 
         # Active producer of pairs
         self.pair_generator = None
-        # Active pair
+        # Active pair, and the time it was queued for processing
         self.current_pair = None
+        self.current_pair_queued = None
 
         # Orders which changes GUI
         # - passing collectors order disables plugin/instance toggle
@@ -141,7 +1476,11 @@ class Controller(QtCore.QObject):
         return result
 
     def reset_context(self):
-        self.context = pyblish.api.Context()
+        self.context = Context()
+
+        # Instances of the context, as of `generation` of the context
+        self.instances = collections.OrderedDict()
+        self.instances_generation = self.context.generation
 
         self.context._publish_states = InstanceStates.ContextType
         self.context.optional = False
@@ -183,10 +1522,28 @@ class Controller(QtCore.QObject):
         self.test = pyblish.logic.registered_test()
         self.optional_default = {}
 
-        plugins = pyblish.api.discover()
+        started = time.time()
+        if self.plugin_cache is not None:
+            hits = self.plugin_cache.hits
+            misses = self.plugin_cache.misses
+            plugins = self.plugin_cache.discover()
+            log.info(
+                "Discovered plug-ins from %d unchanged and %d changed files",
+                self.plugin_cache.hits - hits,
+                self.plugin_cache.misses - misses
+            )
+        else:
+            plugins = pyblish.api.discover()
+
+        if self.tracer is not None:
+            self.tracer.complete(
+                "discover", "controller", started, plugins=len(plugins)
+            )
 
         targets = pyblish.logic.registered_targets() or ["default"]
         self.plugins = pyblish.logic.plugins_by_targets(plugins, targets)
+        self.compatibility.reset(self.plugins)
+        self.compatibility.sync(self.context)
 
     def on_published(self):
         if self.is_running:
@@ -198,32 +1555,107 @@ class Controller(QtCore.QObject):
 
     def act(self, plugin, action):
         def on_next():
-            result = pyblish.plugin.process(
-                plugin, self.context, None, action.id
-            )
+            self.executor.submit(plugin, partial(
+                pyblish.plugin.process, plugin, self.context, None, action.id
+            ), on_acted)
+
+        def on_acted(result, exc_info):
             self.is_running = False
+            if exc_info is not None:
+                traceback.print_exception(*exc_info)
+                return
+
+            self.sync_instances()
+            self.compatibility.sync(self.context)
             self.was_acted.emit(result)
 
         self.is_running = True
-        util.defer(100, on_next)
+        self.scheduler.schedule(on_next, repaint=True)
 
     def emit_(self, signal, kwargs):
         pyblish.api.emit(signal, **kwargs)
 
-    def _process(self, plugin, instance=None):
+    def _process(self, plugin, instance=None, queued=None):
         """Produce `result` from `plugin` and `instance`
         :func:`process` shares state with :func:`_iterator` such that
         an instance/plugin pair can be fetched and processed in isolation.
+
+        The result is given "timing" of the pair, with "wall" and "cpu"
+        seconds spent processing along with "queue" seconds it waited
+        for processing to start.
+
         Arguments:
             plugin (pyblish.api.Plugin): Produce result using plug-in
             instance (optional, pyblish.api.Instance): Process this instance,
                 if no instance is provided, context is processed.
+            queued (float, optional): Time at which the pair was queued
         """
 
         self.processing["nextOrder"] = plugin.order
 
+        memory = None
+        if self.memory_tracker is not None:
+            memory = self.memory_tracker.start()
+
+        started = time.time()
+        cpu_started = thread_time()
+
+        fallback = None
         try:
-            result = pyblish.plugin.process(plugin, self.context, instance)
+            result = None
+            if (
+                self.process_pool is not None
+                and self.process_pool.accepts(plugin)
+            ):
+                try:
+                    result = self.process_pool.process(
+                        plugin, self.context, instance
+                    )
+                except Unpicklable as exc:
+                    fallback = exc
+
+            if result is None and self.profiler is not None:
+                result = self.profiler.process(
+                    plugin, self.context, instance
+                )
+
+            elif result is None:
+                result = pyblish.plugin.process(
+                    plugin, self.context, instance
+                )
+
+            if fallback is not None:
+                result["records"].insert(0, logging.LogRecord(
+                    "pyblish.lite", logging.INFO, plugin.__module__, 0,
+                    "Processed in-process, could not be sent to the"
+                    " process pool: %s" % fallback, None, None
+                ))
+
+            timing = result.setdefault("timing", {})
+            timing.setdefault("cpu", thread_time() - cpu_started)
+            timing["wall"] = time.time() - started
+            timing["queue"] = 0.0 if queued is None else started - queued
+
+            if self.tracer is not None:
+                self.tracer.complete(
+                    plugin.__name__, "process", started,
+                    started + timing["wall"],
+                    instance=None if instance is None else instance.name,
+                    cpu=timing["cpu"]
+                )
+
+            if memory is not None:
+                memory = self.memory_tracker.stop(memory, plugin, instance)
+                result["memory"] = memory
+                if memory["flagged"]:
+                    result["records"].append(logging.LogRecord(
+                        "pyblish.lite", logging.WARNING, plugin.__module__, 0,
+                        "Retained %s, exceeding %s" % (
+                            util.format_bytes(memory["retained"]),
+                            util.format_bytes(self.memory_tracker.threshold)
+                        ), None, None
+                    ))
+
             # Make note of the order at which the
             # potential error error occured.
             if result["error"] is not None:
@@ -296,14 +1728,26 @@ class Controller(QtCore.QObject):
                 continue
 
             if plugin.__instanceEnabled__:
-                instances = pyblish.logic.instances_by_plugin(
-                    self.context, plugin
-                )
+                instances = self.compatibility.instances(plugin)
                 if not instances:
                     self.was_skipped.emit(plugin)
                     continue
 
+                if getattr(plugin, "parallel", False):
+                    instances = [
+                        instance for instance in instances
+                        if instance.data.get("publish") is not False
+                    ]
+                    if instances:
+                        yield ParallelPairs(plugin, instances)
+                    continue
+
                 for instance in instances:
+                    # Stop in between instances of the same plug-in
+                    if self.stopped:
+                        self.stopped = False
+                        yield IterationBreak("Stopped")
+
                     if instance.data.get("publish") is False:
                         pyblish.logic.log.debug(
                             "%s was inactive, skipping.." % instance
@@ -311,39 +1755,201 @@ class Controller(QtCore.QObject):
                         continue
                     yield (plugin, instance)
             else:
-                families = util.collect_families_from_instances(
-                    self.context, only_active=True
-                )
-                plugins = pyblish.logic.plugins_by_families(
-                    [plugin], families
-                )
-                if not plugins:
+                if not self.compatibility.is_compatible(plugin):
                     self.was_skipped.emit(plugin)
                     continue
                 yield (plugin, None)
 
         self.passed_group.emit(self.processing["next_group_order"])
 
-    def iterate_and_process(self, on_finished=lambda: None):
+    def _next_pair(self):
+        """Advance pair generator and store the pair in `current_pair`
+
+        Returns:
+            bool: Whether a pair is ready to be processed; False when
+                processing was stopped, in which case `was_stopped`
+                has already been emitted.
+
+        Raises:
+            StopIteration: When all pairs were processed.
+
+        """
+        started = time.time()
+        if self.tracer is not None and self._last_emitted is not None:
+            # Time spent waiting on the event loop between pairs
+            self.tracer.complete(
+                "defer", "scheduler", self._last_emitted, started
+            )
+
+        try:
+            self.current_pair = next(self.pair_generator)
+            if isinstance(self.current_pair, IterationBreak):
+                raise self.current_pair
+
+            self.current_pair_queued = time.time()
+
+        except IterationBreak as stop:
+            if self.tracer is not None:
+                self.tracer.complete(
+                    "next pair", "scheduler", started, reason=str(stop)
+                )
+            self.is_running = False
+            self.was_stopped.emit()
+            return False
+
+        if self.tracer is not None:
+            self.tracer.complete("next pair", "scheduler", started)
+
+        if isinstance(self.current_pair, ParallelPairs):
+            for pair in self.current_pair:
+                self.about_to_process.emit(*pair)
+        else:
+            self.about_to_process.emit(*self.current_pair)
+
+        return True
+
+    def _process_pair(self, callback):
+        """Process `current_pair` via executor
+
+        Arguments:
+            callback (callable): Called with a list of results and
+                exception info once `current_pair` was processed
+
+        """
+        queued = self.current_pair_queued
+        if isinstance(self.current_pair, ParallelPairs):
+            plugin = self.current_pair.plugin
+            func = partial(self._process_parallel, self.current_pair, queued)
+
+        else:
+            plugin, instance = self.current_pair
+
+            def func():
+                return [self._process(plugin, instance, queued)]
+
+        self.executor.submit(plugin, func, callback)
+
+    def _process_parallel(self, pairs, queued=None):
+        """Process `pairs` simultaneously, on a pool of threads
+
+        Results are returned in the order of `pairs`.
+
+        """
+
+        if self._thread_pool is None:
+            workers = self.parallel_workers or multiprocessing.cpu_count()
+            self._thread_pool = ThreadPool(workers)
+
+        records = ParallelRecords()
+
+        def process(pair):
+            # Log records are captured via the root logger, and
+            # thereby include those of pairs processed meanwhile.
+            with records.attach(pair[0]) as handler:
+                result = self._process(pair[0], pair[1], queued)
+
+            result["records"] = [
+                record for record in result["records"]
+                if handler.owns(record)
+            ]
+            return result
+
+        # Processing restores the level of the root logger once
+        # finished, which mustn't happen whilst others are still going.
+        root_logger = logging.getLogger()
+        level = root_logger.level
+        root_logger.setLevel(logging.DEBUG)
+        try:
+            return self._thread_pool.map(process, pairs)
+        finally:
+            root_logger.setLevel(level)
+
+    def sync_instances(self):
+        """Emit instances added to or removed from the context since last
+
+        Instances are only compared once the generation of the context
+        changed, unless the context doesn't count its generations.
+
+        """
+
+        generation = getattr(self.context, "generation", None)
+        if generation is not None and generation == self.instances_generation:
+            return
+
+        self.instances_generation = generation
+        instances = collections.OrderedDict(
+            (instance.id, instance) for instance in self.context
+        )
+
+        removed = [
+            instance for instance_id, instance in self.instances.items()
+            if instance_id not in instances
+        ]
+        added = [
+            instance for instance_id, instance in instances.items()
+            if instance_id not in self.instances
+        ]
+
+        self.instances = instances
+
+        if removed:
+            self.instances_removed.emit(removed)
+        if added:
+            self.instances_added.emit(added)
+
+    def _emit_results(self, results):
+        # Plug-ins may have added, removed or changed instances,
+        # an InstancePlugin is expected to change only its own.
+        self.sync_instances()
+        instances = [result["instance"] for result in results]
+        self.compatibility.sync(
+            self.context,
+            changed=None if any(
+                instance is None for instance in instances
+            ) else instances
+        )
+
+        for result in results:
+            if result["error"] is not None:
+                self.errored = True
+
+            self.was_processed.emit(result)
+
+            if self.tracer is not None:
+                instance = result["instance"]
+                self.tracer.complete(
+                    result["plugin"].__name__, "pair",
+                    self.current_pair_queued,
+                    instance=None if instance is None else instance.name,
+                    error=result["error"] is not None
+                )
+
+        self._last_emitted = time.time()
+
+    def iterate_and_process(self, on_finished=lambda: None, name="process"):
         """ Iterating inserted plugins with current context.
         Collectors do not contain instances, they are None when collecting!
         This process don't stop on one
+
+        Arguments:
+            on_finished (callable, optional): Called once all pairs
+                were processed
+            name (str, optional): Name of the run, as traced
+
         """
+        started = time.time()
+
         def on_next():
             try:
-                self.current_pair = next(self.pair_generator)
-                if isinstance(self.current_pair, IterationBreak):
-                    raise self.current_pair
-
-            except IterationBreak:
-                self.is_running = False
-                self.was_stopped.emit()
-                return
+                if not self._next_pair():
+                    on_ended()
+                    return
 
             except StopIteration:
+                on_ended()
                 self.is_running = False
                 # All pairs were processed successfully!
-                return util.defer(500, on_finished)
+                return self.scheduler.schedule(on_finished, repaint=True)
 
             except Exception:
                 # This is a bug
@@ -351,53 +1957,63 @@ class Controller(QtCore.QObject):
                 traceback.print_exception(exc_type, exc_msg, exc_tb)
                 self.is_running = False
                 self.was_stopped.emit()
-                return util.defer(
-                    500, lambda: on_unexpected_error(error=exc_msg)
+                return self.scheduler.schedule(
+                    lambda: on_unexpected_error(error=exc_msg), repaint=True
                 )
 
-            self.about_to_process.emit(*self.current_pair)
-            util.defer(100, on_process)
+            # Let the GUI reflect the pair about to be processed
+            self.scheduler.schedule(on_process, repaint=True)
 
         def on_process():
-            try:
-                result = self._process(*self.current_pair)
-                if result["error"] is not None:
-                    self.errored = True
+            self._process_pair(on_processed)
 
-                self.was_processed.emit(result)
+        def on_processed(results, exc_info):
+            if exc_info is None:
+                try:
+                    self._emit_results(results)
+                except Exception:
+                    exc_info = sys.exc_info()
 
-            except Exception:
+            if exc_info is not None:
                 # TODO this should be handled much differently
-                exc_type, exc_msg, exc_tb = sys.exc_info()
-                traceback.print_exception(exc_type, exc_msg, exc_tb)
-                return util.defer(
-                    500, lambda: on_unexpected_error(error=exc_msg)
+                traceback.print_exception(*exc_info)
+                return self.scheduler.schedule(
+                    lambda: on_unexpected_error(error=exc_info[1]),
+                    repaint=True
                 )
 
-            util.defer(10, on_next)
+            self.scheduler.schedule(on_next)
+
+        def on_ended():
+            if self.tracer is not None:
+                self.tracer.complete(name, "run", started)
+            self._last_emitted = None
 
         def on_unexpected_error(error):
             util.u_print(u"An unexpected error occurred:\n %s" % error)
-            return util.defer(500, on_finished)
+            return self.scheduler.schedule(on_finished, repaint=True)
+
+        # Instances may have been toggled since last time
+        self.compatibility.sync(self.context)
 
         self.is_running = True
-        util.defer(10, on_next)
+        self.scheduler.schedule(on_next)
 
     def collect(self):
         """ Iterate and process Collect plugins
         - load_plugins method is launched again when finished
         """
-        self.iterate_and_process()
+        self.iterate_and_process(name="collect")
 
     def validate(self):
         """ Process plugins to validations_order value."""
         self.processing["stop_on_validation"] = True
-        self.iterate_and_process()
+        self.iterate_and_process(name="validate")
 
     def publish(self):
         """ Iterate and process all remaining plugins."""
         self.processing["stop_on_validation"] = False
-        self.iterate_and_process(self.on_published)
+        self.iterate_and_process(self.on_published, name="publish")
 
     def cleanup(self):
         """Forcefully delete objects from memory
@@ -417,3 +2033,45 @@ class Controller(QtCore.QObject):
 
         for plugin in self.plugins:
             del(plugin)
+
+        self.executor.shutdown()
+
+        if self._thread_pool is not None:
+            self._thread_pool.close()
+            self._thread_pool = None
+
+        if self.process_pool is not None:
+            self.process_pool.shutdown()
+
+        if self.memory_tracker is not None:
+            self.memory_tracker.shutdown()
+            if self.memory_tracker.records:
+                util.u_print(
+                    "Memory of pairs written to %s"
+                    % self.memory_tracker.export()
+                )
+
+        if self.tracer is not None:
+            self.tracer.export()
+
+
+class HeadlessController(Controller):
+    """Controller processing every pair back to back, without a GUI
+
+    Pairs are produced by the same pair generator as in the GUI and
+    the same signals are emitted, in the same order, but rather than
+    deferring each step to the Qt event loop, pairs are processed
+    synchronously in a tight loop. There is no need for a running
+    event loop, which makes this suitable for farm and CI jobs.
+
+    Signals may be connected to any plain callable.
+
+    Usage:
+        >>> ctrl = HeadlessController()
+        >>> ctrl.was_processed.connect(on_processed)  # doctest: +SKIP
+        >>> ctrl.reset()  # Discover and collect  # doctest: +SKIP
+        >>> ctrl.publish()  # doctest: +SKIP
+
+    """
+
+    scheduler_mode = "synchronous"
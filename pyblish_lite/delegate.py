@@ -1,8 +1,9 @@
+import collections
 import platform
 
 from .vendor.Qt import QtWidgets, QtGui, QtCore
 
-from . import model
+from . import model, util
 from .awesome import tags as awesome
 from .constants import (
     PluginStates, InstanceStates, PluginActionStates, GroupStates, Roles
@@ -19,7 +20,11 @@ colors = {
     "hover": QtGui.QColor(255, 255, 255, 10),
     "selected": QtGui.QColor(255, 255, 255, 20),
     "outline": QtGui.QColor("#333"),
-    "group": QtGui.QColor("#333")
+    "group": QtGui.QColor("#333"),
+    "detail": QtGui.QColor("#333"),
+    "detailText": QtGui.QColor("#aaa"),
+    "detailBorder": QtGui.QColor("#222"),
+    "match": QtGui.QColor(255, 153, 0, 40)
 }
 
 scale_factors = {"darwin": 1.5}
@@ -47,6 +52,14 @@ icons = {
 }
 
 
+def duration_text(index):
+    """Return wall time spent processing `index`, if any"""
+    timing = index.data(Roles.TimingRole)
+    if not timing:
+        return ""
+    return util.format_duration(timing["wall"])
+
+
 class PluginItemDelegate(QtWidgets.QStyledItemDelegate):
     """Generic delegate for model items"""
 
@@ -99,11 +112,18 @@ class PluginItemDelegate(QtWidgets.QStyledItemDelegate):
 
         assert label_rect.width() > 0
 
+        duration = duration_text(index)
+        duration_width = 0
+        if duration:
+            duration_width = (
+                font_metrics["h4"].boundingRect(duration).width() + 10
+            )
+
         label = index.data(QtCore.Qt.DisplayRole)
         label = font_metrics["h4"].elidedText(
             label,
             QtCore.Qt.ElideRight,
-            label_rect.width() - 20
+            label_rect.width() - 20 - duration_width
         )
 
         font_color = colors["idle"]
@@ -123,6 +143,15 @@ class PluginItemDelegate(QtWidgets.QStyledItemDelegate):
         painter.setPen(QtGui.QPen(font_color))
         painter.drawText(label_rect, label)
 
+        # Draw duration, left of the action icon
+        if duration:
+            duration_rect = QtCore.QRectF(label_rect)
+            duration_rect.setRight(perspective_rect.left())
+            if index.data(Roles.PluginActionsVisibleRole):
+                duration_rect.adjust(0, 0, -20, 0)
+            painter.setPen(QtGui.QPen(colors["inactive"]))
+            painter.drawText(duration_rect, QtCore.Qt.AlignRight, duration)
+
         # Draw action icon
         if index.data(Roles.PluginActionsVisibleRole):
             painter.save()
@@ -227,11 +256,18 @@ class InstanceItemDelegate(QtWidgets.QStyledItemDelegate):
 
         assert label_rect.width() > 0
 
+        duration = duration_text(index)
+        duration_width = 0
+        if duration:
+            duration_width = (
+                font_metrics["h4"].boundingRect(duration).width() + 10
+            )
+
         label = index.data(QtCore.Qt.DisplayRole)
         label = font_metrics["h4"].elidedText(
             label,
             QtCore.Qt.ElideRight,
-            label_rect.width() - 20
+            label_rect.width() - 20 - duration_width
         )
 
         font_color = colors["idle"]
@@ -251,6 +287,13 @@ class InstanceItemDelegate(QtWidgets.QStyledItemDelegate):
         painter.setPen(QtGui.QPen(font_color))
         painter.drawText(label_rect, label)
 
+        # Draw duration
+        if duration:
+            duration_rect = QtCore.QRectF(label_rect)
+            duration_rect.setRight(perspective_rect.left())
+            painter.setPen(QtGui.QPen(colors["inactive"]))
+            painter.drawText(duration_rect, QtCore.Qt.AlignRight, duration)
+
         # Draw checkbox
         pen = QtGui.QPen(check_color, 1)
         painter.setPen(pen)
@@ -333,9 +376,20 @@ class OverviewGroupSection(QtWidgets.QStyledItemDelegate):
         expanded = self.parent().isExpanded(index)
         if expanded:
             expander_icon = icons["minus-sign"]
+
+        # Total of plug-ins in the group
+        duration = duration_text(index)
+        duration_rect = QtCore.QRectF(label_rect)
+        duration_rect.setRight(bg_rect.right() - 10)
+        duration_width = 0
+        if duration:
+            duration_width = (
+                font_metrics["h5"].boundingRect(duration).width() + 10
+            )
+
         label = index.data(QtCore.Qt.DisplayRole)
         label = font_metrics["h5"].elidedText(
-            label, QtCore.Qt.ElideRight, label_rect.width()
+            label, QtCore.Qt.ElideRight, label_rect.width() - duration_width
         )
 
         # Maintain reference to state, so we can restore it once we're done
@@ -349,6 +403,9 @@ class OverviewGroupSection(QtWidgets.QStyledItemDelegate):
         painter.setFont(fonts["h5"])
         painter.drawText(label_rect, label)
 
+        if duration:
+            painter.drawText(duration_rect, QtCore.Qt.AlignRight, duration)
+
         if option.state & QtWidgets.QStyle.State_MouseOver:
             painter.fillPath(bg_path, colors["hover"])
 
@@ -409,9 +466,6 @@ class ArtistDelegate(QtWidgets.QStyledItemDelegate):
         icon_rect.setWidth(35)
         icon_rect.setHeight(35)
 
-        duration_rect = QtCore.QRectF(content_rect)
-        duration_rect.translate(content_rect.width() - 50, 0)
-
         # Colors
         check_color = colors["idle"]
 
@@ -478,6 +532,15 @@ class ArtistDelegate(QtWidgets.QStyledItemDelegate):
             - label_x_offset
             - perspective_rect.width()
         )
+
+        timing = index.data(Roles.TimingRole)
+        if timing:
+            label_rect.setWidth(label_rect.width() - 50)
+
+        duration_rect = QtCore.QRectF(label_rect)
+        duration_rect.translate(label_rect.width(), 0)
+        duration_rect.setWidth(50)
+
         # Elide label
         label = index.data(QtCore.Qt.DisplayRole)
         label = metrics.elidedText(
@@ -499,6 +562,18 @@ class ArtistDelegate(QtWidgets.QStyledItemDelegate):
 
         painter.drawText(families_rect, families)
 
+        # Draw duration, with CPU time underneath
+        if timing:
+            painter.drawText(
+                duration_rect, QtCore.Qt.AlignRight,
+                util.format_duration(timing["wall"])
+            )
+            painter.drawText(
+                duration_rect.translated(0, label_rect.height() + spacing),
+                QtCore.Qt.AlignRight,
+                "cpu " + util.format_duration(timing["cpu"])
+            )
+
         painter.setFont(fonts["largeAwesome"])
         painter.setPen(QtGui.QPen(perspective_color))
         painter.drawText(perspective_rect, perspective_icon)
@@ -535,18 +610,130 @@ class ArtistDelegate(QtWidgets.QStyledItemDelegate):
 
 
 class TerminalItem(QtWidgets.QStyledItemDelegate):
-    """Delegate used exclusively for the Terminal"""
+    """Delegate used exclusively for the Terminal
+
+    Details of records are drawn from a QTextDocument, laid out when
+    first painted or measured. The view only does either for expanded
+    rows in view, and documents of the most recently drawn details are
+    kept for as long as they fit in the cache.
+
+    Details are measured against the viewport of the view given as
+    parent, as PySide and PyQt4 don't always tell which widget an
+    option is for.
+
+    """
+
+    # Number of laid out documents kept
+    cache_size = 200
+
+    # Space between the border of a detail and its text
+    detail_padding = 3
+    detail_border = 2
+
+    def __init__(self, *args, **kwargs):
+        super(TerminalItem, self).__init__(*args, **kwargs)
+        self._documents = collections.OrderedDict()
+
+    def document(self, index, width):
+        """Return document of detail `index`, laid out for `width`"""
+        text = index.data(QtCore.Qt.DisplayRole) or ""
+
+        document = self._documents.pop(text, None)
+        if document is None:
+            document = QtGui.QTextDocument()
+            option = QtGui.QTextOption()
+            option.setWrapMode(
+                QtGui.QTextOption.WrapAtWordBoundaryOrAnywhere
+            )
+            document.setDefaultTextOption(option)
+            document.setHtml(text)
+
+            if len(self._documents) >= self.cache_size:
+                self._documents.popitem(last=False)
+
+        self._documents[text] = document
+
+        if document.textWidth() != width:
+            document.setTextWidth(width)
+
+        return document
+
+    def clear_cache(self):
+        self._documents.clear()
+
+    def _detail_width(self, option):
+        width = option.rect.width()
+        if width > 0:
+            return width
+
+        view = option.widget or self.parent()
+        if view is None:
+            return width
+
+        return view.viewport().width()
+
+    def _detail_inset(self):
+        return self.detail_padding + self.detail_border
 
     def paint(self, painter, option, index):
-        super(TerminalItem, self).paint(painter, option, index)
         item_type = index.data(Roles.TypeRole)
         if item_type == model.TerminalDetailType:
-            return
+            return self.paint_detail(painter, option, index)
+
+        super(TerminalItem, self).paint(painter, option, index)
 
         hover = QtGui.QPainterPath()
         hover.addRect(QtCore.QRectF(option.rect).adjusted(0, 0, -1, -1))
+        if index.data(Roles.TerminalMatchRole):
+            painter.fillPath(hover, colors["match"])
+
         if option.state & QtWidgets.QStyle.State_Selected:
             painter.fillPath(hover, colors["selected"])
 
         if option.state & QtWidgets.QStyle.State_MouseOver:
             painter.fillPath(hover, colors["hover"])
+
+    def paint_detail(self, painter, option, index):
+        inset = self._detail_inset()
+        half = self.detail_border / 2.0
+        body_rect = QtCore.QRectF(option.rect).adjusted(
+            half, half, -half, -half
+        )
+        document = self.document(index, option.rect.width() - inset * 2)
+
+        painter.save()
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+
+        body = QtGui.QPainterPath()
+        body.addRoundedRect(body_rect, 7, 7)
+        painter.fillPath(body, colors["detail"])
+
+        if option.state & QtWidgets.QStyle.State_MouseOver:
+            painter.fillPath(body, colors["hover"])
+
+        painter.setPen(QtGui.QPen(colors["detailBorder"], self.detail_border))
+        painter.drawPath(body)
+
+        painter.translate(
+            option.rect.left() + inset, option.rect.top() + inset
+        )
+        context = QtGui.QAbstractTextDocumentLayout.PaintContext()
+        context.palette.setColor(QtGui.QPalette.Text, colors["detailText"])
+        context.clip = QtCore.QRectF(
+            0, 0, option.rect.width() - inset * 2,
+            option.rect.height() - inset * 2
+        )
+        painter.setClipRect(context.clip)
+        document.documentLayout().draw(painter, context)
+
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        if index.data(Roles.TypeRole) != model.TerminalDetailType:
+            return super(TerminalItem, self).sizeHint(option, index)
+
+        inset = self._detail_inset()
+        width = self._detail_width(option)
+        document = self.document(index, width - inset * 2)
+        height = int(document.size().height() + 0.5) + inset * 2
+        return QtCore.QSize(width, height)
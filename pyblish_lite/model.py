@@ -25,6 +25,17 @@ Roles:
 """
 from __future__ import unicode_literals
 
+import os
+import re
+import json
+import array
+import bisect
+import logging
+import weakref
+import tempfile
+import contextlib
+import collections
+
 import pyblish
 
 from . import settings, util
@@ -32,7 +43,7 @@ from .awesome import tags as awesome
 from .vendor import Qt
 from .vendor.Qt import QtCore, QtGui
 from .vendor.six import text_type
-from .vendor.six.moves import queue
+from .vendor.six.moves import intern
 from .vendor import qtawesome
 from .constants import PluginStates, InstanceStates, GroupStates, Roles
 
@@ -48,6 +59,162 @@ PluginType = QtGui.QStandardItem.UserType + 1
 GroupType = QtGui.QStandardItem.UserType + 2
 TerminalLabelType = QtGui.QStandardItem.UserType + 3
 TerminalDetailType = QtGui.QStandardItem.UserType + 4
+TerminalHistoryType = QtGui.QStandardItem.UserType + 5
+
+
+def update_tooltip(item):
+    lines = []
+
+    timing = item.data(Roles.TimingRole)
+    if timing:
+        lines.append(util.format_timing(timing))
+
+    memory = item.data(Roles.MemoryRole)
+    if memory:
+        lines.append("Retained %s, peak %s" % (
+            util.format_bytes(memory["retained"]),
+            util.format_bytes(memory["peak"])
+        ))
+
+    item.setData("\n".join(lines), QtCore.Qt.ToolTipRole)
+
+
+def add_timing(item, timing):
+    """Add `timing` of a result to the total of `item`"""
+    total = util.add_timing(item.data(Roles.TimingRole), timing)
+    item.setData(total, Roles.TimingRole)
+    update_tooltip(item)
+
+
+def add_memory(item, memory):
+    """Add `memory` of a result to the total of `item`
+
+    Retained bytes add up, whereas peak is the highest of any pair.
+
+    """
+
+    total = dict(item.data(Roles.MemoryRole) or {
+        "retained": 0, "peak": 0, "flagged": False
+    })
+    total["retained"] += memory["retained"]
+    total["peak"] = max(total["peak"], memory["peak"])
+    total["flagged"] = total["flagged"] or memory["flagged"]
+    item.setData(total, Roles.MemoryRole)
+    update_tooltip(item)
+
+
+def merge_flags(flags, value):
+    """Return `flags` updated with `value`, as given to `setData`
+
+    Arguments:
+        flags (int): Current flags
+        value (int, list or dict): Flags replacing `flags`, a list of
+            flags to set or a dict of flags to set or unset
+
+    """
+
+    if isinstance(value, list):
+        for flag in value:
+            flags |= flag
+        return flags
+
+    if isinstance(value, dict):
+        for flag, _bool in value.items():
+            if _bool is True:
+                flags |= flag
+            elif flags & flag:
+                flags ^= flag
+        return flags
+
+    return value
+
+
+def emit_data_changed(model, first, last):
+    """Emit `dataChanged` of `model` from index `first` to `last`"""
+    args = [first, last]
+    if Qt.__binding__ not in ("PyQt4", "PySide"):
+        args.append([])
+    model.dataChanged.emit(*args)
+
+
+def item_changed(item):
+    """Emit `dataChanged` of `item`, unless its model is batching updates"""
+    model = item.model()
+    if model is None:
+        return
+
+    if not model.defer_changed(item.parent(), item.row()):
+        item.emitDataChanged()
+
+
+class BatchUpdates(object):
+    """Emit a single `dataChanged` per parent for changes made in a batch
+
+    Changes to data made within `batch_updates()` are noted via
+    `defer_changed()` rather than emitted, and are emitted once the
+    batch is done as a range of rows per parent. Rows must not be
+    added nor removed within a batch.
+
+    Usage:
+        >>> with model.batch_updates():  # doctest: +SKIP
+        ...     for item in model.instance_items.values():
+        ...         item.setData(flags, Roles.PublishFlagsRole)
+
+    """
+
+    _batched = None
+
+    @contextlib.contextmanager
+    def batch_updates(self):
+        # Changes of nested batches are emitted by the outermost one
+        if self._batched is not None:
+            yield
+            return
+
+        self._batched = collections.OrderedDict()
+        try:
+            yield
+
+        finally:
+            batched, self._batched = self._batched, None
+            for parent, first, last in batched.values():
+                if parent is None:
+                    parent_index = QtCore.QModelIndex()
+                else:
+                    parent_index = parent.index()
+
+                emit_data_changed(
+                    self,
+                    self.index(first, 0, parent_index),
+                    self.index(last, 0, parent_index)
+                )
+
+    def defer_changed(self, parent, row):
+        """Note that `row` of `parent` changed, if within a batch
+
+        Arguments:
+            parent (object): Item or node of the parent, with an
+                `index()` method, None for top-level rows
+            row (int): Row that changed
+
+        Returns:
+            bool: Whether the change was deferred to the end of the batch
+
+        """
+
+        if self._batched is None:
+            return False
+
+        # Items need not be hashable
+        rows = self._batched.get(id(parent))
+        if rows is None:
+            self._batched[id(parent)] = [parent, row, row]
+        elif row < rows[1]:
+            rows[1] = row
+        elif row > rows[2]:
+            rows[2] = row
+
+        return True
 
 
 class QAwesomeTextIconFactory:
@@ -135,7 +302,15 @@ class IntentModel(QtGui.QStandardItemModel):
 
 
 class PluginItem(QtGui.QStandardItem):
-    """Plugin item implementation."""
+    """Plugin item implementation.
+
+    Data is looked up by role in dicts, rather than compared against
+    each role in turn, as delegates ask for several roles per paint.
+    Data set on the item is kept in `_data`, along with data which
+    doesn't change for as long as the item lives. Roles internal to
+    Qt, such as that of the flags of the item, are left to Qt.
+
+    """
 
     def __init__(self, plugin):
         super(PluginItem, self).__init__()
@@ -146,6 +321,20 @@ class PluginItem(QtGui.QStandardItem):
                 item_text = plugin.label
 
         self.plugin = plugin
+        self._data = {
+            Roles.TypeRole: PluginType,
+            Roles.ObjectIdRole: plugin.id,
+            Roles.ObjectUIdRole: "{}.{}".format(
+                plugin.__module__, plugin.__name__
+            ),
+            Roles.PathModuleRole: plugin.__module__,
+            Roles.DocstringRole: plugin.__doc__,
+            Roles.FamiliesRole: plugin.families,
+        }
+
+        # Valid actions, as of publish flags and active state in key
+        self._actions_key = None
+        self._actions = None
 
         self.setData(item_text, QtCore.Qt.DisplayRole)
         self.setData(False, Roles.IsEnabledRole)
@@ -170,11 +359,6 @@ class PluginItem(QtGui.QStandardItem):
         plugin.active = is_checked
         plugin.optional = is_optional
 
-        self.setData(
-            "{}.{}".format(plugin.__module__, plugin.__name__),
-            Roles.ObjectUIdRole
-        )
-
         self.setFlags(
             QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled
         )
@@ -183,187 +367,156 @@ class PluginItem(QtGui.QStandardItem):
         return PluginType
 
     def data(self, role=QtCore.Qt.DisplayRole):
-        if role == Roles.IsOptionalRole:
-            return self.plugin.optional
+        getter = self._getters.get(role)
+        if getter is not None:
+            return getter(self)
 
-        if role == Roles.ObjectIdRole:
-            return self.plugin.id
+        try:
+            return self._data[role]
+        except KeyError:
+            return super(PluginItem, self).data(role)
 
-        if role == Roles.TypeRole:
-            return self.type()
+    def _optional(self):
+        return self.plugin.optional
 
-        if role == QtCore.Qt.CheckStateRole:
-            return self.plugin.active
+    def _checked(self):
+        return self.plugin.active
 
-        if role == Roles.PathModuleRole:
-            return self.plugin.__module__
+    def _actions_visible(self):
+        return bool(self._valid_actions())
 
-        if role == Roles.FamiliesRole:
-            return self.plugin.families
+    def _valid_actions(self):
+        """Return actions which may be run, given the state of the plug-in
 
-        if role == Roles.DocstringRole:
-            return self.plugin.__doc__
+        Asked for on every paint, the result is kept until either the
+        publish flags of the item or whether the plug-in is active change.
 
-        if role == Roles.PluginActionsVisibleRole:
-            # Can only run actions on active plug-ins.
-            if not self.plugin.active or not self.plugin.actions:
-                return False
+        """
 
-            publish_states = self.data(Roles.PublishFlagsRole)
-            if (
-                not publish_states & PluginStates.IsCompatible
-                or publish_states & PluginStates.WasSkipped
-            ):
-                return False
+        key = (self._data[Roles.PublishFlagsRole], self.plugin.active)
+        if key != self._actions_key:
+            self._actions_key = key
+            self._actions = self._find_valid_actions()
+        return self._actions
 
-            # Context specific actions
-            for action in self.plugin.actions:
-                if action.on == "failed":
-                    if publish_states & PluginStates.HasError:
-                        return True
+    def _find_valid_actions(self):
+        valid_actions = []
 
-                elif action.on == "succeeded":
-                    if (
-                        publish_states & PluginStates.WasProcessed
-                        and not publish_states & PluginStates.HasError
-                    ):
-                        return True
+        # Can only run actions on active plug-ins.
+        if not self.plugin.active or not self.plugin.actions:
+            return valid_actions
 
-                elif action.on == "processed":
-                    if publish_states & PluginStates.WasProcessed:
-                        return True
+        publish_states = self._data[Roles.PublishFlagsRole]
+        if (
+            not publish_states & PluginStates.IsCompatible
+            or publish_states & PluginStates.WasSkipped
+        ):
+            return False
 
-                elif action.on == "notProcessed":
-                    if not publish_states & PluginStates.WasProcessed:
-                        return True
+        # Context specific actions
+        for action in self.plugin.actions:
+            valid = False
+            if action.on == "failed":
+                if publish_states & PluginStates.HasError:
+                    valid = True
 
-            return False
+            elif action.on == "succeeded":
+                if (
+                    publish_states & PluginStates.WasProcessed
+                    and not publish_states & PluginStates.HasError
+                ):
+                    valid = True
 
-        if role == Roles.PluginValidActionsRole:
-            valid_actions = []
+            elif action.on == "processed":
+                if publish_states & PluginStates.WasProcessed:
+                    valid = True
 
-            # Can only run actions on active plug-ins.
-            if not self.plugin.active or not self.plugin.actions:
-                return valid_actions
+            elif action.on == "notProcessed":
+                if not publish_states & PluginStates.WasProcessed:
+                    valid = True
 
-            if not self.plugin.active or not self.plugin.actions:
-                return False
+            if valid:
+                valid_actions.append(action)
 
-            publish_states = self.data(Roles.PublishFlagsRole)
-            if (
-                not publish_states & PluginStates.IsCompatible
-                or publish_states & PluginStates.WasSkipped
-            ):
-                return False
+        if not valid_actions:
+            return valid_actions
 
-            # Context specific actions
-            for action in self.plugin.actions:
-                valid = False
-                if action.on == "failed":
-                    if publish_states & PluginStates.HasError:
-                        valid = True
-
-                elif action.on == "succeeded":
-                    if (
-                        publish_states & PluginStates.WasProcessed
-                        and not publish_states & PluginStates.HasError
-                    ):
-                        valid = True
-
-                elif action.on == "processed":
-                    if publish_states & PluginStates.WasProcessed:
-                        valid = True
-
-                elif action.on == "notProcessed":
-                    if not publish_states & PluginStates.WasProcessed:
-                        valid = True
-
-                if valid:
-                    valid_actions.append(action)
-
-            if not valid_actions:
-                return valid_actions
-
-            actions_len = len(valid_actions)
-            # Discard empty groups
-            indexex_to_remove = []
-            for idx, action in enumerate(valid_actions):
-                if action.__type__ != "category":
-                    continue
+        actions_len = len(valid_actions)
+        # Discard empty groups
+        indexex_to_remove = []
+        for idx, action in enumerate(valid_actions):
+            if action.__type__ != "category":
+                continue
 
-                next_id = idx + 1
-                if next_id >= actions_len:
-                    indexex_to_remove.append(idx)
-                    continue
+            next_id = idx + 1
+            if next_id >= actions_len:
+                indexex_to_remove.append(idx)
+                continue
 
-                next = valid_actions[next_id]
-                if next.__type__ != "action":
-                    indexex_to_remove.append(idx)
+            next = valid_actions[next_id]
+            if next.__type__ != "action":
+                indexex_to_remove.append(idx)
 
-            for idx in reversed(indexex_to_remove):
-                valid_actions.pop(idx)
+        for idx in reversed(indexex_to_remove):
+            valid_actions.pop(idx)
 
-            return valid_actions
+        return valid_actions
+
+    # Roles answered by a method, as they follow the plug-in
+    _getters = {
+        Roles.IsOptionalRole: _optional,
+        QtCore.Qt.CheckStateRole: _checked,
+        Roles.PluginActionsVisibleRole: _actions_visible,
+        Roles.PluginValidActionsRole: _valid_actions,
+    }
 
-        return super(PluginItem, self).data(role)
+    # Roles below `QtCore.Qt.UserRole` kept by the item itself
+    _roles = (
+        QtCore.Qt.DisplayRole,
+        QtCore.Qt.EditRole,
+        QtCore.Qt.DecorationRole,
+    )
 
     def setData(self, value, role=None):
+        # Called by Qt as well, which expects nothing in return
         if role is None:
             role = QtCore.Qt.UserRole + 1
 
         if role == QtCore.Qt.CheckStateRole:
-            if not self.data(Roles.IsEnabledRole):
-                return False
-            self.plugin.active = value
-            self.emitDataChanged()
-            return True
+            if self.data(Roles.IsEnabledRole):
+                self.plugin.active = value
+                item_changed(self)
+            return
+
+        if role < QtCore.Qt.UserRole and role not in self._roles:
+            super(PluginItem, self).setData(value, role)
+            return
 
         elif role == Roles.PluginActionProgressRole:
-            if isinstance(value, list):
-                _value = self.data(Roles.PluginActionProgressRole)
-                for flag in value:
-                    _value |= flag
-                value = _value
-
-            elif isinstance(value, dict):
-                _value = self.data(Roles.PluginActionProgressRole)
-                for flag, _bool in value.items():
-                    if _bool is True:
-                        _value |= flag
-                    elif _value & flag:
-                        _value ^= flag
-                value = _value
+            value = merge_flags(self._data.get(role, 0), value)
 
         elif role == Roles.PublishFlagsRole:
-            if isinstance(value, list):
-                _value = self.data(Roles.PublishFlagsRole)
-                for flag in value:
-                    _value |= flag
-                value = _value
-
-            elif isinstance(value, dict):
-                _value = self.data(Roles.PublishFlagsRole)
-                for flag, _bool in value.items():
-                    if _bool is True:
-                        _value |= flag
-                    elif _value & flag:
-                        _value ^= flag
-                value = _value
-
-            if value & PluginStates.HasWarning:
-                if self.parent():
-                    self.parent().setData(
-                        {GroupStates.HasWarning: True},
-                        Roles.PublishFlagsRole
-                    )
-            if value & PluginStates.HasError:
-                if self.parent():
-                    self.parent().setData(
-                        {GroupStates.HasError: True},
-                        Roles.PublishFlagsRole
-                    )
+            value = merge_flags(self._data.get(role, 0), value)
+
+            parent = self.parent()
+            for state, group_state in (
+                (PluginStates.HasWarning, GroupStates.HasWarning),
+                (PluginStates.HasError, GroupStates.HasError),
+            ):
+                if (
+                    value & state
+                    and parent is not None
+                    and not parent.publish_states & group_state
+                ):
+                    parent.setData({group_state: True}, Roles.PublishFlagsRole)
+
+        # Display and edit roles are one and the same
+        elif role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            self._data[QtCore.Qt.EditRole] = value
+            role = QtCore.Qt.DisplayRole
 
-        return super(PluginItem, self).setData(value, role)
+        self._data[role] = value
+        item_changed(self)
 
 
 class GroupItem(QtGui.QStandardItem):
@@ -386,22 +539,8 @@ class GroupItem(QtGui.QStandardItem):
 
     def setData(self, value, role=(QtCore.Qt.UserRole + 1)):
         if role == Roles.PublishFlagsRole:
-            if isinstance(value, list):
-                _value = self.data(Roles.PublishFlagsRole)
-                for flag in value:
-                    _value |= flag
-                value = _value
-
-            elif isinstance(value, dict):
-                _value = self.data(Roles.PublishFlagsRole)
-                for flag, _bool in value.items():
-                    if _bool is True:
-                        _value |= flag
-                    elif _value & flag:
-                        _value ^= flag
-                value = _value
-            self.publish_states = value
-            self.emitDataChanged()
+            self.publish_states = merge_flags(self.publish_states, value)
+            item_changed(self)
             return True
 
         return super(GroupItem, self).setData(value, role)
@@ -410,7 +549,7 @@ class GroupItem(QtGui.QStandardItem):
         return GroupType
 
 
-class PluginModel(QtGui.QStandardItemModel):
+class PluginModel(QtGui.QStandardItemModel, BatchUpdates):
     def __init__(self, controller, *args, **kwargs):
         super(PluginModel, self).__init__(*args, **kwargs)
 
@@ -463,14 +602,15 @@ class PluginModel(QtGui.QStandardItemModel):
             self.checkstates[uid] = plugin_item.data(QtCore.Qt.CheckStateRole)
 
     def restore_checkstates(self):
-        for plugin_item in self.plugin_items.values():
-            if not plugin_item.plugin.optional:
-                continue
+        with self.batch_updates():
+            for plugin_item in self.plugin_items.values():
+                if not plugin_item.plugin.optional:
+                    continue
 
-            uid = plugin_item.data(Roles.ObjectUIdRole)
-            state = self.checkstates.get(uid)
-            if state is not None:
-                plugin_item.setData(state, QtCore.Qt.CheckStateRole)
+                uid = plugin_item.data(Roles.ObjectUIdRole)
+                state = self.checkstates.get(uid)
+                if state is not None:
+                    plugin_item.setData(state, QtCore.Qt.CheckStateRole)
 
     def update_with_result(self, result):
         plugin = result["plugin"]
@@ -487,10 +627,11 @@ class PluginModel(QtGui.QStandardItemModel):
         new_records = result.get("records") or []
         if not has_warning:
             for record in new_records:
-                if not hasattr(record, "levelname"):
+                levelname = getattr(record, "levelname", None)
+                if not levelname:
                     continue
 
-                if str(record.levelname).lower() in [
+                if str(levelname).lower() in [
                     "warning", "critical", "error"
                 ]:
                     new_flag_states[PluginStates.HasWarning] = True
@@ -509,49 +650,70 @@ class PluginModel(QtGui.QStandardItemModel):
 
         item.setData(records, Roles.LogRecordsRole)
 
+        timing = result.get("timing")
+        if timing:
+            add_timing(item, timing)
+            if item.parent():
+                add_timing(item.parent(), timing)
+
+        if result.get("memory"):
+            add_memory(item, result["memory"])
+
+        if result.get("profile"):
+            profiles = item.data(Roles.ProfilesRole) or []
+            item.setData(profiles + [result["profile"]], Roles.ProfilesRole)
+
         return item
 
-    def update_compatibility(self):
-        context = self.controller.context
+    def update_compatibility(self, families=None):
+        """Update `PluginStates.IsCompatible` of plug-ins
 
-        families = util.collect_families_from_instances(context, True)
-        for plugin_item in self.plugin_items.values():
-            publish_states = plugin_item.data(Roles.PublishFlagsRole)
-            if (
-                publish_states & PluginStates.WasProcessed
-                or publish_states & PluginStates.WasSkipped
-            ):
-                continue
+        The compatibility index of the controller is expected to be
+        in sync with its context already.
 
-            is_compatible = False
-            # A plugin should always show if it has processed.
-            if plugin_item.plugin.__instanceEnabled__:
-                compatible_instances = pyblish.logic.instances_by_plugin(
-                    context, plugin_item.plugin
-                )
-                for instance in context:
-                    if not instance.data.get("publish"):
-                        continue
+        Arguments:
+            families (list, optional): Only update plug-ins affected by
+                instances of these families, e.g. those just toggled
 
-                    if instance in compatible_instances:
-                        is_compatible = True
-                        break
-            else:
-                plugins = pyblish.logic.plugins_by_families(
-                    [plugin_item.plugin], families
+        Returns:
+            list: Plug-in items whose compatibility changed
+
+        """
+
+        compatibility = self.controller.compatibility
+
+        changed = []
+        with self.batch_updates():
+            for plugin_item in self.plugin_items.values():
+                if families is not None and not compatibility.is_affected(
+                    plugin_item.plugin, families
+                ):
+                    continue
+
+                publish_states = plugin_item.data(Roles.PublishFlagsRole)
+                if (
+                    publish_states & PluginStates.WasProcessed
+                    or publish_states & PluginStates.WasSkipped
+                ):
+                    continue
+
+                # A plugin should always show if it has processed.
+                is_compatible = compatibility.is_compatible(plugin_item.plugin)
+
+                current_is_compatible = (
+                    publish_states & PluginStates.IsCompatible
                 )
-                if plugins:
-                    is_compatible = True
+                if (
+                    (is_compatible and not current_is_compatible)
+                    or (not is_compatible and current_is_compatible)
+                ):
+                    new_flag = {
+                        PluginStates.IsCompatible: is_compatible
+                    }
+                    plugin_item.setData(new_flag, Roles.PublishFlagsRole)
+                    changed.append(plugin_item)
 
-            current_is_compatible = publish_states & PluginStates.IsCompatible
-            if (
-                (is_compatible and not current_is_compatible)
-                or (not is_compatible and current_is_compatible)
-            ):
-                new_flag = {
-                    PluginStates.IsCompatible: is_compatible
-                }
-                plugin_item.setData(new_flag, Roles.PublishFlagsRole)
+        return changed
 
 
 class PluginFilterProxy(QtCore.QSortFilterProxyModel):
@@ -570,140 +732,92 @@ class PluginFilterProxy(QtCore.QSortFilterProxyModel):
         return True
 
 
-class InstanceItem(QtGui.QStandardItem):
-    """Instance item implementation."""
-
-    def __init__(self, instance):
-        super(InstanceItem, self).__init__()
+class InstanceNode(object):
+    """Row of an instance in `InstanceModel`
 
-        self.instance = instance
-        self.is_context = False
-        publish_states = getattr(instance, "_publish_states", 0)
-        if publish_states & InstanceStates.ContextType:
-            self.is_context = True
+    Data of instances is kept in the columns of the model, a node
+    only knows which slot of the columns is its own. It provides the
+    interface of a `QStandardItem` which the window relies on.
 
-        instance._publish_states = publish_states
-        instance._logs = []
-        instance.optional = getattr(instance, "optional", True)
-        instance.data["publish"] = instance.data.get("publish", True)
-        instance.data["label"] = (
-            instance.data.get("label")
-            or getattr(instance, "label", None)
-            or instance.data["name"]
-        )
+    """
 
-        family = self.data(Roles.FamiliesRole)[0]
-        self.setData(
-            "{}.{}".format(family, self.instance.data["name"]),
-            Roles.ObjectUIdRole
-        )
+    __slots__ = ("model", "slot")
 
-    def flags(self):
-        return QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled
+    def __init__(self, model, slot):
+        self.model = model
+        self.slot = slot
 
-    def type(self):
-        return InstanceType
+    @property
+    def instance(self):
+        return self.model._instances[self.slot]
 
     def data(self, role=QtCore.Qt.DisplayRole):
-        if role == QtCore.Qt.DisplayRole:
-            if settings.UseLabel:
-                return self.instance.data["label"]
-            return self.instance.data["name"]
+        return self.model._slot_data(self.slot, role)
 
-        if role == QtCore.Qt.DecorationRole:
-            icon_name = self.instance.data.get("icon") or "file"
-            return QAwesomeTextIconFactory.icon(icon_name)
+    def setData(self, value, role=(QtCore.Qt.UserRole + 1)):
+        return self.model._set_slot_data(self.slot, value, role)
 
-        if role == Roles.TypeRole:
-            return self.type()
+    def index(self):
+        return self.model._slot_index(self.slot)
 
-        if role == Roles.ObjectIdRole:
-            return self.instance.id
+    def parent(self):
+        return self.model._slot_group[self.slot]
 
-        if role == Roles.FamiliesRole:
-            if self.is_context:
-                return ["Context"]
 
-            families = []
-            family = self.instance.data.get("family")
-            if family:
-                families.append(family)
+class InstanceGroupNode(object):
+    """Row of a family in `InstanceModel`, parent of its instances"""
 
-            _families = self.instance.data.get("families") or []
-            for _family in _families:
-                if _family not in families:
-                    families.append(_family)
+    __slots__ = ("model", "name", "row", "slots", "publish_states", "roles")
 
-            return families
+    def __init__(self, model, name, row):
+        self.model = model
+        self.name = name
+        self.row = row
 
-        if role == Roles.IsOptionalRole:
-            return self.instance.optional
+        # Slots of instances, in the order of rows
+        self.slots = []
+        self.publish_states = 0
+        self.roles = {}
 
-        if role == QtCore.Qt.CheckStateRole:
-            return self.instance.data["publish"]
+    def data(self, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole:
+            return self.name
 
         if role == Roles.PublishFlagsRole:
-            return self.instance._publish_states
+            return self.publish_states
 
-        if role == Roles.LogRecordsRole:
-            return self.instance._logs
+        if role == Roles.TypeRole:
+            return GroupType
 
-        return super(InstanceItem, self).data(role)
+        return self.roles.get(role)
 
     def setData(self, value, role=(QtCore.Qt.UserRole + 1)):
-        if role == QtCore.Qt.CheckStateRole:
-            if not self.data(Roles.IsEnabledRole):
-                return False
-            self.instance.data["publish"] = value
-            self.emitDataChanged()
-            return True
+        if role == Roles.PublishFlagsRole:
+            self.publish_states = merge_flags(self.publish_states, value)
+        else:
+            self.roles[role] = value
 
-        if role == Roles.IsEnabledRole:
-            if not self.instance.optional:
-                return False
+        if not self.model.defer_changed(None, self.row):
+            emit_data_changed(self.model, self.index(), self.index())
+        return True
 
-        if role == Roles.PublishFlagsRole:
-            if isinstance(value, list):
-                _value = self.instance._publish_states
-                for flag in value:
-                    _value |= flag
-                value = _value
-
-            elif isinstance(value, dict):
-                _value = self.instance._publish_states
-                for flag, _bool in value.items():
-                    if _bool is True:
-                        _value |= flag
-                    elif _value & flag:
-                        _value ^= flag
-                value = _value
-
-            if value & InstanceStates.HasWarning:
-                if self.parent():
-                    self.parent().setData(
-                        {GroupStates.HasWarning: True},
-                        Roles.PublishFlagsRole
-                    )
-            if value & InstanceStates.HasError:
-                if self.parent():
-                    self.parent().setData(
-                        {GroupStates.HasError: True},
-                        Roles.PublishFlagsRole
-                    )
+    def index(self):
+        return self.model._group_index(self.row)
 
-            self.instance._publish_states = value
-            self.emitDataChanged()
-            return True
 
-        if role == Roles.LogRecordsRole:
-            self.instance._logs = value
-            self.emitDataChanged()
-            return True
+class InstanceModel(QtCore.QAbstractItemModel, BatchUpdates):
+    """Instances grouped by their family
 
-        return super(InstanceItem, self).setData(value, role)
+    Rather than an item per row, instances are stored in columns; plain
+    lists and arrays indexed by the slot of an instance. Columns hold
+    what the model owns, whereas data owned by the instance itself,
+    such as whether it is to be published, is read from the instance.
 
+    Rows are handed out as `InstanceNode` and `InstanceGroupNode` via
+    `instance_items` and `group_items`, and provide data via the same
+    `Roles` as items of the other models.
 
-class InstanceModel(QtGui.QStandardItemModel):
+    """
 
     group_created = QtCore.Signal(QtCore.QModelIndex)
 
@@ -712,37 +826,139 @@ class InstanceModel(QtGui.QStandardItemModel):
 
         self.controller = controller
         self.checkstates = {}
+
+        # Internal pointer of indexes of groups, whereas
+        # indexes of instances point to their group.
+        self._root = object()
+
+        self._reset_columns()
+
+    def _reset_columns(self):
         self.group_items = {}
         self.instance_items = {}
+        self._groups = []
+
+        self._instances = []
+        self._ids = []
+        self._uids = []
+        self._flags = array.array("l")
+        self._enabled = bytearray()
+        self._slot_group = []
+        self._slot_row = array.array("l")
+        self._logs = []
+        self._roles = []
+        self._free = []
+
+        # Roles answered by a column as-is
+        self._columns = {
+            Roles.ObjectIdRole: self._ids,
+            Roles.ObjectUIdRole: self._uids,
+            Roles.PublishFlagsRole: self._flags,
+            Roles.LogRecordsRole: self._logs,
+        }
 
     def reset(self):
-        self.group_items = {}
-        self.instance_items = {}
-        self.clear()
+        self.beginResetModel()
+        self._reset_columns()
+        self.endResetModel()
 
     def append(self, instance):
-        new_item = InstanceItem(instance)
-        families = new_item.data(Roles.FamiliesRole)
-        group_item = self.group_items.get(families[0])
-        if not group_item:
-            group_item = GroupItem(families[0])
-            self.appendRow(group_item)
-            self.group_items[families[0]] = group_item
-            self.group_created.emit(group_item.index())
+        self.extend([instance])
+
+    def extend(self, instances):
+        """Append `instances`, with a single insertion per family"""
+        by_family = collections.OrderedDict()
+        for instance in instances:
+            slot = self._allocate(instance)
+            family = self._slot_families(slot)[0]
+            by_family.setdefault(family, []).append(slot)
+
+        for family, slots in by_family.items():
+            group = self.group_items.get(family)
+            if group is None:
+                row = len(self._groups)
+                self.beginInsertRows(QtCore.QModelIndex(), row, row)
+                group = InstanceGroupNode(self, family, row)
+                self._groups.append(group)
+                self.group_items[family] = group
+                self.endInsertRows()
+                self.group_created.emit(group.index())
+
+            first = len(group.slots)
+            self.beginInsertRows(
+                group.index(), first, first + len(slots) - 1
+            )
+            for row, slot in enumerate(slots, first):
+                self._slot_group[slot] = group
+                self._slot_row[slot] = row
+                self.instance_items[self._ids[slot]] = InstanceNode(
+                    self, slot
+                )
+            group.slots.extend(slots)
+            self.endInsertRows()
 
-        group_item.appendRow(new_item)
-        instance_id = instance.id
-        self.instance_items[instance_id] = new_item
+    def _allocate(self, instance):
+        publish_states = getattr(instance, "_publish_states", 0)
+
+        instance._publish_states = publish_states
+        instance.optional = getattr(instance, "optional", True)
+        instance.data["publish"] = instance.data.get("publish", True)
+        instance.data["label"] = (
+            instance.data.get("label")
+            or getattr(instance, "label", None)
+            or instance.data["name"]
+        )
+
+        values = (
+            instance, instance.id, None, publish_states, 0, None, 0, [], None
+        )
+        columns = (
+            self._instances, self._ids, self._uids, self._flags,
+            self._enabled, self._slot_group, self._slot_row, self._logs,
+            self._roles
+        )
+
+        if self._free:
+            slot = self._free.pop()
+            for column, value in zip(columns, values):
+                column[slot] = value
+        else:
+            slot = len(self._instances)
+            for column, value in zip(columns, values):
+                column.append(value)
+
+        self._uids[slot] = "{}.{}".format(
+            self._slot_families(slot)[0], instance.data["name"]
+        )
+        return slot
 
     def remove(self, instance_id):
-        instance_item = self.instance_items.pop(instance_id)
-        parent_item = instance_item.parent()
-        parent_item.removeRow(instance_item.row())
-        if parent_item.rowCount():
+        node = self.instance_items.pop(instance_id)
+        slot = node.slot
+        group = self._slot_group[slot]
+        row = self._slot_row[slot]
+
+        self.beginRemoveRows(group.index(), row, row)
+        del group.slots[row]
+        for row, _slot in enumerate(group.slots[row:], row):
+            self._slot_row[_slot] = row
+
+        self._instances[slot] = None
+        self._slot_group[slot] = None
+        self._logs[slot] = None
+        self._roles[slot] = None
+        self._free.append(slot)
+        self.endRemoveRows()
+
+        if group.slots:
             return
 
-        self.group_items.pop(parent_item.data(QtCore.Qt.DisplayRole))
-        self.removeRow(parent_item.row())
+        self.beginRemoveRows(QtCore.QModelIndex(), group.row, group.row)
+        self.group_items.pop(group.name)
+        del self._groups[group.row]
+        for row, _group in enumerate(self._groups[group.row:], group.row):
+            _group.row = row
+        self.endRemoveRows()
 
     def store_checkstates(self):
         self.checkstates.clear()
@@ -757,14 +973,15 @@ class InstanceModel(QtGui.QStandardItemModel):
             )
 
     def restore_checkstates(self):
-        for instance_item in self.instance_items.values():
-            if not instance_item.instance.optional:
-                continue
+        with self.batch_updates():
+            for instance_item in self.instance_items.values():
+                if not instance_item.instance.optional:
+                    continue
 
-            uid = instance_item.data(Roles.ObjectUIdRole)
-            state = self.checkstates.get(uid)
-            if state is not None:
-                instance_item.setData(state, QtCore.Qt.CheckStateRole)
+                uid = instance_item.data(Roles.ObjectUIdRole)
+                state = self.checkstates.get(uid)
+                if state is not None:
+                    instance_item.setData(state, QtCore.Qt.CheckStateRole)
 
     def update_with_result(self, result):
         instance = result["instance"]
@@ -786,10 +1003,11 @@ class InstanceModel(QtGui.QStandardItemModel):
         new_records = result.get("records") or []
         if not has_warning:
             for record in new_records:
-                if not hasattr(record, "levelname"):
+                levelname = getattr(record, "levelname", None)
+                if not levelname:
                     continue
 
-                if str(record.levelname).lower() in [
+                if str(levelname).lower() in [
                     "warning", "critical", "error"
                 ]:
                     new_flag_states[InstanceStates.HasWarning] = True
@@ -808,163 +1026,368 @@ class InstanceModel(QtGui.QStandardItemModel):
 
         item.setData(records, Roles.LogRecordsRole)
 
+        timing = result.get("timing")
+        if timing:
+            add_timing(item, timing)
+
         return item
 
-    def update_compatibility(self, context, instances):
-        families = util.collect_families_from_instances(context, True)
-        for plugin_item in self.plugin_items.values():
-            publish_states = plugin_item.data(Roles.PublishFlagsRole)
-            if (
-                publish_states & PluginStates.WasProcessed
-                or publish_states & PluginStates.WasSkipped
-            ):
-                continue
+    # Data of instances, by role
 
-            is_compatible = False
-            # A plugin should always show if it has processed.
-            if plugin_item.plugin.__instanceEnabled__:
-                compatibleInstances = pyblish.logic.instances_by_plugin(
-                    context, plugin_item.plugin
-                )
-                for instance in instances:
-                    if not instance.data.get("publish"):
-                        continue
+    def _slot_label(self, slot):
+        data = self._instances[slot].data
+        if settings.UseLabel:
+            return data["label"]
+        return data["name"]
 
-                    if instance in compatibleInstances:
-                        is_compatible = True
-                        break
-            else:
-                plugins = pyblish.logic.plugins_by_families(
-                    [plugin_item.plugin], families
-                )
-                if plugins:
-                    is_compatible = True
+    def _slot_icon(self, slot):
+        icon_name = self._instances[slot].data.get("icon") or "file"
+        return QAwesomeTextIconFactory.icon(icon_name)
+
+    def _slot_type(self, slot):
+        return InstanceType
 
-            current_is_compatible = publish_states & PluginStates.IsCompatible
-            if (
-                (is_compatible and not current_is_compatible)
-                or (not is_compatible and current_is_compatible)
+    def _slot_families(self, slot):
+        if self._flags[slot] & InstanceStates.ContextType:
+            return ["Context"]
+
+        instance = self._instances[slot]
+
+        families = []
+        family = instance.data.get("family")
+        if family:
+            families.append(family)
+
+        for _family in instance.data.get("families") or []:
+            if _family not in families:
+                families.append(_family)
+
+        return families
+
+    def _slot_optional(self, slot):
+        return self._instances[slot].optional
+
+    def _slot_checked(self, slot):
+        return self._instances[slot].data["publish"]
+
+    def _slot_enabled(self, slot):
+        return bool(self._enabled[slot])
+
+    # Roles answered by a method, given the slot
+    _getters = {
+        QtCore.Qt.DisplayRole: _slot_label,
+        QtCore.Qt.DecorationRole: _slot_icon,
+        Roles.TypeRole: _slot_type,
+        Roles.FamiliesRole: _slot_families,
+        Roles.IsOptionalRole: _slot_optional,
+        QtCore.Qt.CheckStateRole: _slot_checked,
+        Roles.IsEnabledRole: _slot_enabled,
+    }
+
+    def _slot_data(self, slot, role):
+        column = self._columns.get(role)
+        if column is not None:
+            return column[slot]
+
+        getter = self._getters.get(role)
+        if getter is not None:
+            return getter(self, slot)
+
+        roles = self._roles[slot]
+        if roles is not None:
+            return roles.get(role)
+
+    def _set_slot_data(self, slot, value, role):
+        instance = self._instances[slot]
+        group = self._slot_group[slot]
+
+        if role == QtCore.Qt.CheckStateRole:
+            if not self._enabled[slot]:
+                return False
+            instance.data["publish"] = value
+
+        elif role == Roles.IsEnabledRole:
+            if not instance.optional:
+                return False
+            self._enabled[slot] = bool(value)
+
+        elif role == Roles.PublishFlagsRole:
+            value = merge_flags(self._flags[slot], value)
+
+            for state, group_state in (
+                (InstanceStates.HasWarning, GroupStates.HasWarning),
+                (InstanceStates.HasError, GroupStates.HasError),
             ):
-                plugin_item.setData(
-                    {PluginStates.IsCompatible: is_compatible},
-                    Roles.PublishFlagsRole
-                )
+                if (
+                    value & state
+                    and not group.publish_states & group_state
+                ):
+                    group.setData({group_state: True}, Roles.PublishFlagsRole)
+
+            self._flags[slot] = value
+            instance._publish_states = value
+
+        elif role == Roles.LogRecordsRole:
+            self._logs[slot] = value
+
+        else:
+            if self._roles[slot] is None:
+                self._roles[slot] = {}
+            self._roles[slot][role] = value
+
+        if not self.defer_changed(group, self._slot_row[slot]):
+            index = self._slot_index(slot)
+            emit_data_changed(self, index, index)
+        return True
+
+    # Indexes
+
+    def _slot_index(self, slot):
+        return self.createIndex(
+            self._slot_row[slot], 0, self._slot_group[slot]
+        )
+
+    def _group_index(self, row):
+        return self.createIndex(row, 0, self._root)
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        if row < 0 or column != 0:
+            return QtCore.QModelIndex()
+
+        if not parent.isValid():
+            if row < len(self._groups):
+                return self.createIndex(row, column, self._root)
+
+        elif parent.internalPointer() is self._root:
+            group = self._groups[parent.row()]
+            if row < len(group.slots):
+                return self.createIndex(row, column, group)
+
+        return QtCore.QModelIndex()
+
+    def parent(self, index=None):
+        if index is None:
+            return QtCore.QObject.parent(self)
+
+        if not index.isValid():
+            return QtCore.QModelIndex()
+
+        group = index.internalPointer()
+        if group is self._root:
+            return QtCore.QModelIndex()
+
+        return self._group_index(group.row)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if not parent.isValid():
+            return len(self._groups)
+
+        if parent.internalPointer() is self._root:
+            return len(self._groups[parent.row()].slots)
+
+        return 0
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 1
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        return QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        # Invalid indexes point to nothing
+        group = index.internalPointer()
+        if group is None:
+            return None
+
+        if group is self._root:
+            return self._groups[index.row()].data(role)
+
+        return self._slot_data(group.slots[index.row()], role)
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if not index.isValid():
+            return False
+
+        group = index.internalPointer()
+        if group is self._root:
+            return self._groups[index.row()].setData(value, role)
+
+        return self._set_slot_data(group.slots[index.row()], value, role)
+
+
+class RowOffsets(object):
+    """Rows per group, with running totals in a binary indexed tree
+
+    Finding the offset of a group, which group a row falls within and
+    adding rows to a group are O(log groups). Inserting or removing
+    groups rebuilds the tree, which is O(groups).
+
+    """
+
+    def __init__(self, counts=()):
+        self.reset(counts)
+
+    def reset(self, counts=()):
+        self.counts = list(counts)
+        self.total = sum(self.counts)
+
+        size = len(self.counts)
+        tree = [0] + self.counts
+        for index in range(1, size + 1):
+            parent = index + (index & -index)
+            if parent <= size:
+                tree[parent] += tree[index]
+        self._tree = tree
+
+        # Largest power of two within the tree, where searches start
+        self._step = 1
+        while self._step * 2 <= size:
+            self._step *= 2
+
+    def __len__(self):
+        return len(self.counts)
+
+    def add(self, group, count):
+        """Add `count` rows to `group`, or remove with a negative count"""
+        self.counts[group] += count
+        self.total += count
+
+        tree = self._tree
+        size = len(tree) - 1
+        index = group + 1
+        while index <= size:
+            tree[index] += count
+            index += index & -index
+
+    def offset(self, group):
+        """Return the number of rows of groups prior to `group`"""
+        tree = self._tree
+        offset = 0
+        index = group
+        while index > 0:
+            offset += tree[index]
+            index -= index & -index
+        return offset
+
+    def find(self, row):
+        """Return group of flattened `row`, and its row within that group"""
+        tree = self._tree
+        size = len(tree) - 1
+        group = 0
+        step = self._step
+        while step:
+            index = group + step
+            if index <= size and tree[index] <= row:
+                group = index
+                row -= tree[index]
+            step >>= 1
+        return group, row
+
+    def insert(self, group, counts):
+        self.reset(self.counts[:group] + list(counts) + self.counts[group:])
+
+    def remove(self, first, last):
+        self.reset(self.counts[:first] + self.counts[last + 1:])
 
 
 class ArtistProxy(QtCore.QAbstractProxyModel):
+    """Instances of all groups, as one flat list
+
+    Rows are listed group by group, such that the row of an instance
+    is the number of instances in groups before its own plus its row
+    within its group, as kept by `RowOffsets`.
+
+    """
+
     def __init__(self, *args, **kwargs):
-        self.mapping_from = []
-        self.mapping_to = []
+        self.offsets = RowOffsets()
         super(ArtistProxy, self).__init__(*args, **kwargs)
 
+    def _group_counts(self, first, last):
+        source = self.sourceModel()
+        return [
+            source.rowCount(source.index(row, 0))
+            for row in range(first, last + 1)
+        ]
+
     def on_rows_inserted(self, parent_index, from_row, to_row):
-        if not parent_index.isValid():
+        if parent_index.isValid():
+            group = parent_index.row()
+            first = self.offsets.offset(group) + from_row
+            self.beginInsertRows(
+                QtCore.QModelIndex(), first, first + to_row - from_row
+            )
+            self.offsets.add(group, to_row - from_row + 1)
+            self.endInsertRows()
             return
 
-        parent_row = parent_index.row()
-        if parent_row >= len(self.mapping_from):
-            self.mapping_from.append(list())
-
-        new_from = None
-        new_to = None
-        for row_num in range(from_row, to_row + 1):
-            new_row = len(self.mapping_to)
-            new_to = new_row
-            if new_from is None:
-                new_from = new_row
-
-            self.mapping_from[parent_row].insert(row_num, new_row)
-            self.mapping_to.insert(new_row, [parent_row, row_num])
-
-        self.rowsInserted.emit(self.parent(), new_from, new_to + 1)
-
-    def _remove_rows(self, parent_row, from_row, to_row):
-        removed_rows = []
-        increment_num = self.mapping_from[parent_row][from_row]
-        _emit_last = None
-        for row_num in reversed(range(from_row, to_row + 1)):
-            row = self.mapping_from[parent_row].pop(row_num)
-            _emit_last = row
-            removed_rows.append(row)
-
-        _emit_first = int(increment_num)
-        mapping_from_len = len(self.mapping_from)
-        mapping_from_parent_len = len(self.mapping_from[parent_row])
-        if parent_row < mapping_from_len:
-            for idx in range(from_row, mapping_from_parent_len):
-                self.mapping_from[parent_row][idx] = increment_num
-                increment_num += 1
-
-        if parent_row < mapping_from_len - 1:
-            for idx_i in range(parent_row + 1, mapping_from_len):
-                sub_values = self.mapping_from[idx_i]
-                if not sub_values:
-                    continue
-
-                for idx_j in range(0, len(sub_values)):
-                    self.mapping_from[idx_i][idx_j] = increment_num
-                    increment_num += 1
-
-        first_to_row = None
-        for row in removed_rows:
-            if first_to_row is None:
-                first_to_row = row
-            self.mapping_to.pop(row)
+        # Groups usually arrive empty, but need not
+        counts = self._group_counts(from_row, to_row)
+        count = sum(counts)
+        if not count:
+            self.offsets.insert(from_row, counts)
+            return
 
-        return (_emit_first, _emit_last)
+        first = self.offsets.offset(from_row)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + count - 1)
+        self.offsets.insert(from_row, counts)
+        self.endInsertRows()
 
     def on_rows_removed(self, parent_index, from_row, to_row):
         if parent_index.isValid():
-            parent_row = parent_index.row()
-            _emit_first, _emit_last = self._remove_rows(
-                parent_row, from_row, to_row
+            group = parent_index.row()
+            first = self.offsets.offset(group) + from_row
+            self.beginRemoveRows(
+                QtCore.QModelIndex(), first, first + to_row - from_row
             )
-            self.rowsRemoved.emit(self.parent(), _emit_first, _emit_last)
-
-        else:
-            removed_rows = False
-            emit_first = None
-            emit_last = None
-            for row_num in reversed(range(from_row, to_row + 1)):
-                remaining_rows = self.mapping_from[row_num]
-                if remaining_rows:
-                    removed_rows = True
-                    _emit_first, _emit_last = self._remove_rows(
-                        row_num, 0, len(remaining_rows) - 1
-                    )
-                    if emit_first is None:
-                        emit_first = _emit_first
-                    emit_last = _emit_last
+            self.offsets.add(group, -(to_row - from_row + 1))
+            self.endRemoveRows()
+            return
 
-                self.mapping_from.pop(row_num)
+        first = self.offsets.offset(from_row)
+        last = self.offsets.offset(to_row + 1) - 1
+        if last < first:
+            self.offsets.remove(from_row, to_row)
+            return
 
-            diff = to_row - from_row + 1
-            mapping_to_len = len(self.mapping_to)
-            if from_row < mapping_to_len:
-                for idx in range(from_row, mapping_to_len):
-                    self.mapping_to[idx][0] -= diff
+        self.beginRemoveRows(QtCore.QModelIndex(), first, last)
+        self.offsets.remove(from_row, to_row)
+        self.endRemoveRows()
 
-            if removed_rows:
-                self.rowsRemoved.emit(self.parent(), emit_first, emit_last)
+    def on_about_to_reset(self):
+        self.beginResetModel()
 
     def on_reset(self):
-        self.modelReset.emit()
-        self.mapping_from = []
-        self.mapping_to = []
+        source = self.sourceModel()
+        self.offsets.reset(self._group_counts(0, source.rowCount() - 1))
+        self.endResetModel()
 
     def setSourceModel(self, source_model):
         super(ArtistProxy, self).setSourceModel(source_model)
         source_model.rowsInserted.connect(self.on_rows_inserted)
         source_model.rowsRemoved.connect(self.on_rows_removed)
+        source_model.modelAboutToBeReset.connect(self.on_about_to_reset)
         source_model.modelReset.connect(self.on_reset)
         source_model.dataChanged.connect(self.on_data_changed)
 
+        self.beginResetModel()
+        self.offsets.reset(
+            self._group_counts(0, source_model.rowCount() - 1)
+        )
+        self.endResetModel()
+
     def on_data_changed(self, from_index, to_index, role=[]):
-        proxy_from_index = self.mapFromSource(from_index)
-        if from_index == to_index:
-            proxy_to_index = proxy_from_index
-        else:
-            proxy_to_index = self.mapFromSource(to_index)
+        # Groups are not shown
+        parent_index = from_index.parent()
+        if not parent_index.isValid():
+            return
+
+        # Rows of a group are next to each other in the proxy
+        offset = self.offsets.offset(parent_index.row())
+        proxy_from_index = self.index(offset + from_index.row(), 0)
+        proxy_to_index = self.index(offset + to_index.row(), 0)
 
         args = [proxy_from_index, proxy_to_index]
         if Qt.__binding__ not in ("PyQt4", "PySide"):
@@ -978,7 +1401,7 @@ class ArtistProxy(QtCore.QAbstractProxyModel):
     def rowCount(self, parent=QtCore.QModelIndex()):
         if parent.isValid():
             return 0
-        return len(self.mapping_to)
+        return self.offsets.total
 
     def mapFromSource(self, index):
         if not index.isValid():
@@ -988,17 +1411,16 @@ class ArtistProxy(QtCore.QAbstractProxyModel):
         if not parent_index.isValid():
             return QtCore.QModelIndex()
 
-        parent_idx = self.mapping_from[parent_index.row()]
-        my_row = parent_idx[index.row()]
-        return self.index(my_row, index.column())
+        row = self.offsets.offset(parent_index.row()) + index.row()
+        return self.index(row, index.column())
 
     def mapToSource(self, index):
-        if not index.isValid() or index.row() > len(self.mapping_to):
-            return self.sourceModel().index(index.row(), index.column())
+        if not index.isValid() or index.row() >= self.offsets.total:
+            return QtCore.QModelIndex()
 
-        parent_row, item_row = self.mapping_to[index.row()]
-        parent_index = self.sourceModel().index(parent_row, 0)
-        return self.sourceModel().index(item_row, 0, parent_index)
+        group, row = self.offsets.find(index.row())
+        parent_index = self.sourceModel().index(group, 0)
+        return self.sourceModel().index(row, 0, parent_index)
 
     def index(self, row, column, parent=QtCore.QModelIndex()):
         return self.createIndex(row, column, QtCore.QModelIndex())
@@ -1007,7 +1429,288 @@ class ArtistProxy(QtCore.QAbstractProxyModel):
         return QtCore.QModelIndex()
 
 
+def intern_string(value):
+    """Return `value` interned, unless it is not a string that can be"""
+    if type(value) is str:
+        return intern(value)
+    return value
+
+
+class Record(object):
+    """Log record, error or message of the terminal
+
+    Created once per record, and shared by the terminal, the items of
+    plug-ins and instances and the perspective. Fields repeated across
+    many records, such as the name of the logger, are interned.
+
+    Fields are read as attributes, or as keys for those that are set.
+
+    """
+
+    __slots__ = (
+        "type", "label", "msg", "levelno", "levelname", "name",
+        "filename", "pathname", "lineno", "func", "msecs", "threadName",
+        "instance", "traceback",
+    )
+
+    def __init__(self, type, label, msg=None, levelno=None, levelname=None,
+                 name=None, filename=None, pathname=None, lineno=None,
+                 func=None, msecs=None, threadName=None, instance=None,
+                 traceback=None):
+        self.type = type
+        self.label = label
+        self.msg = msg
+        self.levelno = levelno
+        self.levelname = intern_string(levelname)
+        self.name = intern_string(name)
+        self.filename = intern_string(filename)
+        self.pathname = intern_string(pathname)
+        self.lineno = lineno
+        self.func = func
+        self.msecs = msecs
+        self.threadName = intern_string(threadName)
+        self.instance = intern_string(instance)
+        self.traceback = traceback
+
+    @classmethod
+    def from_log_record(cls, record, instance=None):
+        msg = text_type(record.msg)
+        return cls(
+            "record", msg,
+            msg=msg,
+            levelno=record.levelno,
+            levelname=record.levelname,
+            name=record.name,
+            filename=record.filename,
+            pathname=record.pathname,
+            lineno=record.lineno,
+            msecs=record.msecs,
+            threadName=record.threadName,
+            instance=instance,
+        )
+
+    @classmethod
+    def from_error(cls, error, instance=None):
+        fname, line_no, func, exc = error.traceback
+        return cls(
+            "error", "%s" % (error),
+            filename="%s" % (fname),
+            lineno="%s" % (line_no),
+            func="%s" % (func),
+            traceback=error.formatted_traceback,
+            instance=instance,
+        )
+
+    def __getitem__(self, key):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return key in self.__slots__ and getattr(self, key) is not None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        return dict(
+            (key, getattr(self, key)) for key in self.__slots__
+            if getattr(self, key) is not None
+        )
+
+
+def _contains(postings, record_id):
+    index = bisect.bisect_left(postings, record_id)
+    return index < len(postings) and postings[index] == record_id
+
+
+class TerminalIndex(object):
+    """Inverted index of records of the terminal, by the ids of records
+
+    Words of messages, levels, names of plug-ins and instances map to
+    the ascending ids of records they appear in, such that queries
+    need only intersect the records of each term.
+
+    Queries are words, all of which must appear in a record, along
+    with any of these filters.
+
+        level:warning  Records of this level or above
+        plugin:name    Records logged by a plug-in with `name` in its name
+        instance:name  Records of an instance with `name` in its name
+
+    """
+
+    words = re.compile(r"\w+", re.UNICODE)
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._postings = {}
+
+        # Distinct values of fields, to be matched by filters
+        self._values = {"level": set(), "plugin": set(), "instance": set()}
+
+    def _text(self, record):
+        # Labels are mostly the first line of their message
+        if record.msg is None or record.label not in record.msg:
+            return "%s %s" % (record.label, record.msg or "")
+        return record.msg
+
+    def add(self, record_id, record):
+        """Index `record`, with an id above that of any indexed before"""
+        keys = set(self.words.findall(self._text(record).lower()))
+
+        for field, value in (("level", record.levelno),
+                             ("plugin", record.name),
+                             ("instance", record.instance)):
+            if value is not None:
+                self._values[field].add(value)
+                keys.add((field, value))
+
+        postings = self._postings
+        for key in keys:
+            try:
+                postings[key].append(record_id)
+            except KeyError:
+                postings[key] = array.array("l", [record_id])
+
+    def prune(self, first_id):
+        """Forget about records with an id below `first_id`"""
+        for key, postings in list(self._postings.items()):
+            del postings[:bisect.bisect_left(postings, first_id)]
+            if not postings:
+                del self._postings[key]
+                if isinstance(key, tuple):
+                    self._values[key[0]].discard(key[1])
+
+    def parse(self, query):
+        """Return terms of `query`, as (field, value) pairs
+
+        Words are returned with a field of None, and values of
+        filters in the form they are compared in.
+
+        """
+
+        terms = []
+        for part in query.split():
+            field, _, value = part.partition(":")
+            if value and field in self._values:
+                if field == "level":
+                    level = logging.getLevelName(value.upper())
+                    value = level if isinstance(level, int) else (
+                        int(value) if value.isdigit() else None
+                    )
+                else:
+                    value = value.lower()
+                terms.append((field, value))
+            else:
+                terms.extend(
+                    (None, word)
+                    for word in self.words.findall(part.lower())
+                )
+
+        return terms
+
+    def _matches_value(self, field, value, candidate):
+        if value is None:
+            return False
+        if field == "level":
+            return candidate >= value
+        return value in text_type(candidate).lower()
+
+    def search(self, query, first_id=0):
+        """Return ascending ids of records matching `query`"""
+        terms = self.parse(query)
+        if not terms:
+            return []
+
+        candidates = []
+        for field, value in terms:
+            if field is None:
+                postings = [self._postings.get(value, ())]
+            else:
+                postings = [
+                    self._postings[(field, candidate)]
+                    for candidate in self._values[field]
+                    if self._matches_value(field, value, candidate)
+                ]
+            candidates.append(postings)
+
+        # Start from the term with the fewest records
+        candidates.sort(key=lambda postings: sum(map(len, postings)))
+
+        ids = set()
+        for postings in candidates[0]:
+            ids.update(postings)
+
+        for postings in candidates[1:]:
+            if not ids:
+                break
+
+            # Look up few ids among many records, rather than
+            # gathering every one of those records.
+            if len(ids) * 16 < sum(map(len, postings)):
+                ids = set(
+                    record_id for record_id in ids
+                    if any(_contains(_postings, record_id)
+                           for _postings in postings)
+                )
+                continue
+
+            matching = set()
+            for _postings in postings:
+                matching.update(_postings)
+            ids.intersection_update(matching)
+
+        return sorted(record_id for record_id in ids if record_id >= first_id)
+
+    def matches(self, record, terms):
+        """Return whether `record` matches `terms` of a parsed query"""
+        words = None
+        for field, value in terms:
+            if field is None:
+                if words is None:
+                    words = set(
+                        self.words.findall(self._text(record).lower())
+                    )
+                if value not in words:
+                    return False
+                continue
+
+            candidate = {
+                "level": record.levelno,
+                "plugin": record.name,
+                "instance": record.instance,
+            }[field]
+            if candidate is None or not self._matches_value(
+                field, value, candidate
+            ):
+                return False
+
+        return True
+
+
 class TerminalModel(QtGui.QStandardItemModel):
+    """Records of the terminal, the most recent `capacity` of which in memory
+
+    Once there are `page_size` records more than `capacity`, the oldest
+    are written to an append-only log on disk and removed, all at once,
+    and a history row at the top lists them. Expanding the history
+    fetches the most recent of those records back from disk, `page_size`
+    at a time.
+
+    Arguments:
+        capacity (int, optional): Records kept in memory, defaults
+            to every record
+        page_size (int, optional): Records fetched from disk at once
+
+    """
+
     key_label_record_map = (
         ("instance", "Instance"),
         ("msg", "Message"),
@@ -1046,70 +1749,141 @@ class TerminalModel(QtGui.QStandardItemModel):
 
     )
 
+    # Number of formatted details kept
+    detail_cache_size = 500
+
+    # Characters of values escaped for details
+    detail_escapes = {
+        ord("<"): "&#60;",
+        ord(">"): "&#62;",
+        ord("\n"): "<br/>",
+        ord(" "): "&nbsp;",
+    }
+
     def __init__(self, *args, **kwargs):
+        self.capacity = kwargs.pop("capacity", None)
+        self.page_size = kwargs.pop("page_size", 500)
+        self._log = None
         super(TerminalModel, self).__init__(*args, **kwargs)
         self.reset()
 
     def reset(self):
-        self.items_to_set_widget = queue.Queue()
         self.clear()
+        self.close()
+
+        # Records of rows after the history, oldest first
+        self._records = collections.deque()
+
+        # Records written to disk, of which the most recent `_fetched`
+        # are children of the history row, and the offset of every
+        # `page_size`th record within the log.
+        self._history = None
+        self._spilled = 0
+        self._fetched = 0
+        self._pages = []
+
+        # Text of details, by id of their item, most recently used last
+        self._details = collections.OrderedDict()
+        self._detail_id = 0
+
+        # Records in memory, by their id; the number of records
+        # written to disk prior to them plus their row after history
+        self.search_index = TerminalIndex()
+        self._pruned = 0
+
+    def close(self):
+        """Remove the log of records written to disk"""
+        if self._log is None:
+            return
+
+        self._log.close()
+        os.remove(self._log.name)
+        self._log = None
 
     def prepare_records(self, result):
         prepared_records = []
         instance_name = None
         instance = result["instance"]
         if instance is not None:
-            instance_name = instance.data["name"]
+            instance_name = intern_string(instance.data["name"])
 
         for record in result.get("records") or []:
             if isinstance(record, dict):
-                record_item = record
-            else:
-                record_item = {
-                    "label": text_type(record.msg),
-                    "type": "record",
-                    "levelno": record.levelno,
-                    "threadName": record.threadName,
-                    "name": record.name,
-                    "filename": record.filename,
-                    "pathname": record.pathname,
-                    "lineno": record.lineno,
-                    "msg": text_type(record.msg),
-                    "msecs": record.msecs,
-                    "levelname": record.levelname
-                }
+                record = Record(**record)
+            elif not isinstance(record, Record):
+                record = Record.from_log_record(record)
 
             if instance_name is not None:
-                record_item["instance"] = instance_name
+                record.instance = instance_name
 
-            prepared_records.append(record_item)
+            prepared_records.append(record)
 
         error = result.get("error")
         if error:
-            fname, line_no, func, exc = error.traceback
-            error_item = {
-                "label": "%s" % (error),
-                "type": "error",
-                "filename": "%s" % (fname),
-                "lineno": "%s" % (line_no),
-                "func": "%s" % (func),
-                "traceback": error.formatted_traceback,
-            }
-
-            if instance_name is not None:
-                error_item["instance"] = instance_name
-
-            prepared_records.append(error_item)
+            prepared_records.append(Record.from_error(error, instance_name))
 
         return prepared_records
 
     def append(self, record_item):
-        record_type = record_item["type"]
+        if isinstance(record_item, dict):
+            record_item = Record(**record_item)
+
+        self.search_index.add(
+            self._spilled + len(self._records), record_item
+        )
+        self._records.append(record_item)
+        self.appendRow(self._create_item(record_item))
+
+        if (
+            self.capacity
+            and len(self._records) >= self.capacity + self.page_size
+        ):
+            self._spill(len(self._records) - self.capacity)
+
+            # Forget about records on disk once there are enough of them
+            if self._spilled - self._pruned >= max(self.capacity, 1000):
+                self.search_index.prune(self._spilled)
+                self._pruned = self._spilled
+
+    # Records in memory, by id
+
+    def search(self, query):
+        """Return ascending ids of records in memory matching `query`
+
+        See `TerminalIndex` for the syntax of queries. Records of the
+        history are not searched.
+
+        """
+
+        return self.search_index.search(query, self._spilled)
+
+    def record_id(self, row):
+        """Return id of record at top-level `row`, or None for history"""
+        if self._history is not None:
+            row -= 1
+        if 0 <= row < len(self._records):
+            return self._spilled + row
+        return None
+
+    def record_row(self, record_id):
+        """Return top-level row of record with `record_id`, or -1"""
+        row = record_id - self._spilled
+        if not 0 <= row < len(self._records):
+            return -1
+        if self._history is not None:
+            row += 1
+        return row
+
+    def record(self, record_id):
+        return self._records[record_id - self._spilled]
+
+    def _create_item(self, record_item):
+        record_type = record_item.type
 
         terminal_item_type = None
         if record_type == "record":
             for level, _type in self.level_to_record:
-                if level > record_item["levelno"]:
+                if level > record_item.levelno:
                     break
                 terminal_item_type = _type
 
@@ -1123,7 +1897,7 @@ class TerminalModel(QtGui.QStandardItemModel):
         if icon_color and icon_name:
             top_item_icon = QAwesomeIconFactory.icon(icon_name, icon_color)
 
-        label = record_item["label"].split("\n")[0]
+        label = record_item.label.split("\n")[0]
 
         top_item = QtGui.QStandardItem()
         top_item.setData(TerminalLabelType, Roles.TypeRole)
@@ -1136,34 +1910,130 @@ class TerminalModel(QtGui.QStandardItemModel):
         if top_item_icon:
             top_item.setData(top_item_icon, QtCore.Qt.DecorationRole)
 
-        self.appendRow(top_item)
+        self._detail_id += 1
+        top_item.appendRow(
+            TerminalDetailItem(record_item, self._detail_id, self)
+        )
+
+        return top_item
+
+    # Records written to disk
+
+    def _spill(self, count):
+        """Move the `count` oldest records in memory to the log on disk"""
+        if self._log is None:
+            fd, path = tempfile.mkstemp(
+                prefix="pyblish-terminal-", suffix=".jsonl"
+            )
+            os.close(fd)
+            self._log = open(path, "a+b")
+
+        self._log.seek(0, os.SEEK_END)
+        for _ in range(count):
+            if not self._spilled % self.page_size:
+                self._pages.append(self._log.tell())
 
-        detail_text = self.prepare_detail_text(record_item)
-        detail_item = QtGui.QStandardItem(detail_text)
-        detail_item.setData(TerminalDetailType, Roles.TypeRole)
-        top_item.appendRow(detail_item)
-        self.items_to_set_widget.put(detail_item)
+            line = json.dumps(
+                self._records.popleft().to_dict(), default=text_type
+            )
+            self._log.write(line.encode("utf-8") + b"\n")
+            self._spilled += 1
+        self._log.flush()
+
+        if self._history is None:
+            self._history = QtGui.QStandardItem()
+            self._history.setData(TerminalHistoryType, Roles.TypeRole)
+            self._history.setData(
+                QAwesomeIconFactory.icon("fa.history", "#ffffff"),
+                QtCore.Qt.DecorationRole
+            )
+            self._history.setFlags(
+                QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled
+            )
+            self.insertRow(0, self._history)
+
+        # Fetched records stay contiguous with those just written
+        if self._fetched:
+            rows = [self.takeRow(1) for _ in range(count)]
+            self._history.appendRows([row[0] for row in rows])
+            self._fetched += count
+
+            excess = self._fetched - self.capacity
+            if excess > 0:
+                self._history.removeRows(0, excess)
+                self._fetched -= excess
+        else:
+            self.removeRows(1, count)
+
+        self._history.setData(
+            "{} earlier records".format(self._spilled), QtCore.Qt.DisplayRole
+        )
+
+    def _read(self, first, count):
+        """Return `count` records of the log on disk, from `first`"""
+        self._log.seek(self._pages[first // self.page_size])
+        for _ in range(first % self.page_size):
+            self._log.readline()
+
+        return [
+            Record(**json.loads(self._log.readline().decode("utf-8")))
+            for _ in range(count)
+        ]
+
+    def _is_history(self, parent):
+        return (
+            parent.isValid()
+            and not parent.parent().isValid()
+            and parent.data(Roles.TypeRole) == TerminalHistoryType
+        )
+
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        if self._is_history(parent):
+            return True
+        return super(TerminalModel, self).hasChildren(parent)
+
+    def canFetchMore(self, parent):
+        return self._is_history(parent) and self._fetched < self._spilled
+
+    def fetchMore(self, parent):
+        if not self.canFetchMore(parent):
+            return
+
+        count = min(self.page_size, self._spilled - self._fetched)
+        first = self._spilled - self._fetched - count
+        items = [
+            self._create_item(record)
+            for record in self._read(first, count)
+        ]
+        self._history.insertRows(0, items)
+        self._fetched += count
 
     def update_with_result(self, result):
         for record in result["records"]:
             self.append(record)
 
+    def detail_text(self, item):
+        """Return text of detail `item`, formatted on first request"""
+        text = self._details.pop(item.detail_id, None)
+        if text is None:
+            text = self.prepare_detail_text(item.record)
+            if len(self._details) >= self.detail_cache_size:
+                self._details.popitem(last=False)
+
+        self._details[item.detail_id] = text
+        return text
+
     def prepare_detail_text(self, item_data):
-        if item_data["type"] == "info":
-            return item_data["label"]
+        if item_data.type == "info":
+            return item_data.label
 
-        html_text = ""
+        rows = []
         for key, title in self.key_label_record_map:
-            if key not in item_data:
+            value = getattr(item_data, key)
+            if value is None:
                 continue
-            value = item_data[key]
-            text = (
-                (u"%s" % value)
-                .replace("<", "&#60;")
-                .replace(">", "&#62;")
-                .replace('\n', '<br/>')
-                .replace(' ', '&nbsp;')
-            )
+
+            text = (u"%s" % value).translate(self.detail_escapes)
 
             title_tag = (
                 '<span style=\" font-size:8pt; font-weight:600;'
@@ -1171,15 +2041,44 @@ class TerminalModel(QtGui.QStandardItemModel):
                 ' color:#fff;\" >{}:</span> '
             ).format(title)
 
-            html_text += (
+            rows.append((
                 '<tr><td width="100%" align=left>{}</td></tr>'
                 '<tr><td width="100%">{}</td></tr>'
-            ).format(title_tag, text)
+            ).format(title_tag, text))
 
-        html_text = '<table width="100%" cellspacing="3">{}</table>'.format(
-            html_text
+        return '<table width="100%" cellspacing="3">{}</table>'.format(
+            "".join(rows)
         )
-        return html_text
+
+
+class TerminalDetailItem(QtGui.QStandardItem):
+    """Detail of a record of the terminal
+
+    Only the record itself is stored, and formatted by its model
+    once the view asks for its text.
+
+    Items moved into or fetched back under the history aren't told of
+    their model by Qt, which is why the item remembers it.
+
+    """
+
+    def __init__(self, record, detail_id, terminal):
+        super(TerminalDetailItem, self).__init__()
+        self.record = record
+        self.detail_id = detail_id
+        self._terminal = weakref.ref(terminal)
+
+    def data(self, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole:
+            terminal = self._terminal()
+            if terminal is None:
+                return None
+            return terminal.detail_text(self)
+
+        if role == Roles.TypeRole:
+            return TerminalDetailType
+
+        return super(TerminalDetailItem, self).data(role)
 
 
 class TerminalProxy(QtCore.QSortFilterProxyModel):
@@ -1202,6 +2101,93 @@ class TerminalProxy(QtCore.QSortFilterProxyModel):
         # method not returning parent QObject in PySide and PyQt4
         self.view = view
 
+        # Ids of records matching the search, see `set_query`
+        self.query = ""
+        self.matches = set()
+        self._terms = []
+
+    def setSourceModel(self, source_model):
+        super(TerminalProxy, self).setSourceModel(source_model)
+        source_model.rowsInserted.connect(self.on_rows_inserted)
+        source_model.rowsRemoved.connect(self.on_rows_removed)
+
+    def set_query(self, query):
+        """Highlight records matching `query`, see `TerminalIndex`
+
+        Rather than filtering rows anew, only the data of rows whose
+        match changed is announced as changed.
+
+        Returns:
+            list: Ascending ids of matching records
+
+        """
+
+        source = self.sourceModel()
+        self.query = query
+        self._terms = source.search_index.parse(query)
+        ids = source.search(query) if self._terms else []
+
+        matches = set(ids)
+        changed = matches ^ self.matches
+        self.matches = matches
+
+        if changed:
+            first = self.mapFromSource(
+                source.index(source.record_row(min(changed)), 0)
+            )
+            last = self.mapFromSource(
+                source.index(source.record_row(max(changed)), 0)
+            )
+
+            args = [
+                first if first.isValid() else self.index(0, 0),
+                last if last.isValid() else self.index(
+                    self.rowCount() - 1, 0
+                ),
+            ]
+            if Qt.__binding__ not in ("PyQt4", "PySide"):
+                args.append([Roles.TerminalMatchRole])
+            self.dataChanged.emit(*args)
+
+        return ids
+
+    def on_rows_inserted(self, parent, first, last):
+        if not self._terms or parent.isValid():
+            return
+
+        # New records are painted as they are, once they match
+        source = self.sourceModel()
+        for row in range(first, last + 1):
+            record_id = source.record_id(row)
+            if record_id is None:
+                continue
+
+            record = source.record(record_id)
+            if source.search_index.matches(record, self._terms):
+                self.matches.add(record_id)
+
+    def on_rows_removed(self, parent, first, last):
+        # Forget about records written to disk, once there are many
+        source = self.sourceModel()
+        if parent.isValid() or len(self.matches) <= 2 * source.rowCount():
+            return
+
+        self.matches = set(
+            record_id for record_id in self.matches
+            if source.record_row(record_id) >= 0
+        )
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role == Roles.TerminalMatchRole:
+            if not self.matches or index.parent().isValid():
+                return False
+
+            source_index = self.mapToSource(index)
+            record_id = self.sourceModel().record_id(source_index.row())
+            return record_id in self.matches
+
+        return super(TerminalProxy, self).data(index, role)
+
     @classmethod
     def change_filter(cls, name, value):
         cls.filter_buttons_checks[name] = value
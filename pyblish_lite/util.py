@@ -12,6 +12,11 @@ from .vendor.Qt import QtCore
 from .vendor.six import text_type
 import pyblish.api
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 root = os.path.dirname(__file__)
 
 
@@ -74,6 +79,86 @@ def u_print(msg, **kwargs):
     print(msg, **kwargs)
 
 
+def add_timing(total, timing):
+    """Return `total` with the `timing` of a result added to it
+
+    Arguments:
+        total (dict): Sum of timings so far, None if there are none
+        timing (dict): "wall", "cpu" and "queue" seconds of a result,
+            see `Controller._process`
+
+    """
+
+    total = dict(total or {"wall": 0.0, "cpu": 0.0, "queue": 0.0})
+    for key in ("wall", "cpu", "queue"):
+        total[key] += timing.get(key, 0.0)
+    return total
+
+
+def format_duration(seconds):
+    """Return `seconds` as short text, e.g. 0.3ms, 45ms, 2.4s or 3m07s"""
+    if seconds < 0.01:
+        return "%.1fms" % (seconds * 1000)
+    if seconds < 1:
+        return "%dms" % (seconds * 1000)
+    if seconds < 60:
+        return "%.1fs" % seconds
+    return "%dm%02ds" % divmod(int(seconds), 60)
+
+
+def format_bytes(size):
+    """Return `size` in bytes as short text, e.g. 512 B, 3.5 MB"""
+    for unit in ("B", "KB", "MB"):
+        if abs(size) < 1024:
+            break
+        size /= 1024.0
+    else:
+        unit = "GB"
+
+    if unit == "B":
+        return "%d B" % size
+    return "%.1f %s" % (size, unit)
+
+
+def format_timing(timing):
+    return "Wall %s, CPU %s, queued %s" % tuple(
+        format_duration(timing[key]) for key in ("wall", "cpu", "queue")
+    )
+
+
+def profile_summary(paths, count=10):
+    """Return the `count` hottest functions of profiles at `paths`
+
+    Functions are sorted by time spent in the function itself,
+    accumulated over every profile.
+
+    Arguments:
+        paths (list): Paths to .pstats files, e.g. of `Profiler`
+        count (int, optional): Number of functions, default 10
+
+    """
+
+    import pstats
+
+    paths = [path for path in paths if os.path.isfile(path)]
+    if not paths:
+        return ""
+
+    stats = pstats.Stats(*paths).stats
+    hottest = sorted(
+        stats.items(), key=lambda item: item[1][2], reverse=True
+    )[:count]
+
+    lines = ["%8s %8s %8s  %s" % ("own", "total", "calls", "function")]
+    for (filename, lineno, function), (_, calls, own, total, _) in hottest:
+        lines.append("%8s %8s %8d  %s (%s:%d)" % (
+            format_duration(own), format_duration(total), calls,
+            function, os.path.basename(filename), lineno
+        ))
+
+    return "\n".join(lines)
+
+
 def collect_families_from_instances(instances, only_active=False):
     all_families = set()
     for instance in instances:
@@ -91,6 +176,358 @@ def collect_families_from_instances(instances, only_active=False):
     return list(all_families)
 
 
+def instance_families(instance):
+    """Return families of `instance`, its primary family first"""
+    family = instance.data.get("family")
+    families = [family] if family else []
+    families += instance.data.get("families") or []
+    return tuple(families)
+
+
+class CompatibilityIndex(object):
+    """Which instances every plug-in is compatible with
+
+    Families are encoded as bits, making the families of an instance or
+    a plug-in a single integer mask. Matching is then a bitwise operation
+    per algorithm; Intersection is `a & b`, Subset `a & b == a` and Exact
+    `a == b`, whereas a "*" family matches every instance. With NumPy
+    available, the masks of all instances are kept as a matrix and a
+    plug-in is matched against every instance at once.
+
+    `sync()` re-encodes only instances which were added or whose families
+    changed, toggling an instance merely updates its active flag. Given
+    a context counting its `generation`, instances are only compared
+    once the context changed, or when said to have changed.
+
+    Usage:
+        >>> index = CompatibilityIndex()
+        >>> index.reset(plugins)  # doctest: +SKIP
+        >>> index.sync(context)  # doctest: +SKIP
+        >>> index.instances(plugin, only_active=True)  # doctest: +SKIP
+        >>> index.sync(context, changed=[instance])  # doctest: +SKIP
+
+    """
+
+    # Match in bulk with NumPy, when available
+    use_numpy = numpy is not None
+
+    def __init__(self):
+        self.plugins = []
+
+        # {family: bit}
+        self._bits = {}
+
+        # {plugin: mask}, where None means any family
+        self._plugin_masks = {}
+
+        # {instance_id: instance}, in order of the context
+        self._instances = collections.OrderedDict()
+
+        # {instance_id: (families, active)}
+        self._signatures = {}
+
+        # {instance_id: mask}
+        self._masks = {}
+
+        # Ids of instances in order of the context, and their position
+        self._order = []
+        self._positions = {}
+
+        # {mask: number of active instances}
+        self._active_masks = collections.Counter()
+
+        # {plugin: [instance_id]}, until an instance changes
+        self._matches = {}
+
+        # {plugin: number of active instances matched}
+        self._active_counts = {}
+
+        # Masks of instances, as rows of 64 bit words
+        self._matrix = None
+
+        # Generation of the context last synced
+        self._generation = None
+
+    def reset(self, plugins):
+        self.plugins = list(plugins)
+        self._bits.clear()
+        self._plugin_masks.clear()
+        self._instances.clear()
+        self._signatures.clear()
+        self._masks.clear()
+        self._order = []
+        self._positions.clear()
+        self._active_masks.clear()
+        self._matches.clear()
+        self._active_counts.clear()
+        self._matrix = None
+        self._generation = None
+
+        for plugin in self.plugins:
+            self._plugin_mask(plugin)
+
+    def _encode(self, families):
+        mask = 0
+        for family in families:
+            bit = self._bits.get(family)
+            if bit is None:
+                bit = self._bits[family] = len(self._bits)
+            mask |= 1 << bit
+        return mask
+
+    def _plugin_mask(self, plugin):
+        try:
+            return self._plugin_masks[plugin]
+        except KeyError:
+            pass
+
+        assert plugin.match in (
+            pyblish.api.Intersection, pyblish.api.Subset, pyblish.api.Exact
+        ), ("Plug-in did not provide "
+            "valid matching algorithm: %s" % plugin.match)
+
+        if "*" in plugin.families:
+            mask = None
+        else:
+            mask = self._encode(plugin.families)
+
+        self._plugin_masks[plugin] = mask
+        return mask
+
+    def sync(self, instances, changed=None):
+        """Bring the index up to date with `instances`
+
+        Arguments:
+            instances (list): Instances, typically the context
+            changed (list, optional): Instances whose families or active
+                state may have changed, defaults to every instance. Only
+                honoured for a context counting its `generation`.
+
+        Returns:
+            bool: Whether anything changed
+
+        """
+
+        generation = getattr(instances, "generation", None)
+        everything = changed is None or generation is None
+        if everything or generation != self._generation:
+            result = self._sync_order(instances, everything)
+        else:
+            result = False
+        self._generation = generation
+
+        if not everything:
+            for instance in changed:
+                if instance.id in self._positions:
+                    result = self._sign(instance) or result
+
+        return result
+
+    def _sync_order(self, instances, everything):
+        changed = False
+        ids = []
+        for instance in instances:
+            ids.append(instance.id)
+            if everything or instance.id not in self._signatures:
+                changed = self._sign(instance) or changed
+
+        if ids != self._order:
+            changed = True
+            for instance_id in set(self._order) - set(ids):
+                if self._signatures.pop(instance_id)[1]:
+                    self._deactivate(self._masks[instance_id])
+                self._instances.pop(instance_id)
+                self._masks.pop(instance_id)
+
+            self._instances = collections.OrderedDict(
+                (instance_id, self._instances[instance_id])
+                for instance_id in ids
+            )
+            self._order = ids
+            self._positions = dict(
+                (instance_id, position)
+                for position, instance_id in enumerate(ids)
+            )
+            self._matches.clear()
+            self._active_counts.clear()
+            self._matrix = None
+
+        return changed
+
+    def _sign(self, instance):
+        """Compare families and active state of `instance` with last time
+
+        Returns:
+            bool: Whether either changed
+
+        """
+
+        signature = (
+            instance_families(instance),
+            instance.data.get("publish") is not False
+        )
+        previous = self._signatures.get(instance.id)
+        if previous == signature:
+            return False
+
+        self._signatures[instance.id] = signature
+        self._instances[instance.id] = instance
+
+        if previous is not None:
+            if previous[1]:
+                self._deactivate(self._masks[instance.id])
+
+            # Toggled, matches are the same
+            if previous[0] == signature[0]:
+                self._toggle(self._masks[instance.id], signature[1])
+            else:
+                self._masks.pop(instance.id)
+
+        if instance.id not in self._masks:
+            self._masks[instance.id] = self._encode(signature[0])
+            self._matches.clear()
+            self._active_counts.clear()
+            self._matrix = None
+
+        if signature[1]:
+            self._active_masks[self._masks[instance.id]] += 1
+
+        return True
+
+    def _deactivate(self, mask):
+        self._active_masks[mask] -= 1
+        if not self._active_masks[mask]:
+            del self._active_masks[mask]
+
+    def _toggle(self, instance_mask, active):
+        step = 1 if active else -1
+        for plugin in self._active_counts:
+            mask = self._plugin_masks[plugin]
+            if mask is None or self._match(plugin, mask, instance_mask):
+                self._active_counts[plugin] += step
+
+    def _match(self, plugin, mask, instance_mask):
+        if plugin.match == pyblish.api.Intersection:
+            return bool(instance_mask & mask)
+        if plugin.match == pyblish.api.Subset:
+            return instance_mask & mask == mask
+        return instance_mask == mask
+
+    def _words(self, mask, count):
+        return numpy.array(
+            [(mask >> (64 * word)) & 0xFFFFFFFFFFFFFFFF
+             for word in range(count)],
+            dtype=numpy.uint64
+        )
+
+    def _match_all(self, plugin, mask):
+        """Return ids of every instance matching `plugin`"""
+        if not self.use_numpy:
+            return [
+                instance_id for instance_id in self._order
+                if self._match(plugin, mask, self._masks[instance_id])
+            ]
+
+        count = max(1, (len(self._bits) + 63) // 64)
+        if self._matrix is None or self._matrix.shape[1] != count:
+            self._matrix = numpy.array(
+                [self._words(self._masks[instance_id], count)
+                 for instance_id in self._order],
+                dtype=numpy.uint64
+            ).reshape(len(self._order), count)
+
+        words = self._words(mask, count)
+        if plugin.match == pyblish.api.Intersection:
+            matched = (self._matrix & words).any(axis=1)
+        elif plugin.match == pyblish.api.Subset:
+            matched = ((self._matrix & words) == words).all(axis=1)
+        else:
+            matched = (self._matrix == words).all(axis=1)
+
+        return [self._order[position]
+                for position in numpy.flatnonzero(matched)]
+
+    def families(self, only_active=False):
+        """Return families of all instances, like
+        `collect_families_from_instances`"""
+        if only_active:
+            masks = self._active_masks
+        else:
+            masks = set(self._masks.values())
+
+        union = 0
+        for mask in masks:
+            union |= mask
+
+        return [
+            family for family, bit in self._bits.items()
+            if union & (1 << bit)
+        ]
+
+    def instances(self, plugin, only_active=False):
+        """Return instances compatible with `plugin`, in order of the
+        context, like `pyblish.logic.instances_by_plugin`"""
+        mask = self._plugin_mask(plugin)
+        if mask is None:
+            ids = self._order
+        else:
+            ids = self._matches.get(plugin)
+            if ids is None:
+                ids = self._matches[plugin] = self._match_all(plugin, mask)
+
+        return [
+            self._instances[instance_id] for instance_id in ids
+            if not only_active or self._signatures[instance_id][1]
+        ]
+
+    def is_affected(self, plugin, families):
+        """Return whether toggling instances of `families` may change
+        whether `plugin` is compatible"""
+        mask = self._plugin_mask(plugin)
+
+        # Any family, or no family at all, depends on every instance
+        if not mask:
+            return True
+
+        # Whereas context plug-ins matching exactly depend on all families
+        if (
+            not plugin.__instanceEnabled__
+            and plugin.match == pyblish.api.Exact
+        ):
+            return True
+
+        return any(
+            mask & (1 << self._bits[family])
+            for family in families if family in self._bits
+        )
+
+    def is_compatible(self, plugin):
+        """Return whether `plugin` has any active instance to process
+
+        Context plug-ins are compatible with the families of all active
+        instances, like `pyblish.logic.plugins_by_families`.
+
+        """
+
+        mask = self._plugin_mask(plugin)
+        if mask is None:
+            return not plugin.__instanceEnabled__ or bool(self._active_masks)
+
+        if plugin.__instanceEnabled__:
+            count = self._active_counts.get(plugin)
+            if count is None:
+                count = self._active_counts[plugin] = len(
+                    self.instances(plugin, only_active=True)
+                )
+            return count > 0
+
+        union = 0
+        for instance_mask in self._active_masks:
+            union |= instance_mask
+
+        return self._match(plugin, mask, union)
+
+
 class OrderGroups:
     # Validator order can be set with environment "PYBLISH_VALIDATION_ORDER"
     # - this variable sets when validation button will hide and proecssing
@@ -149,6 +149,10 @@ class TerminalView(QtWidgets.QTreeView):
         self.verticalScrollBar().setSingleStep(10)
         self.setRootIsDecorated(False)
 
+        # Rows are inserted one record at a time, and scrolled
+        # to once per pass of the event loop rather than per row
+        self._scroll_pending = False
+
         self.clicked.connect(self.item_expand)
 
     def event(self, event):
@@ -176,7 +180,9 @@ class TerminalView(QtWidgets.QTreeView):
         self.selectionModel().clear()
 
     def item_expand(self, index):
-        if index.data(Roles.TypeRole) == model.TerminalLabelType:
+        if index.data(Roles.TypeRole) in (
+            model.TerminalLabelType, model.TerminalHistoryType
+        ):
             if self.isExpanded(index):
                 self.collapse(index)
             else:
@@ -187,12 +193,37 @@ class TerminalView(QtWidgets.QTreeView):
     def rowsInserted(self, parent, start, end):
         """Automatically scroll to bottom on each new item added."""
         super(TerminalView, self).rowsInserted(parent, start, end)
+
+        # Details and records fetched from history are not new
+        if parent.isValid():
+            return
+
+        if not self._scroll_pending:
+            self._scroll_pending = True
+            QtCore.QTimer.singleShot(0, self._scroll_to_bottom)
+
+    def _scroll_to_bottom(self):
+        self._scroll_pending = False
         self.updateGeometry()
         self.scrollToBottom()
 
+    def verticalScrollbarValueChanged(self, value):
+        super(TerminalView, self).verticalScrollbarValueChanged(value)
+
+        # Page in earlier records once scrolled to the top of history,
+        # the scroll bar is also reset once the model is unset.
+        proxy = self.model()
+        if proxy is None or value != self.verticalScrollBar().minimum():
+            return
+
+        index = proxy.index(0, 0)
+        if self.isExpanded(index) and proxy.canFetchMore(index):
+            proxy.fetchMore(index)
+
     def resizeEvent(self, event):
         super(self.__class__, self).resizeEvent(event)
-        self.model().layoutChanged.emit()
+        if self.model() is not None:
+            self.model().layoutChanged.emit()
 
     def sizeHint(self):
         size = super(TerminalView, self).sizeHint()
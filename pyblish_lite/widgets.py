@@ -5,7 +5,7 @@
 
 import sys
 from .vendor.Qt import QtCore, QtWidgets, QtGui
-from . import model, delegate, view, awesome
+from . import model, delegate, view, awesome, util
 from .constants import PluginStates, InstanceStates, Roles
 
 
@@ -63,6 +63,10 @@ class PerspectiveWidget(QtWidgets.QWidget):
     l_doc = "说明信息"
     l_rec = "记录"
     l_path = "运行路径"
+    l_profile = "性能分析"
+
+    # Number of functions shown of profiles
+    profile_count = 15
 
     def __init__(self, parent):
         super(PerspectiveWidget, self).__init__(parent)
@@ -116,6 +120,17 @@ class PerspectiveWidget(QtWidgets.QWidget):
         path.set_content(path_label)
         layout.addWidget(path)
 
+        profile = ExpandableWidget(self, self.l_profile)
+        profile_label = PerspectiveLabel()
+        profile_label.setLineWrapMode(QtWidgets.QTextEdit.NoWrap)
+
+        # QFontDatabase.systemFont is only available as of Qt 5.2
+        font = QtGui.QFont("Courier")
+        font.setStyleHint(QtGui.QFont.TypeWriter)
+        profile_label.setFont(font)
+        profile.set_content(profile_label)
+        layout.addWidget(profile)
+
         records = ExpandableWidget(self, self.l_rec)
         layout.addWidget(records)
 
@@ -128,7 +143,7 @@ class PerspectiveWidget(QtWidgets.QWidget):
         terminal_proxy.setSourceModel(terminal_model)
 
         terminal_view.setModel(terminal_proxy)
-        terminal_delegate = delegate.TerminalItem()
+        terminal_delegate = delegate.TerminalItem(terminal_view)
         terminal_view.setItemDelegate(terminal_delegate)
         records.set_content(terminal_view)
 
@@ -151,6 +166,7 @@ class PerspectiveWidget(QtWidgets.QWidget):
         self.name_widget = name
         self.documentation = documentation
         self.path = path
+        self.profile = profile
         self.records = records
 
         self.toggle_button.clicked.connect(self.toggle_me)
@@ -159,6 +175,9 @@ class PerspectiveWidget(QtWidgets.QWidget):
         self.last_item_id = None
         self.last_id = None
 
+        # {(path, ..): summary}
+        self._profile_summaries = {}
+
     def trim(self, docstring):
         if not docstring:
             return ""
@@ -196,6 +215,7 @@ class PerspectiveWidget(QtWidgets.QWidget):
 
     def reset(self):
         self.last_id = None
+        self._profile_summaries.clear()
         self.set_records(list())
         self.set_indicator_state(None)
 
@@ -259,6 +279,7 @@ class PerspectiveWidget(QtWidgets.QWidget):
 
             self.documentation.setVisible(False)
             self.path.setVisible(False)
+            self.profile.setVisible(False)
 
         elif index_type == model.PluginType:
             item_id = index.data(Roles.ObjectIdRole)
@@ -295,6 +316,17 @@ class PerspectiveWidget(QtWidgets.QWidget):
             self.documentation.setVisible(True)
             self.path.setVisible(True)
 
+            profiles = tuple(index.data(Roles.ProfilesRole) or [])
+            self.profile.setVisible(bool(profiles))
+            if profiles:
+                summary = self._profile_summaries.get(profiles)
+                if summary is None:
+                    summary = util.profile_summary(
+                        profiles, self.profile_count
+                    )
+                    self._profile_summaries[profiles] = summary
+                self.profile.content.setPlainText(summary)
+
         else:
             self.last_type = None
             self.last_id = None
@@ -302,6 +334,7 @@ class PerspectiveWidget(QtWidgets.QWidget):
             self.set_indicator_state(None)
             self.documentation.setVisible(False)
             self.path.setVisible(False)
+            self.profile.setVisible(False)
             self.records.setVisible(False)
             return
 
@@ -326,11 +359,6 @@ class PerspectiveWidget(QtWidgets.QWidget):
         data = {"records": records}
         self.terminal_model.reset()
         self.terminal_model.update_with_result(data)
-        while not self.terminal_model.items_to_set_widget.empty():
-            item = self.terminal_model.items_to_set_widget.get()
-            widget = TerminalDetail(item.data(QtCore.Qt.DisplayRole))
-            index = self.terminal_proxy.mapFromSource(item.index())
-            self.terminal_view.setIndexWidget(index, widget)
 
         self.records.button_toggle_text.setText(
             "{} ({})".format(self.l_rec, len_records)
@@ -489,27 +517,6 @@ class CommentBox(QtWidgets.QLineEdit):
         return super(CommentBox, self).focusOutEvent(event)
 
 
-class TerminalDetail(QtWidgets.QTextEdit):
-    def __init__(self, text, *args, **kwargs):
-        super(self.__class__, self).__init__(*args, **kwargs)
-
-        self.setReadOnly(True)
-        self.setHtml(text)
-        self.setTextInteractionFlags(QtCore.Qt.TextBrowserInteraction)
-        self.setWordWrapMode(
-            QtGui.QTextOption.WrapAtWordBoundaryOrAnywhere
-        )
-
-    def sizeHint(self):
-        content_margins = (
-            self.contentsMargins().top()
-            + self.contentsMargins().bottom()
-        )
-        size = self.document().documentLayout().documentSize().toSize()
-        size.setHeight(size.height() + content_margins)
-        return size
-
-
 class FilterButton(QtWidgets.QPushButton):
     def __init__(self, name, *args, **kwargs):
         self.filter_name = name
@@ -550,10 +557,16 @@ class TerminalFilterWidget(QtWidgets.QWidget):
             FilterButton("error", error_icon)
         )
 
+        search_box = QtWidgets.QLineEdit()
+        search_box.setPlaceholderText(
+            "Search, e.g. collect level:warning plugin:Validate instance:a"
+        )
+        search_count = QtWidgets.QLabel()
+
         layout = QtWidgets.QHBoxLayout()
         layout.setContentsMargins(0, 0, 0, 0)
-        # Add spacers
-        layout.addWidget(QtWidgets.QWidget(), 1)
+        layout.addWidget(search_box, 1)
+        layout.addWidget(search_count)
 
         for btn in filter_buttons:
             layout.addWidget(btn)
@@ -561,3 +574,5 @@ class TerminalFilterWidget(QtWidgets.QWidget):
         self.setLayout(layout)
 
         self.filter_buttons = filter_buttons
+        self.search_box = search_box
+        self.search_count = search_count
@@ -42,9 +42,13 @@ Todo:
     the first time to understand how to actually to it!
 
 """
+import os
+import time
+import bisect
+import logging
 from functools import partial
 
-from . import delegate, model, settings, util, view, widgets
+from . import control, delegate, model, settings, util, view, widgets
 from .awesome import tags as awesome
 
 from .vendor.Qt import QtCore, QtGui, QtWidgets
@@ -202,6 +206,8 @@ class Window(QtWidgets.QDialog):
         overview_plugin_view.setItemDelegate(overview_plugin_delegate)
         plugin_model = model.PluginModel(controller)
         plugin_proxy = model.PluginFilterProxy()
+        # Re-filter only rows whose data changed
+        plugin_proxy.setDynamicSortFilter(True)
         plugin_proxy.setSourceModel(plugin_model)
         overview_plugin_view.setModel(plugin_proxy)
 
@@ -228,12 +234,16 @@ class Window(QtWidgets.QDialog):
         terminal_container = QtWidgets.QWidget()
 
         terminal_view = view.TerminalView()
-        terminal_model = model.TerminalModel()
+
+        # Keep the most recent records in memory, unless disabled with "0"
+        terminal_model = model.TerminalModel(
+            capacity=int(os.getenv("PYBLISH_TERMINAL_RECORDS", 10000)) or None
+        )
         terminal_proxy = model.TerminalProxy(terminal_view)
         terminal_proxy.setSourceModel(terminal_model)
 
         terminal_view.setModel(terminal_proxy)
-        terminal_delegate = delegate.TerminalItem()
+        terminal_delegate = delegate.TerminalItem(terminal_view)
         terminal_view.setItemDelegate(terminal_delegate)
 
         layout = QtWidgets.QVBoxLayout(terminal_container)
@@ -449,6 +459,8 @@ class Window(QtWidgets.QDialog):
             "CommentIntentWidget": comment_intent_widget,
             "CommentBox": comment_box,
             "CommentPlaceholder": comment_box.placeholder,
+            "TerminalSearch": terminal_filters_widget.search_box,
+            "TerminalSearchCount": terminal_filters_widget.search_count,
             "ClosingPlaceholder": closing_placeholder,
             "IntentBox": intent_box
         }
@@ -501,6 +513,29 @@ class Window(QtWidgets.QDialog):
             self.toggle_perspective_widget
         )
 
+        # Reporting stalls of the event loop is opt-in, given a
+        # threshold in milliseconds
+        threshold = float(os.getenv("PYBLISH_WATCHDOG") or 0)
+        if threshold:
+            watchdog = control.Watchdog(threshold, parent=self)
+            watchdog.stalled.connect(self.on_stalled)
+            controller.scheduler.watchdog = watchdog
+
+            for name in ("on_about_to_process",
+                         "on_was_processed",
+                         "on_instances_added",
+                         "on_passed_group",
+                         "on_was_reset",
+                         "on_was_stopped",
+                         "on_was_finished",
+                         "on_items_toggled",
+                         "update_compatibility"):
+                setattr(self, name, watchdog.watch(name, getattr(self, name)))
+
+            watchdog.start()
+        else:
+            watchdog = None
+
         controller.switch_toggleability.connect(self.change_toggleability)
 
         controller.was_reset.connect(self.on_was_reset)
@@ -511,6 +546,8 @@ class Window(QtWidgets.QDialog):
         controller.was_finished.connect(self.on_was_finished)
 
         controller.was_skipped.connect(self.on_was_skipped)
+        controller.instances_added.connect(self.on_instances_added)
+        controller.instances_removed.connect(self.on_instances_removed)
         controller.was_acted.connect(self.on_was_acted)
 
         # NOTE: Listeners to this signal are run in the main thread
@@ -530,6 +567,12 @@ class Window(QtWidgets.QDialog):
 
         comment_box.textChanged.connect(self.on_comment_entered)
         comment_box.returnPressed.connect(self.on_play_clicked)
+        terminal_filters_widget.search_box.textChanged.connect(
+            self.on_terminal_search_changed
+        )
+        terminal_filters_widget.search_box.returnPressed.connect(
+            self.on_terminal_search_next
+        )
         overview_plugin_view.customContextMenuRequested.connect(
             self.on_plugin_action_menu_requested
         )
@@ -539,6 +582,7 @@ class Window(QtWidgets.QDialog):
         )
 
         self.main_widget = main_widget
+        self.watchdog = watchdog
 
         self.header_widget = header_widget
         self.body_widget = body_widget
@@ -589,7 +633,11 @@ class Window(QtWidgets.QDialog):
         current_page = settings.InitialTab or "artist"
         self.state = {
             "is_closing": False,
-            "current_page": current_page
+            "current_page": current_page,
+            # Families of instances toggled by the current event,
+            # None when there are none
+            "toggled_families": None,
+            "toggled_instances": []
         }
 
         self.tabs[current_page].setChecked(True)
@@ -633,13 +681,15 @@ class Window(QtWidgets.QDialog):
         self.terminal_filters_widget.setVisible(show)
 
     def change_toggleability(self, enable_value):
-        for plugin_item in self.plugin_model.plugin_items.values():
-            plugin_item.setData(enable_value, Roles.IsEnabledRole)
+        with self.plugin_model.batch_updates():
+            for plugin_item in self.plugin_model.plugin_items.values():
+                plugin_item.setData(enable_value, Roles.IsEnabledRole)
 
-        for instance_item in (
-            self.instance_model.instance_items.values()
-        ):
-            instance_item.setData(enable_value, Roles.IsEnabledRole)
+        with self.instance_model.batch_updates():
+            for instance_item in (
+                self.instance_model.instance_items.values()
+            ):
+                instance_item.setData(enable_value, Roles.IsEnabledRole)
 
     def on_item_toggled(self, index, state=None):
         """An item is requesting to be toggled"""
@@ -653,7 +703,37 @@ class Window(QtWidgets.QDialog):
             state = not index.data(QtCore.Qt.CheckStateRole)
 
         index.model().setData(index, state, QtCore.Qt.CheckStateRole)
-        self.update_compatibility()
+
+        # Toggling a plug-in doesn't affect compatibility
+        if index.data(Roles.TypeRole) != model.InstanceType:
+            return
+
+        # Views toggle every selected item in one go,
+        # update compatibility once they are all toggled.
+        if self.state["toggled_families"] is None:
+            self.state["toggled_families"] = set()
+            QtCore.QTimer.singleShot(0, self.on_items_toggled)
+
+        self.state["toggled_families"].update(
+            index.data(Roles.FamiliesRole) or []
+        )
+
+        instance = self.controller.instances.get(
+            index.data(Roles.ObjectIdRole)
+        )
+        if instance is not None:
+            self.state["toggled_instances"].append(instance)
+
+    def on_items_toggled(self):
+        families = self.state["toggled_families"]
+        instances = self.state["toggled_instances"]
+        self.state["toggled_families"] = None
+        self.state["toggled_instances"] = []
+        if families is not None:
+            self.controller.compatibility.sync(
+                self.controller.context, changed=instances
+            )
+            self.update_compatibility(families)
 
     def on_tab_changed(self, target):
         self.comment_main_widget.setVisible(not target == "terminal")
@@ -695,6 +775,39 @@ class Window(QtWidgets.QDialog):
         """The user has typed a comment."""
         self.controller.context.data["comment"] = self.comment_box.text()
 
+    def on_terminal_search_changed(self, query):
+        """The user has typed a search of the terminal"""
+        matches = self.terminal_proxy.set_query(query)
+        self.terminal_filters_widget.search_count.setText(
+            "%d matches" % len(matches) if query.strip() else ""
+        )
+
+    def on_terminal_search_next(self):
+        """Select the next visible match below the current record"""
+        view = self.terminal_view
+        proxy = self.terminal_proxy
+        source = self.terminal_model
+
+        current = view.currentIndex()
+        while current.parent().isValid():
+            current = current.parent()
+
+        current_id = source.record_id(proxy.mapToSource(current).row())
+        if current_id is None:
+            current_id = -1
+
+        # Wrap around to the first match once past the last one
+        matches = sorted(proxy.matches)
+        position = bisect.bisect_right(matches, current_id)
+        for record_id in matches[position:] + matches[:position]:
+            index = proxy.mapFromSource(
+                source.index(source.record_row(record_id), 0)
+            )
+            if index.isValid():
+                view.setCurrentIndex(index)
+                view.scrollTo(index)
+                break
+
     def on_intent_changed(self):
         idx = self.intent_model.index(self.intent_box.currentIndex(), 0)
         intent_value = self.intent_model.data(idx, Roles.IntentItemValue)
@@ -762,9 +875,9 @@ class Window(QtWidgets.QDialog):
 
         menu.popup(self.overview_plugin_view.viewport().mapToGlobal(pos))
 
-    def update_compatibility(self):
-        self.plugin_model.update_compatibility()
-        self.plugin_proxy.invalidateFilter()
+    def update_compatibility(self, families=None):
+        # The proxy re-filters plug-ins whose compatibility changed
+        self.plugin_model.update_compatibility(families)
 
     def on_was_reset(self):
         # Append context object to instances model
@@ -880,33 +993,32 @@ class Window(QtWidgets.QDialog):
         self.footer_widget.setProperty("success", success_val)
         self.footer_widget.style().polish(self.footer_widget)
 
-        for instance_item in (
-            self.instance_model.instance_items.values()
-        ):
-            instance_item.setData(
-                {InstanceStates.HasFinished: True},
-                Roles.PublishFlagsRole
-            )
+        with self.instance_model.batch_updates():
+            for instance_item in (
+                self.instance_model.instance_items.values()
+            ):
+                instance_item.setData(
+                    {InstanceStates.HasFinished: True},
+                    Roles.PublishFlagsRole
+                )
 
-        for group_item in self.instance_model.group_items.values():
-            group_item.setData(
-                {GroupStates.HasFinished: True},
-                Roles.PublishFlagsRole
-            )
+            for group_item in self.instance_model.group_items.values():
+                group_item.setData(
+                    {GroupStates.HasFinished: True},
+                    Roles.PublishFlagsRole
+                )
 
         self.update_compatibility()
 
-    def on_was_processed(self, result):
-        existing_ids = set(self.instance_model.instance_items.keys())
-        existing_ids.remove(self.controller.context.id)
-        for instance in self.controller.context:
-            if instance.id not in existing_ids:
-                self.instance_model.append(instance)
-            else:
-                existing_ids.remove(instance.id)
+    def on_instances_added(self, instances):
+        self.instance_model.extend(instances)
+
+    def on_instances_removed(self, instances):
+        for instance in instances:
+            self.instance_model.remove(instance.id)
 
-        for instance_id in existing_ids:
-            self.instance_model.remove(instance_id)
+    def on_was_processed(self, result):
+        started = time.time()
 
         if result.get("error"):
             # Toggle from artist to overview tab on error
@@ -919,11 +1031,6 @@ class Window(QtWidgets.QDialog):
         instance_item = self.instance_model.update_with_result(result)
 
         self.terminal_model.update_with_result(result)
-        while not self.terminal_model.items_to_set_widget.empty():
-            item = self.terminal_model.items_to_set_widget.get()
-            widget = widgets.TerminalDetail(item.data(QtCore.Qt.DisplayRole))
-            index = self.terminal_proxy.mapFromSource(item.index())
-            self.terminal_view.setIndexWidget(index, widget)
 
         self.update_compatibility()
 
@@ -932,6 +1039,34 @@ class Window(QtWidgets.QDialog):
                 plugin_item, instance_item
             )
 
+        if self.controller.tracer is not None:
+            self.controller.tracer.complete(
+                "on_was_processed", "gui", started,
+                plugin=result["plugin"].__name__
+            )
+
+    def on_stalled(self, report):
+        message = "Event loop stalled for %s" % util.format_duration(
+            report["late"]
+        )
+        if report["running"]:
+            message += " in %s" % report["running"]
+
+        ran = ", ".join(
+            "%s (%s)" % (name, util.format_duration(duration))
+            for name, duration in report["ran"]
+        )
+
+        self.terminal_model.append(model.Record(
+            "record", message,
+            levelno=logging.WARNING,
+            levelname="WARNING",
+            name="pyblish.lite.watchdog",
+            msg="%s\nRan: %s" % (message, ran or "-"),
+            traceback="".join(report["stack"]) or "-",
+            threadName="MainThread",
+        ))
+
     # -------------------------------------------------------------------------
     #
     # Functions
@@ -967,7 +1102,9 @@ class Window(QtWidgets.QDialog):
         self.comment_box.placeholder.setVisible(False)
         self.comment_box.placeholder.setVisible(True)
         # Launch controller reset
-        util.defer(500, self.controller.reset)
+        self.controller.scheduler.schedule(
+            self.controller.reset, repaint=True
+        )
 
     def validate(self):
         self.info(self.tr("Preparing validate.."))
@@ -976,7 +1113,9 @@ class Window(QtWidgets.QDialog):
         self.footer_button_validate.setEnabled(False)
         self.footer_button_play.setEnabled(False)
 
-        util.defer(5, self.controller.validate)
+        self.controller.scheduler.schedule(
+            self.controller.validate, repaint=True
+        )
 
     def publish(self):
         self.info(self.tr("Preparing publish.."))
@@ -986,7 +1125,9 @@ class Window(QtWidgets.QDialog):
         self.footer_button_validate.setEnabled(False)
         self.footer_button_play.setEnabled(False)
 
-        util.defer(5, self.controller.publish)
+        self.controller.scheduler.schedule(
+            self.controller.publish, repaint=True
+        )
 
     def act(self, plugin_item, action):
         self.info("%s %s.." % (self.tr("Preparing"), action))
@@ -1003,9 +1144,10 @@ class Window(QtWidgets.QDialog):
         )
 
         # Give Qt time to draw
-        util.defer(100, lambda: self.controller.act(
-            plugin_item.plugin, action
-        ))
+        self.controller.scheduler.schedule(
+            lambda: self.controller.act(plugin_item.plugin, action),
+            repaint=True
+        )
 
         self.info(self.tr("Action prepared."))
 
@@ -1023,16 +1165,7 @@ class Window(QtWidgets.QDialog):
         if error:
             records = result.get("records") or []
             action_state |= PluginActionStates.HasFailed
-            fname, line_no, func, exc = error.traceback
-
-            records.append({
-                "label": u"%s" % (error),
-                "type": "error",
-                "filename": u"%s" % (fname),
-                "lineno": u"%s" % (line_no),
-                "func": u"%s" % (func),
-                "traceback": error.formatted_traceback
-            })
+            records.append(model.Record.from_error(error))
 
             result["records"] = records
 
@@ -1073,8 +1206,15 @@ class Window(QtWidgets.QDialog):
             self.info(self.tr("Cleaning up controller.."))
             self.controller.cleanup()
 
+            if self.watchdog is not None:
+                self.watchdog.stop()
+                report = os.getenv("PYBLISH_WATCHDOG_REPORT")
+                if report:
+                    self.watchdog.export(report)
+
             self.info(self.tr("All clean!"))
             self.info(self.tr("Good bye"))
+            self.terminal_model.close()
             return super(Window, self).closeEvent(event)
 
         self.info(self.tr("Closing.."))
@@ -1123,10 +1263,7 @@ class Window(QtWidgets.QDialog):
         info.setText(message)
 
         # Include message in terminal
-        self.terminal_model.append({
-            "label": message,
-            "type": "info"
-        })
+        self.terminal_model.append(model.Record("info", message))
 
         self.animation_info_msg.stop()
         self.animation_info_msg.start()
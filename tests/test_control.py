@@ -1,6 +1,14 @@
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
 import pyblish.api
 import pyblish.lib
 from pyblish_lite import control
+from pyblish_lite.vendor.Qt import QtCore
 
 # Vendor libraries
 from nose.tools import (
@@ -360,3 +368,896 @@ def test_controller_signals():
         "was_published": 1,
         "was_finished": 3,
     })
+
+
+@with_setup(clean)
+def test_headless_publish():
+    """Headless controller publishes with the same signals as the GUI"""
+    clean()
+
+    count = {"#": 0}
+    emitted = []
+
+    class MyCollector(pyblish.api.ContextPlugin):
+        order = pyblish.api.CollectorOrder
+
+        def process(self, context):
+            context.create_instance("A")
+            context.create_instance("B")
+            count["#"] += 1
+
+    class MyValidator(pyblish.api.InstancePlugin):
+        order = pyblish.api.ValidatorOrder
+
+        def process(self, instance):
+            count["#"] += 10
+
+    for plugin in [MyCollector, MyValidator]:
+        pyblish.api.register_plugin(plugin)
+
+    ctrl = control.HeadlessController()
+    ctrl.about_to_process.connect(
+        lambda plugin, instance: emitted.append("about_to_process")
+    )
+    ctrl.was_processed.connect(lambda result: emitted.append("processed"))
+    ctrl.was_finished.connect(lambda: emitted.append("finished"))
+
+    # Processing must not rely on deferred calls
+    os.environ["PYBLISH_DELAY"] = "1"
+    try:
+        ctrl.reset()
+        assert count["#"] == 1, count
+
+        ctrl.publish()
+        assert count["#"] == 21, count
+
+    finally:
+        os.environ["PYBLISH_DELAY"] = "0"
+
+    assert not ctrl.is_running
+    pairs = len(emitted) // 2
+    assert_equals(emitted, ["about_to_process", "processed"] * pairs + [
+        "finished"
+    ])
+
+
+def test_scheduler_budget():
+    """Steps share a tick until the budget is spent or a repaint is due"""
+
+    calls = []
+
+    os.environ["PYBLISH_DELAY"] = "1"
+    try:
+        scheduler = control.Scheduler(mode="interactive", budget=1000)
+
+        for step in range(3):
+            scheduler.schedule(lambda step=step: calls.append(step))
+        scheduler.schedule(lambda: calls.append("painted"), repaint=True)
+        assert_equals(calls, [])
+
+        scheduler._on_tick()
+        assert_equals(calls, [0, 1, 2])
+
+        scheduler._on_tick()
+        assert_equals(calls, [0, 1, 2, "painted"])
+
+        # Repaints are of no concern when going for throughput
+        scheduler.mode = "throughput"
+        scheduler.schedule(lambda: calls.append(3))
+        scheduler.schedule(lambda: calls.append(4), repaint=True)
+        scheduler._on_tick()
+        assert_equals(calls, [0, 1, 2, "painted", 3, 4])
+
+    finally:
+        os.environ["PYBLISH_DELAY"] = "0"
+
+
+def test_scheduler_synchronous():
+    """Synchronous steps run in order, without recursion"""
+
+    calls = []
+    scheduler = control.Scheduler(mode="synchronous")
+
+    def step(remaining):
+        calls.append(remaining)
+        if remaining:
+            scheduler.schedule(lambda: step(remaining - 1))
+
+    scheduler.schedule(lambda: step(2000))
+
+    assert_equals(calls, list(reversed(range(2001))))
+
+
+def test_worker_thread_executor():
+    """Plug-ins run on the worker thread unless asked not to"""
+
+    threads = {}
+
+    class Threaded(pyblish.api.ContextPlugin):
+        pass
+
+    class MainThread(pyblish.api.ContextPlugin):
+        main_thread = True
+
+    def func(name):
+        threads[name] = QtCore.QThread.currentThread()
+        return name
+
+    results = []
+
+    executor = control.WorkerThreadExecutor()
+    try:
+        for plugin in (Threaded, MainThread):
+            executor.submit(
+                plugin,
+                lambda name=plugin.__name__: func(name),
+                lambda result, exc_info: results.append(result)
+            )
+
+        # Results are handed back via the event loop
+        for _ in range(100):
+            QtCore.QCoreApplication.processEvents()
+            if len(results) == 2:
+                break
+            QtCore.QThread.msleep(10)
+
+    finally:
+        executor.shutdown()
+
+    assert_equals(sorted(results), ["MainThread", "Threaded"])
+
+    main_thread = QtCore.QCoreApplication.instance().thread()
+    assert threads["MainThread"] == main_thread
+    assert threads["Threaded"] != main_thread
+
+
+@with_setup(clean)
+def test_publish_parallel():
+    """Parallel-safe plug-ins process all instances, results in order"""
+    clean()
+
+    names = ["Instance%d" % index for index in range(20)]
+    processed = []
+
+    class MyCollector(pyblish.api.ContextPlugin):
+        order = pyblish.api.CollectorOrder
+
+        def process(self, context):
+            for name in names:
+                context.create_instance(name, families=["myFamily"])
+
+    class MyValidator(pyblish.api.InstancePlugin):
+        order = pyblish.api.ValidatorOrder
+        families = ["myFamily"]
+        parallel = True
+
+        def process(self, instance):
+            self.log.info(instance.data["name"])
+
+            # Records of threads of the plug-in itself are kept too
+            thread = threading.Thread(
+                target=self.log.info, args=("%s done" % instance,)
+            )
+            thread.start()
+            thread.join()
+
+    for plugin in [MyCollector, MyValidator]:
+        pyblish.api.register_plugin(plugin)
+
+    ctrl = control.HeadlessController()
+    ctrl.parallel_workers = 4
+
+    def on_processed(result):
+        if result["plugin"].__name__ == "MyValidator":
+            processed.append(result)
+
+    ctrl.was_processed.connect(on_processed)
+    ctrl.reset()
+    ctrl.publish()
+    ctrl.cleanup()
+
+    assert_equals([result["instance"].data["name"] for result in processed],
+                  names)
+
+    # Every result holds the records of its own instance only
+    for result in processed:
+        name = result["instance"].data["name"]
+        messages = [record.msg for record in result["records"]]
+        assert_equals([msg for msg in messages if msg in names], [name])
+
+    # Records of threads of the plug-in are neither lost nor repeated
+    messages = [
+        record.msg for result in processed for record in result["records"]
+    ]
+    assert_equals(
+        sorted(messages), sorted(names + ["%s done" % n for n in names])
+    )
+
+
+@with_setup(clean)
+def test_process_pool():
+    """Extractors are processed by the pool, or in-process as fallback"""
+    clean()
+
+    plugin_dir = tempfile.mkdtemp()
+    with open(os.path.join(plugin_dir, "extract_pid.py"), "w") as f:
+        f.write(
+            "import os\n"
+            "import pyblish.api\n"
+            "\n"
+            "class ExtractPid(pyblish.api.InstancePlugin):\n"
+            "    order = pyblish.api.ExtractorOrder\n"
+            "\n"
+            "    def process(self, instance):\n"
+            "        self.log.info(\"Extracted %s\", instance)\n"
+            "        instance.data[\"pid\"] = os.getpid()\n"
+            "\n"
+            "\n"
+            "class ExtractChanges(pyblish.api.InstancePlugin):\n"
+            "    order = pyblish.api.ExtractorOrder\n"
+            "\n"
+            "    def process(self, instance):\n"
+            "        del instance.data[\"removed\"]\n"
+            "        instance.data[\"unpicklable\"] = lambda: None\n"
+            "        instance.context.create_instance(\"Created\")\n"
+        )
+
+    class MyCollector(pyblish.api.ContextPlugin):
+        order = pyblish.api.CollectorOrder
+
+        def process(self, context):
+            instance = context.create_instance("MyInstance")
+            instance.data["removed"] = True
+
+    class ExtractUnpicklable(pyblish.api.InstancePlugin):
+        order = pyblish.api.ExtractorOrder
+
+        def process(self, instance):
+            instance.data["unpicklable_pid"] = os.getpid()
+
+    for plugin in [MyCollector, ExtractUnpicklable]:
+        pyblish.api.register_plugin(plugin)
+    pyblish.api.register_plugin_path(plugin_dir)
+
+    results = {}
+
+    ctrl = control.HeadlessController()
+    ctrl.process_pool = control.ProcessPool(1)
+    ctrl.was_processed.connect(
+        lambda result: results.update({result["plugin"].__name__: result})
+    )
+    try:
+        ctrl.reset()
+        ctrl.publish()
+    finally:
+        ctrl.cleanup()
+        pyblish.api.deregister_plugin_path(plugin_dir)
+        shutil.rmtree(plugin_dir)
+
+    instance = ctrl.context[0]
+    assert instance.data["pid"] != os.getpid()
+    assert_equals(instance.data["unpicklable_pid"], os.getpid())
+
+    messages = [record.msg for record in results["ExtractPid"]["records"]]
+    assert_equals(messages, ["Extracted MyInstance"])
+
+    record = results["ExtractUnpicklable"]["records"][0]
+    assert "could not be sent to the process pool" in record.msg
+
+    # Removed data comes back, what can't come back is warned about
+    assert "removed" not in instance.data
+    assert "unpicklable" not in instance.data
+    assert_equals(len(ctrl.context), 1)
+
+    warnings = [
+        record.msg for record in results["ExtractChanges"]["records"]
+        if record.levelno == logging.WARNING
+    ]
+    assert_equals(len(warnings), 2)
+    assert "Created" in warnings[0]
+    assert "MyInstance['unpicklable']" in warnings[1]
+
+
+@with_setup(clean)
+def test_plugin_cache():
+    """Only plug-in files which changed are re-imported on reset"""
+    clean()
+
+    plugin_dir = tempfile.mkdtemp()
+    fname = os.path.join(plugin_dir, "validate_cached.py")
+
+    def write(label):
+        with open(fname, "w") as f:
+            f.write(
+                "import pyblish.api\n"
+                "\n"
+                "class ValidateCached(pyblish.api.InstancePlugin):\n"
+                "    order = pyblish.api.ValidatorOrder\n"
+                "    optional = True\n"
+                "    label = %r\n" % label
+            )
+
+    write("First")
+    pyblish.api.register_plugin_path(plugin_dir)
+
+    cache = control.PluginCache()
+    try:
+        first, = cache.discover(paths=[plugin_dir])
+        assert cache.stats() == {"hits": 0, "misses": 1, "files": 1}
+
+        # State written by the GUI doesn't survive a reset
+        first.active = False
+
+        second, = cache.discover(paths=[plugin_dir])
+        assert second is first
+        assert "active" not in second.__dict__
+        assert cache.hits == 1
+
+        # Changed size is picked up, regardless of mtime resolution
+        write("Second, changed")
+        third, = cache.discover(paths=[plugin_dir])
+        assert third is not first
+        assert third.label == "Second, changed"
+        assert cache.misses == 2
+
+        # Matches regular discovery
+        assert (
+            [p.__name__ for p in cache.discover()] ==
+            [p.__name__ for p in pyblish.api.discover()]
+        )
+
+    finally:
+        pyblish.api.deregister_plugin_path(plugin_dir)
+        shutil.rmtree(plugin_dir)
+
+
+@with_setup(clean)
+def test_plugin_cache_hosts():
+    """Hosts registered after discovery apply to unchanged files"""
+
+    plugin_dir = tempfile.mkdtemp()
+    with open(os.path.join(plugin_dir, "validate_host.py"), "w") as f:
+        f.write(
+            "import pyblish.api\n"
+            "\n"
+            "class ValidateHost(pyblish.api.InstancePlugin):\n"
+            "    order = pyblish.api.ValidatorOrder\n"
+            "    hosts = ['cachedHost']\n"
+        )
+
+    cache = control.PluginCache()
+    try:
+        assert_equals(cache.discover(paths=[plugin_dir]), [])
+
+        pyblish.api.register_host("cachedHost")
+        plugin, = cache.discover(paths=[plugin_dir])
+        assert_equals(plugin.__name__, "ValidateHost")
+        assert_equals(cache.stats()["hits"], 1)
+
+        pyblish.api.deregister_host("cachedHost")
+        assert_equals(cache.discover(paths=[plugin_dir]), [])
+
+    finally:
+        pyblish.api.deregister_host("cachedHost", quiet=True)
+        shutil.rmtree(plugin_dir)
+
+
+def test_compatibility_index():
+    """The compatibility index matches like pyblish.logic"""
+    clean()
+
+    from pyblish_lite import util
+
+    def plugin(name, families, match, instance_enabled=True):
+        base = (
+            pyblish.api.InstancePlugin if instance_enabled
+            else pyblish.api.ContextPlugin
+        )
+        return type(name, (base,), {"families": families, "match": match})
+
+    # More families than fit a single 64 bit word
+    wide = ["family%d" % i for i in range(100)]
+
+    plugins = [
+        plugin("Any", ["*"], pyblish.api.Intersection),
+        plugin("AnimOrModel", ["anim", "model"], pyblish.api.Intersection),
+        plugin("AnimReview", ["anim", "review"], pyblish.api.Subset),
+        plugin("ModelExact", ["model"], pyblish.api.Exact),
+        plugin("Wide", wide[-2:], pyblish.api.Subset),
+        plugin("Unknown", ["unknown"], pyblish.api.Intersection),
+        plugin("ContextAny", ["*"], pyblish.api.Intersection, False),
+        plugin("ContextModel", ["model"], pyblish.api.Intersection, False),
+        plugin("ContextReview", ["review"], pyblish.api.Subset, False),
+    ]
+
+    for use_numpy in set([False, util.numpy is not None]):
+        context = pyblish.api.Context()
+        context.create_instance("A", family="anim", families=["review"])
+        context.create_instance("B", family="model")
+        context.create_instance("C", family="model", families=["review"])
+        context.create_instance("W", family="review", families=wide)
+
+        index = util.CompatibilityIndex()
+        index.use_numpy = use_numpy
+        index.reset(plugins)
+
+        def assert_matches():
+            index.sync(context)
+            active = [
+                instance for instance in context
+                if instance.data.get("publish") is not False
+            ]
+            families = util.collect_families_from_instances(
+                context, only_active=True
+            )
+            assert_equals(sorted(index.families(True)), sorted(families))
+
+            for plugin in plugins:
+                if plugin.__instanceEnabled__:
+                    expected = pyblish.logic.instances_by_plugin(
+                        context, plugin
+                    )
+                    assert_equals(index.instances(plugin), expected)
+                    assert_equals(
+                        index.is_compatible(plugin),
+                        bool(pyblish.logic.instances_by_plugin(
+                            active, plugin
+                        ))
+                    )
+                else:
+                    assert_equals(
+                        index.is_compatible(plugin),
+                        bool(pyblish.logic.plugins_by_families(
+                            [plugin], families
+                        ))
+                    )
+
+        assert_matches()
+
+        # Families changed by a plug-in
+        context[1].data["families"] = ["review", "anim"]
+        assert_matches()
+
+        # Toggled
+        for instance in context:
+            if instance.data["family"] == "model":
+                instance.data["publish"] = False
+        assert_matches()
+        assert_equals(
+            index.instances(plugins[0], only_active=True),
+            [context[0], context[3]]
+        )
+
+        # Added and removed
+        context.remove(context[0])
+        context.create_instance("D", family="review", families=["anim"])
+        assert_matches()
+
+        for instance in list(context):
+            context.remove(instance)
+        assert_matches()
+
+
+def test_compatibility_affected():
+    """Toggling instances only affects plug-ins sharing their families"""
+    clean()
+
+    from pyblish_lite import util
+
+    def plugin(name, families, match, instance_enabled=True):
+        base = (
+            pyblish.api.InstancePlugin if instance_enabled
+            else pyblish.api.ContextPlugin
+        )
+        return type(name, (base,), {"families": families, "match": match})
+
+    plugins = [
+        plugin("Any", ["*"], pyblish.api.Intersection),
+        plugin("Nothing", [], pyblish.api.Subset),
+        plugin("Anim", ["anim"], pyblish.api.Intersection),
+        plugin("ModelReview", ["model", "review"], pyblish.api.Subset),
+        plugin("ContextModel", ["model"], pyblish.api.Exact, False),
+        plugin("ContextAnim", ["anim"], pyblish.api.Intersection, False),
+    ]
+
+    context = pyblish.api.Context()
+    context.create_instance("A", family="anim")
+    context.create_instance("B", family="model", families=["review"])
+    context.create_instance("C", family="model")
+    context.create_instance("D", family="layout")
+
+    index = util.CompatibilityIndex()
+    index.reset(plugins)
+
+    for instance in list(context) * 2:
+        index.sync(context)
+        before = [index.is_compatible(plugin) for plugin in plugins]
+
+        instance.data["publish"] = not instance.data.get("publish", True)
+        index.sync(context)
+
+        families = util.instance_families(instance)
+        for plugin, compatible in zip(plugins, before):
+            if compatible != index.is_compatible(plugin):
+                assert index.is_affected(plugin, families), (
+                    "%s changed by toggling %s" % (plugin, instance)
+                )
+
+    assert not index.is_affected(plugins[2], ["layout"])
+    assert index.is_affected(plugins[4], ["layout"])
+
+
+def test_compatibility_incremental():
+    """Only instances added, removed or said to change are compared"""
+    clean()
+
+    from pyblish_lite import util
+
+    class Model(pyblish.api.InstancePlugin):
+        families = ["model"]
+
+    context = control.Context()
+    model = context.create_instance("A", family="model")
+
+    index = util.CompatibilityIndex()
+    index.reset([Model])
+    assert index.sync(context, changed=[])
+    assert_equals(index.instances(Model), [model])
+
+    # Unchanged contexts aren't looked at
+    compared = []
+    sign = index._sign
+    index._sign = lambda instance: compared.append(instance) or sign(
+        instance
+    )
+
+    model.data["family"] = "rig"
+    assert not index.sync(context, changed=[])
+    assert_equals(compared, [])
+    assert_equals(index.instances(Model), [model])
+
+    assert index.sync(context, changed=[model])
+    assert_equals(index.instances(Model), [])
+
+    # Only new instances are compared
+    del compared[:]
+    other = context.create_instance("B", family="model")
+    assert index.sync(context, changed=[])
+    assert_equals(compared, [other])
+    assert_equals(index.instances(Model), [other])
+
+    context.remove(other)
+    assert index.sync(context, changed=[])
+    assert_equals(index.instances(Model), [])
+
+
+def test_timing():
+    """Results carry wall, CPU and queue time of each pair"""
+    clean()
+
+    import time
+    from pyblish_lite import util
+
+    class MyCollector(pyblish.api.ContextPlugin):
+        order = pyblish.api.CollectorOrder
+
+        def process(self, context):
+            context.create_instance("MyInstance")
+
+    class MyValidator(pyblish.api.InstancePlugin):
+        order = pyblish.api.ValidatorOrder
+
+        def process(self, instance):
+            time.sleep(0.05)
+
+    for plugin in [MyCollector, MyValidator]:
+        pyblish.api.register_plugin(plugin)
+
+    results = []
+    ctrl = control.HeadlessController()
+    ctrl.was_processed.connect(results.append)
+    ctrl.reset()
+    ctrl.publish()
+
+    for result in results:
+        timing = result["timing"]
+        assert_equals(sorted(timing), ["cpu", "queue", "wall"])
+        assert timing["queue"] >= 0
+        assert timing["wall"] >= 0
+
+    timing, = [
+        result["timing"] for result in results
+        if result["plugin"].__name__ == "MyValidator"
+    ]
+    assert timing["wall"] >= 0.05
+    assert timing["cpu"] < 0.05, "Sleeping doesn't count as CPU time"
+
+    total = util.add_timing(util.add_timing(None, timing), timing)
+    assert_equals(total["wall"], timing["wall"] * 2)
+    assert_equals(util.format_duration(0.0451), "45ms")
+    assert_equals(util.format_duration(2.44), "2.4s")
+    assert_equals(util.format_duration(187), "3m07s")
+
+
+def test_profiler():
+    """Profiling writes statistics of every pair"""
+    clean()
+
+    from pyblish_lite import util
+
+    def crunch():
+        # Spend the time here, rather than in a generator of its own
+        total = 0
+        for i in range(100000):
+            total += i * i
+        return total
+
+    class MyCollector(pyblish.api.ContextPlugin):
+        order = pyblish.api.CollectorOrder
+
+        def process(self, context):
+            context.create_instance("MyInstance")
+
+    class MyValidator(pyblish.api.InstancePlugin):
+        order = pyblish.api.ValidatorOrder
+
+        def process(self, instance):
+            crunch()
+
+    for plugin in [MyCollector, MyValidator]:
+        pyblish.api.register_plugin(plugin)
+
+    directory = tempfile.mkdtemp()
+    try:
+        results = []
+        ctrl = control.HeadlessController()
+        ctrl.profiler = control.Profiler(directory)
+        ctrl.was_processed.connect(results.append)
+        ctrl.reset()
+        ctrl.publish()
+
+        profiles = [result["profile"] for result in results]
+        assert all(os.path.isfile(path) for path in profiles)
+        assert_equals(
+            [os.path.dirname(path) for path in profiles],
+            [ctrl.profiler.directory] * len(results)
+        )
+
+        path, = [
+            result["profile"] for result in results
+            if result["plugin"].__name__ == "MyValidator"
+        ]
+        assert "MyInstance" in os.path.basename(path)
+        assert "crunch" in util.profile_summary([path])
+
+    finally:
+        shutil.rmtree(directory)
+
+    # Off by default
+    results = []
+    ctrl = control.HeadlessController()
+    ctrl.was_processed.connect(results.append)
+    ctrl.reset()
+    assert not any("profile" in result for result in results)
+
+
+def test_memory_tracker():
+    """Pairs retaining memory beyond the threshold are flagged"""
+    clean()
+
+    import json
+
+    retained = []
+
+    class MyCollector(pyblish.api.ContextPlugin):
+        order = pyblish.api.CollectorOrder
+
+        def process(self, context):
+            context.create_instance("MyInstance")
+
+    class RetainingValidator(pyblish.api.InstancePlugin):
+        order = pyblish.api.ValidatorOrder
+
+        def process(self, instance):
+            retained.append(bytearray(4 * 1024 ** 2))
+
+    class TidyValidator(pyblish.api.InstancePlugin):
+        order = pyblish.api.ValidatorOrder
+
+        def process(self, instance):
+            bytearray(4 * 1024 ** 2)
+
+    for plugin in [MyCollector, RetainingValidator, TidyValidator]:
+        pyblish.api.register_plugin(plugin)
+
+    fname = os.path.join(tempfile.mkdtemp(), "memory.json")
+
+    results = {}
+    ctrl = control.HeadlessController()
+    ctrl.memory_tracker = control.MemoryTracker(
+        threshold=1024 ** 2, path=fname
+    )
+    ctrl.was_processed.connect(
+        lambda result: results.update({result["plugin"].__name__: result})
+    )
+    ctrl.reset()
+    ctrl.publish()
+
+    # The report is written on cleanup
+    try:
+        ctrl.cleanup()
+        with open(fname) as f:
+            report = json.load(f)
+    finally:
+        shutil.rmtree(os.path.dirname(fname))
+
+    memory = results["RetainingValidator"]["memory"]
+    assert memory["retained"] >= 4 * 1024 ** 2
+    assert memory["flagged"]
+    assert memory["lines"]
+    assert any(
+        record.levelno == logging.WARNING
+        for record in results["RetainingValidator"]["records"]
+    )
+
+    memory = results["TidyValidator"]["memory"]
+    assert memory["retained"] < 1024 ** 2
+    assert memory["peak"] >= 4 * 1024 ** 2
+    assert not memory["flagged"]
+
+    assert_equals(report["threshold"], 1024 ** 2)
+    flagged = [pair["plugin"] for pair in report["pairs"] if pair["flagged"]]
+    assert_equals(flagged, ["RetainingValidator"])
+
+    # Snapshots are taken every few pairs only
+    tracker = control.MemoryTracker(interval=3)
+    snapshots = []
+    for pair in range(7):
+        tracker.stop(tracker.start(), MyCollector)
+        snapshots.append(tracker._snapshot)
+    tracker.shutdown()
+    assert_equals(len(set(map(id, snapshots))), 3)
+
+
+def test_tracer():
+    """A publishing session is exported as Chrome trace events"""
+    clean()
+
+    import json
+
+    class MyCollector(pyblish.api.ContextPlugin):
+        order = pyblish.api.CollectorOrder
+
+        def process(self, context):
+            context.create_instance("MyInstance")
+
+    class MyValidator(pyblish.api.InstancePlugin):
+        order = pyblish.api.ValidatorOrder
+
+        def process(self, instance):
+            pass
+
+    for plugin in [MyCollector, MyValidator]:
+        pyblish.api.register_plugin(plugin)
+
+    fname = os.path.join(tempfile.mkdtemp(), "trace.json")
+    try:
+        ctrl = control.HeadlessController()
+        ctrl.tracer = control.Tracer(fname)
+        ctrl.reset()
+        ctrl.publish()
+        ctrl.cleanup()
+
+        with open(fname) as f:
+            trace = json.load(f)
+    finally:
+        shutil.rmtree(os.path.dirname(fname))
+
+    events = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+    spans = set((event["cat"], event["name"]) for event in events)
+
+    for span in (("controller", "discover"),
+                 ("run", "collect"),
+                 ("run", "publish"),
+                 ("pair", "MyValidator"),
+                 ("process", "MyValidator"),
+                 ("scheduler", "defer")):
+        assert span in spans, span
+
+    assert all(event["dur"] >= 0 for event in events)
+    assert any(event["ph"] == "M" for event in trace["traceEvents"])
+
+    # Only the most recent events are kept
+    tracer = control.Tracer(capacity=2)
+    for name in ("a", "b", "c"):
+        tracer.complete(name, "test", time.time())
+    assert_equals([event["name"] for event in tracer.events], ["b", "c"])
+
+
+def test_watchdog():
+    """Stalls of the event loop are attributed to the running handler"""
+    app = QtCore.QCoreApplication.instance()
+
+    def spin(seconds):
+        end = time.time() + seconds
+        while time.time() < end:
+            app.processEvents()
+            time.sleep(0.005)
+
+    watchdog = control.Watchdog(threshold=100, interval=20)
+    reports = []
+    watchdog.stalled.connect(reports.append)
+    watchdog.start()
+    try:
+        spin(0.1)
+        assert_equals(reports, [])
+
+        slow = watchdog.watch("slow", lambda: time.sleep(0.4))
+        with watchdog.handler("outer"):
+            slow()
+        spin(0.1)
+
+    finally:
+        watchdog.stop()
+
+    assert_equals(len(reports), 1)
+    report = reports[0]
+    assert report["late"] >= 0.2, report
+    assert_equals(report["running"], "outer > slow")
+    assert_equals(set(name for name, _ in report["ran"]), {"outer", "slow"})
+    assert any("sleep" in line for line in report["stack"])
+    assert_equals(watchdog.reports, reports)
+
+
+@with_setup(clean)
+def test_instances_signals():
+    """Instances added to and removed from the context are emitted once"""
+    clean()
+
+    class CollectInstances(pyblish.api.ContextPlugin):
+        order = pyblish.api.CollectorOrder
+
+        def process(self, context):
+            context.create_instance("A")
+            context.create_instance("B")
+
+    class RemoveInstance(pyblish.api.ContextPlugin):
+        order = pyblish.api.CollectorOrder + 0.1
+
+        def process(self, context):
+            context.remove(context[0])
+
+    class Nothing(pyblish.api.ContextPlugin):
+        order = pyblish.api.CollectorOrder + 0.2
+
+        def process(self, context):
+            pass
+
+    for plugin in (CollectInstances, RemoveInstance, Nothing):
+        pyblish.api.register_plugin(plugin)
+
+    added = []
+    removed = []
+
+    ctrl = control.Controller()
+    ctrl.instances_added.connect(added.append)
+    ctrl.instances_removed.connect(removed.append)
+    ctrl.reset()
+
+    assert_equals([[str(i) for i in batch] for batch in added], [["A", "B"]])
+    assert_equals([[str(i) for i in batch] for batch in removed], [["A"]])
+    assert_equals(list(ctrl.instances), [ctrl.context[0].id])
+
+    # Nothing changed since
+    ctrl.sync_instances()
+    assert_equals(len(added), 1)
+    assert_equals(len(removed), 1)
+
+    # Adding and removing instances moves the generation on
+    generation = ctrl.context.generation
+    instance = ctrl.context.create_instance("C")
+    assert ctrl.context.generation > generation
+
+    generation = ctrl.context.generation
+    ctrl.context.remove(instance)
+    assert ctrl.context.generation > generation
@@ -29,3 +29,337 @@ def test_label_nonstring():
     for item in model_:
         assert isinstance(item.data(model.Label), six.text_type), (
             "\"%s\" wasn't a string!" % item.data(model.Label))
+
+
+def test_instance_model():
+    """Instances are grouped by family and removed along with their group"""
+
+    import pyblish.api
+    from pyblish_lite.constants import Roles, InstanceStates, GroupStates
+
+    context = pyblish.api.Context()
+    context._publish_states = InstanceStates.ContextType
+    context.data["name"] = "context"
+    for name, family in (("a", "A"), ("b", "B"), ("c", "A")):
+        context.create_instance(name, family=family)
+
+    model_ = model.InstanceModel(controller=None)
+    model_.append(context)
+    model_.extend(list(context))
+
+    groups = [
+        model_.index(row, 0).data() for row in range(model_.rowCount())
+    ]
+    assert groups == ["Context", "A", "B"], groups
+
+    group_index = model_.index(1, 0)
+    names = [
+        model_.index(row, 0, group_index).data()
+        for row in range(model_.rowCount(group_index))
+    ]
+    assert names == ["a", "c"], names
+
+    c = context[2]
+    item = model_.instance_items[c.id]
+    assert item.index() == model_.index(1, 0, group_index)
+    assert item.index().parent() == group_index
+    assert item.data(Roles.ObjectUIdRole) == "A.c"
+    assert item.data(Roles.FamiliesRole) == ["A"]
+
+    # Flags of instances propagate to their group
+    item.setData({InstanceStates.HasError: True}, Roles.PublishFlagsRole)
+    assert item.data(Roles.PublishFlagsRole) & InstanceStates.HasError
+    assert group_index.data(Roles.PublishFlagsRole) & GroupStates.HasError
+
+    # Only enabled, optional instances may be toggled
+    assert not item.setData(False, model.QtCore.Qt.CheckStateRole)
+    item.setData(True, Roles.IsEnabledRole)
+    assert item.setData(False, model.QtCore.Qt.CheckStateRole)
+    assert c.data["publish"] is False
+
+    model_.remove(context[0].id)
+    assert model_.instance_items[c.id].index().row() == 0
+
+    model_.remove(c.id)
+    groups = [
+        model_.index(row, 0).data() for row in range(model_.rowCount())
+    ]
+    assert groups == ["Context", "B"], groups
+    assert model_.group_items["B"].index().row() == 1
+
+
+def test_plugin_item():
+    """Plug-in items answer roles from the plug-in and data set on them"""
+
+    import pyblish.api
+    from pyblish_lite.constants import Roles, PluginStates
+
+    class MyAction(pyblish.api.Action):
+        on = "failed"
+
+    class MyValidator(pyblish.api.InstancePlugin):
+        """Validate things"""
+        order = pyblish.api.ValidatorOrder
+        families = ["myFamily"]
+        optional = True
+        actions = [MyAction]
+
+    item = model.PluginItem(MyValidator)
+
+    assert item.data(Roles.TypeRole) == model.PluginType
+    assert item.data(Roles.DocstringRole) == "Validate things"
+    assert item.data(Roles.FamiliesRole) == ["myFamily"]
+    assert item.data(Roles.ObjectUIdRole) == "%s.MyValidator" % (
+        MyValidator.__module__
+    )
+    assert item.data(model.QtCore.Qt.DisplayRole) == "MyValidator"
+
+    # Only enabled plug-ins may be toggled
+    item.setData(False, model.QtCore.Qt.CheckStateRole)
+    assert item.data(model.QtCore.Qt.CheckStateRole) is True
+    item.setData(True, Roles.IsEnabledRole)
+    item.setData(False, model.QtCore.Qt.CheckStateRole)
+    assert item.data(model.QtCore.Qt.CheckStateRole) is False
+    item.setData(True, model.QtCore.Qt.CheckStateRole)
+
+    # Roles internal to Qt are left to Qt
+    assert item.flags() == (
+        model.QtCore.Qt.ItemIsSelectable | model.QtCore.Qt.ItemIsEnabled
+    )
+    item.setFlags(model.QtCore.Qt.ItemIsEnabled)
+    assert item.flags() == model.QtCore.Qt.ItemIsEnabled
+    item.setFlags(
+        model.QtCore.Qt.ItemIsSelectable | model.QtCore.Qt.ItemIsEnabled
+    )
+
+    item.setData([PluginStates.IsCompatible], Roles.PublishFlagsRole)
+    assert not item.data(Roles.PluginActionsVisibleRole)
+
+    item.setData(
+        {PluginStates.HasError: True, PluginStates.WasProcessed: True},
+        Roles.PublishFlagsRole
+    )
+    assert item.data(Roles.PublishFlagsRole) == (
+        PluginStates.IsCompatible
+        | PluginStates.HasError
+        | PluginStates.WasProcessed
+    )
+    assert item.data(Roles.PluginActionsVisibleRole)
+    assert item.data(Roles.PluginValidActionsRole) == [MyAction]
+
+    # Valid actions are kept for as long as flags and active state are
+    actions = item.data(Roles.PluginValidActionsRole)
+    assert item.data(Roles.PluginValidActionsRole) is actions
+
+    item.setData({PluginStates.HasError: False}, Roles.PublishFlagsRole)
+    assert item.data(Roles.PluginValidActionsRole) == []
+    assert not item.data(Roles.PluginActionsVisibleRole)
+
+    item.setData({PluginStates.HasError: True}, Roles.PublishFlagsRole)
+    item.setData(False, model.QtCore.Qt.CheckStateRole)
+    assert item.data(Roles.PluginValidActionsRole) == []
+
+
+def test_batch_updates():
+    """Changes within a batch are emitted once per parent"""
+
+    import pyblish.api
+    from pyblish_lite.constants import Roles, InstanceStates, GroupStates
+
+    context = pyblish.api.Context()
+    context._publish_states = InstanceStates.ContextType
+    context.data["name"] = "context"
+    for name, family in (("a", "A"), ("b", "B"), ("c", "A"), ("d", "A")):
+        context.create_instance(name, family=family)
+
+    model_ = model.InstanceModel(controller=None)
+    model_.append(context)
+    model_.extend(list(context))
+
+    emitted = []
+    model_.dataChanged.connect(
+        lambda first, last, *args: emitted.append(
+            (first.parent().row(), first.row(), last.row())
+        )
+    )
+
+    with model_.batch_updates():
+        with model_.batch_updates():
+            for item in model_.instance_items.values():
+                item.setData(
+                    {InstanceStates.HasFinished: True},
+                    Roles.PublishFlagsRole
+                )
+
+        for group in model_.group_items.values():
+            group.setData(
+                {GroupStates.HasFinished: True}, Roles.PublishFlagsRole
+            )
+
+        assert emitted == [], emitted
+
+    assert sorted(emitted) == [(-1, 0, 2), (0, 0, 0), (1, 0, 2), (2, 0, 0)], (
+        emitted
+    )
+
+    for item in model_.instance_items.values():
+        assert item.data(Roles.PublishFlagsRole) & InstanceStates.HasFinished
+
+    del emitted[:]
+    model_.instance_items[context[0].id].setData(
+        {InstanceStates.HasFinished: False}, Roles.PublishFlagsRole
+    )
+    assert emitted == [(1, 0, 0)], emitted
+
+
+def test_artist_proxy():
+    """The proxy lists instances of all groups, in order of groups"""
+
+    import random
+    import pyblish.api
+
+    def flattened(source):
+        rows = []
+        for group_row in range(source.rowCount()):
+            group_index = source.index(group_row, 0)
+            for row in range(source.rowCount(group_index)):
+                rows.append(source.index(row, 0, group_index).data(
+                    model.Roles.ObjectIdRole
+                ))
+        return rows
+
+    random.seed(1)
+    context = pyblish.api.Context()
+    source = model.InstanceModel(controller=None)
+    proxy = model.ArtistProxy()
+    proxy.setSourceModel(source)
+
+    # What a view of the proxy would see, as per its signals
+    seen = []
+
+    def on_inserted(parent, first, last):
+        seen[first:first] = [
+            proxy.index(row, 0).data(model.Roles.ObjectIdRole)
+            for row in range(first, last + 1)
+        ]
+
+    def on_removed(parent, first, last):
+        del seen[first:last + 1]
+
+    proxy.rowsInserted.connect(on_inserted)
+    proxy.rowsRemoved.connect(on_removed)
+
+    families = ["A", "B", "C", "D", "E"]
+    for step in range(300):
+        if source.instance_items and random.random() < 0.4:
+            instance_id = random.choice(list(source.instance_items))
+            source.remove(instance_id)
+        else:
+            source.extend([
+                context.create_instance(
+                    "i%d" % step, family=random.choice(families)
+                )
+                for _ in range(random.randint(1, 4))
+            ])
+
+        expected = flattened(source)
+        assert proxy.rowCount() == len(expected)
+        assert seen == expected, step
+
+        for row, instance_id in enumerate(expected):
+            source_index = source.instance_items[instance_id].index()
+            proxy_index = proxy.mapFromSource(source_index)
+            assert proxy_index.row() == row
+            assert proxy.mapToSource(proxy_index) == source_index
+            assert proxy_index.data(model.Roles.ObjectIdRole) == instance_id
+
+    changed = []
+    proxy.dataChanged.connect(lambda first, last, *args: changed.append(
+        (first.row(), last.row())
+    ))
+    item = source.instance_items[expected[-1]]
+    item.setData(True, model.Roles.IsEnabledRole)
+    assert changed == [(len(expected) - 1, len(expected) - 1)], changed
+
+
+def test_record():
+    """Log records are prepared once, and flag their items"""
+
+    import pyblish.api
+    from pyblish_lite.constants import Roles, InstanceStates
+
+    context = pyblish.api.Context()
+    instance = context.create_instance("a", family="A")
+
+    records = [
+        logging.LogRecord(
+            "".join(["plugin", "A"]), level, "/plugin.py", 1, msg, [], None
+        )
+        for level, msg in ((logging.INFO, "Fine"), (logging.WARNING, 12))
+    ]
+
+    terminal = model.TerminalModel()
+    result = {"instance": instance, "records": records, "success": True}
+    result["records"] = terminal.prepare_records(result)
+
+    info, warning = result["records"]
+    assert isinstance(warning, model.Record)
+    assert warning.msg == warning.label == "12"
+    assert warning["levelname"] == "WARNING"
+    assert warning.get("traceback") is None and "traceback" not in warning
+    assert info.instance == warning.instance == "a"
+
+    # Repeated strings are shared
+    assert info.name is warning.name
+
+    # Records survive the round trip through disk
+    restored = model.Record(**warning.to_dict())
+    assert restored.to_dict() == warning.to_dict()
+
+    # The very same records are kept by items
+    instance_model = model.InstanceModel(controller=None)
+    instance_model.append(instance)
+    item = instance_model.update_with_result(result)
+    assert item.data(Roles.LogRecordsRole)[1] is warning
+    assert item.data(Roles.PublishFlagsRole) & InstanceStates.HasWarning
+
+
+def test_terminal_index():
+    """Terminal records are searched by words and filters"""
+
+    records = [
+        model.Record(
+            "record", msg, levelno=level, name=plugin, instance=instance
+        )
+        for msg, level, plugin, instance in (
+            ("Collected the scene", logging.INFO, "CollectScene", None),
+            ("Missing mesh", logging.WARNING, "ValidateMesh", "hero"),
+            ("missing texture", logging.ERROR, "ValidateTexture", "prop"),
+            ("Extracted mesh", logging.INFO, "ExtractMesh", "hero"),
+        )
+    ]
+
+    index = model.TerminalIndex()
+    for record_id, record in enumerate(records):
+        index.add(record_id, record)
+
+    assert index.search("missing") == [1, 2]
+    assert index.search("MESH") == [1, 3]
+    assert index.search("missing mesh") == [1]
+    assert index.search("level:warning") == [1, 2]
+    assert index.search("mesh level:error") == []
+    assert index.search("plugin:validate") == [1, 2]
+    assert index.search("instance:hero mesh") == [1, 3]
+    assert index.search("level:unknown") == []
+    assert index.search("") == []
+
+    # New records are tested one at a time
+    terms = index.parse("mesh level:warning")
+    assert [index.matches(record, terms) for record in records] == [
+        False, True, False, False
+    ]
+
+    # Records written to disk are no longer found
+    index.prune(2)
+    assert index.search("missing") == [2]
+    assert index.search("plugin:validatemesh") == []
@@ -0,0 +1,148 @@
+import os
+import sys
+import subprocess
+
+from nose.tools import assert_equals
+
+import pyblish_lite
+from pyblish_lite.vendor import Qt
+
+
+# Views need a QApplication, whereas tests run alongside a QCoreApplication
+closing = """
+import sys
+from pyblish_lite.vendor.Qt import QtWidgets
+from pyblish_lite import model, view
+
+app = QtWidgets.QApplication(sys.argv)
+
+terminal = model.TerminalModel()
+proxy = model.TerminalProxy(None)
+proxy.setSourceModel(terminal)
+
+terminal_view = view.TerminalView()
+terminal_view.setModel(proxy)
+terminal_view.resize(200, 100)
+terminal_view.show()
+
+for index in range(100):
+    terminal.append(model.Record("info", "Record %d" % index))
+
+app.processEvents()
+assert terminal_view.verticalScrollBar().value() > 0
+
+# As on closing the window
+terminal_view.setModel(None)
+terminal_view.resize(300, 100)
+app.processEvents()
+terminal.close()
+"""
+
+history = """
+import sys
+from pyblish_lite.vendor.Qt import QtWidgets, QtCore
+from pyblish_lite import model
+
+app = QtWidgets.QApplication(sys.argv)
+
+terminal = model.TerminalModel(capacity=5, page_size=3)
+for index in range(12):
+    terminal.append(model.Record("info", "Record %d" % index))
+
+# Records are written to disk a page at a time
+assert terminal.rowCount() == 1 + 6, terminal.rowCount()
+
+
+def details():
+    parent = terminal.index(0, 0)
+    return [
+        terminal.index(0, 0, terminal.index(row, 0, parent)).data(
+            QtCore.Qt.DisplayRole
+        )
+        for row in range(terminal.rowCount(parent))
+    ]
+
+
+terminal.fetchMore(terminal.index(0, 0))
+assert details() == ["Record 3", "Record 4", "Record 5"], details()
+
+# Records written to disk join those fetched
+for index in range(12, 14):
+    terminal.append(model.Record("info", "Record %d" % index))
+assert details() == ["Record %d" % index for index in range(4, 9)], details()
+
+terminal.close()
+"""
+
+sizing = """
+import sys
+from pyblish_lite.vendor.Qt import QtWidgets
+from pyblish_lite import delegate, model, view
+
+app = QtWidgets.QApplication(sys.argv)
+
+terminal = model.TerminalModel()
+terminal.append(model.Record("info", "Record " * 100))
+
+terminal_view = view.TerminalView()
+terminal_view.setModel(terminal)
+terminal_view.resize(300, 100)
+terminal_delegate = delegate.TerminalItem(terminal_view)
+
+# As given by PySide and PyQt4, without a widget nor a rect
+option = QtWidgets.QStyleOptionViewItem()
+index = terminal.index(0, 0, terminal.index(0, 0))
+size = terminal_delegate.sizeHint(option, index)
+width = terminal_view.viewport().width()
+assert size.width() == width, (size.width(), width)
+assert size.height() > 50, size.height()
+"""
+
+
+def run(script):
+    root = os.path.dirname(os.path.dirname(pyblish_lite.__file__))
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", PYTHONPATH=(
+        os.pathsep.join([root] + sys.path)
+    ))
+    process = subprocess.Popen(
+        [sys.executable, "-c", script],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    _, stderr = process.communicate()
+    return process.returncode, stderr.decode("utf-8", "replace")
+
+
+def test_terminal_view_close():
+    """Unsetting the model of the terminal, once scrolled, is fine"""
+
+    # Only Qt 5 and above come with the offscreen platform
+    if Qt.__binding__ in ("PySide", "PyQt4"):
+        return
+
+    returncode, stderr = run(closing)
+    assert "Traceback" not in stderr, stderr
+    assert_equals(returncode, 0)
+
+
+def test_terminal_history_details():
+    """Details of records fetched from and moved to history are shown"""
+
+    if Qt.__binding__ in ("PySide", "PyQt4"):
+        return
+
+    returncode, stderr = run(history)
+    assert "Traceback" not in stderr, stderr
+    assert_equals(returncode, 0)
+
+
+def test_terminal_detail_width():
+    """Details are measured against the view, without a widget given"""
+
+    if Qt.__binding__ in ("PySide", "PyQt4"):
+        return
+
+    returncode, stderr = run(sizing)
+    assert "Traceback" not in stderr, stderr
+    assert_equals(returncode, 0)